@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from apps.comments.threads import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute comment paths, thread reply counts and Post.comments_count (e.g. after loaddata)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--post", type=int, action="append", dest="posts", help="Only this post (repeatable).")
+
+    def handle(self, *args, **options):
+        updated = rebuild(options["posts"])
+        self.stdout.write(f"Rebuilt tree positions of {updated} comment(s).")
@@ -10,6 +10,12 @@ class Comment(models.Model):
     """
     Comment placed by a user under a Post.
     Supports replies through parent FK and simple moderation via is_active.
+
+    The reply tree is also kept as a materialized path (apps.comments.threads):
+    `path` is the chain of fixed-width ancestor ids, so a thread in display
+    order is one index range scan on (thread, path). `thread` is the
+    top-level comment (itself for top-level comments), `replies_count` the
+    number of active replies below a top-level comment.
     """
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="comments")
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
@@ -20,6 +26,17 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
         related_name="replies"
     )
+    thread = models.ForeignKey(
+        "self",
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="+",
+        editable=False,
+    )
+    path = models.CharField(max_length=255, blank=True, default="", editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    replies_count = models.PositiveIntegerField(default=0, editable=False)
     content = models.TextField(max_length=2000)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(default=timezone.now)
@@ -31,6 +48,10 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('created_at',)
+        indexes = [
+            models.Index(fields=['post', 'depth', 'created_at', 'id'], name='comment_post_threads_idx'),
+            models.Index(fields=['thread', 'path'], name='comment_thread_path_idx'),
+        ]
 
     def __str__(self):
         return f"Comment #{self.pk} by {self.user}"
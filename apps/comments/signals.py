@@ -0,0 +1,45 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+from apps.posts.models import Post
+from .models import Comment
+from .threads import attach_parent, tree_position
+
+
+@receiver(post_init, sender=Comment)
+def remember_active(sender, instance, **kwargs):
+    instance._was_active = instance.is_active
+
+
+@receiver(pre_save, sender=Comment)
+def place_in_tree(sender, instance, **kwargs):
+    if instance._state.adding and instance.parent_id:
+        instance.parent = attach_parent(instance.parent)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        instance.path, instance.depth, instance.thread_id = tree_position(instance.pk, instance.parent)
+        Comment.objects.filter(pk=instance.pk).update(
+            path=instance.path, depth=instance.depth, thread_id=instance.thread_id
+        )
+        if instance.is_active:
+            Post.objects.filter(pk=instance.post_id).update(comments_count=F("comments_count") + 1)
+            if instance.depth:
+                Comment.objects.filter(pk=instance.thread_id).update(replies_count=F("replies_count") + 1)
+    elif instance.is_active != instance._was_active:
+        delta = 1 if instance.is_active else -1
+        Post.objects.filter(pk=instance.post_id).update(comments_count=F("comments_count") + delta)
+        if instance.depth:
+            Comment.objects.filter(pk=instance.thread_id).update(replies_count=F("replies_count") + delta)
+    instance._was_active = instance.is_active
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if not instance._was_active:
+        return
+    Post.objects.filter(pk=instance.post_id).update(comments_count=F("comments_count") - 1)
+    if instance.depth and instance.thread_id != instance.pk:
+        Comment.objects.filter(pk=instance.thread_id, replies_count__gt=0).update(replies_count=F("replies_count") - 1)
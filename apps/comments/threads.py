@@ -0,0 +1,177 @@
+"""
+Threaded comments on a materialized path.
+
+Every comment stores the ids of its ancestors and itself as fixed-width
+base-36 segments in `path` ("0000002s0000002x" is a reply to #100 with id
+105), its nesting `depth` and the top-level comment of its `thread`. Sorting
+a thread by path yields the reply tree depth first, in creation order, so
+"the next 50 replies of thread X" is a range read on (thread, path) with
+the last seen path as the cursor.
+
+Top-level comments are paged oldest first by (created_at, id) cursor. The
+page query also picks, per thread, the path of its COMMENT_INLINE_REPLIES-th
+reply (a range read limited to that many rows), and the inline replies are
+then one query of per-thread (thread, path) ranges up to that path. Nothing
+here counts or loads a whole post's comments or a whole thread's replies,
+so the cost of a page doesn't depend on how many there are.
+"""
+from django.conf import settings
+from django.db.models import OuterRef, Q, Subquery
+
+from utils.pagination import decode_cursor, encode_cursor, newer_than
+
+from .models import Comment
+
+SEGMENT_WIDTH = 8
+MAX_DEPTH = Comment._meta.get_field("path").max_length // SEGMENT_WIDTH - 1
+THREADS_PAGE_SIZE = getattr(settings, "COMMENT_THREADS_PAGE_SIZE", 20)
+INLINE_REPLIES = getattr(settings, "COMMENT_INLINE_REPLIES", 3)
+REPLIES_PAGE_SIZE = getattr(settings, "COMMENT_REPLIES_PAGE_SIZE", 50)
+
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def encode_segment(pk):
+    out = ""
+    while pk:
+        pk, rem = divmod(pk, 36)
+        out = _DIGITS[rem] + out
+    return out.rjust(SEGMENT_WIDTH, "0")
+
+
+def tree_position(pk, parent=None):
+    """(path, depth, thread_id) of comment `pk` placed under `parent`."""
+    if parent is None:
+        return encode_segment(pk), 0, pk
+    return parent.path + encode_segment(pk), parent.depth + 1, parent.thread_id or parent.pk
+
+
+def attach_parent(parent):
+    """
+    The comment a reply to `parent` is actually attached to: the deepest
+    ancestor that still leaves room in `path`.
+    """
+    while parent is not None and parent.depth >= MAX_DEPTH:
+        parent = parent.parent
+    return parent
+
+
+def _threads_queryset(post):
+    # removed top-level comments stay as placeholders while they have replies
+    return (
+        Comment.objects.filter(post=post, depth=0)
+        .filter(Q(is_active=True) | Q(replies_count__gt=0))
+        .select_related("user", "edited_by")
+    )
+
+
+def _replies_queryset():
+    return Comment.objects.filter(depth__gt=0).select_related("user", "edited_by")
+
+
+def _inline_cutoff(inline):
+    # path of the outer thread's `inline`-th reply; NULL when it has fewer
+    replies = Comment.objects.filter(thread_id=OuterRef("pk"), depth__gt=0).order_by("path")
+    return Subquery(replies.values("path")[inline - 1:inline])
+
+
+def thread_page(post, after=None, limit=THREADS_PAGE_SIZE, inline=INLINE_REPLIES):
+    """
+    One page of top-level comments (oldest first) after the `after` cursor.
+    Each gets `inline_replies` (its first `inline` replies, tree order),
+    `more_replies` (active replies not inlined) and `replies_cursor` for
+    loading the rest.
+    Returns (threads, next_cursor).
+    """
+    position = decode_cursor(after)
+    qs = _threads_queryset(post)
+    if inline:
+        qs = qs.annotate(inline_cutoff=_inline_cutoff(inline))
+    qs = newer_than(qs, position) if position else qs.order_by("created_at", "id")
+    threads = list(qs[:limit + 1])
+    next_cursor = None
+    if len(threads) > limit:
+        threads = threads[:limit]
+        next_cursor = encode_cursor(threads[-1].created_at, threads[-1].pk)
+
+    inlined = {}
+    ranges = Q()
+    for thread in threads:
+        if inline and thread.replies_count:
+            cutoff = thread.inline_cutoff
+            ranges |= Q(thread_id=thread.pk, path__lte=cutoff) if cutoff else Q(thread_id=thread.pk)
+    if ranges:
+        for reply in _replies_queryset().filter(ranges).order_by("thread_id", "path"):
+            inlined.setdefault(reply.thread_id, []).append(reply)
+
+    for thread in threads:
+        thread.inline_replies = inlined.get(thread.pk, [])
+        shown = sum(1 for reply in thread.inline_replies if reply.is_active)
+        thread.more_replies = max(thread.replies_count - shown, 0)
+        thread.replies_cursor = thread.inline_replies[-1].path if thread.inline_replies else thread.path
+    return threads, next_cursor
+
+
+def replies_page(thread, after=None, limit=REPLIES_PAGE_SIZE):
+    """
+    Replies of a top-level comment in tree order, strictly after the `after`
+    path. Returns (replies, next_cursor).
+    """
+    after = after if after and after.startswith(thread.path) else thread.path
+    replies = list(_replies_queryset().filter(thread=thread, path__gt=after).order_by("path")[:limit + 1])
+    next_cursor = None
+    if len(replies) > limit:
+        replies = replies[:limit]
+        next_cursor = replies[-1].path
+    return replies, next_cursor
+
+
+def comment_payload(comment):
+    """JSON shape of one comment; content is withheld once removed."""
+    return {
+        "id": comment.pk,
+        "parent_id": comment.parent_id,
+        "thread_id": comment.thread_id,
+        "depth": comment.depth,
+        "user": {"id": comment.user_id, "username": comment.user.username},
+        "content": comment.content if comment.is_active else None,
+        "is_active": comment.is_active,
+        "created_at": comment.created_at.isoformat(),
+        "edited": bool(comment.edited_at),
+    }
+
+
+def rebuild(post_ids=None):
+    """
+    Recompute path/depth/thread/replies_count for the comments of the given
+    posts (all posts by default) and Post.comments_count. Comments are
+    visited in id order, so parents are placed before their replies.
+    Returns the number of comments updated.
+    """
+    from apps.posts.models import Post
+
+    posts = Post.objects.filter(comments__isnull=False).distinct()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    else:
+        Post.objects.filter(comments__isnull=True, comments_count__gt=0).update(comments_count=0)
+
+    updated = 0
+    for post_id in posts.values_list("pk", flat=True).iterator():
+        comments = list(Comment.objects.filter(post_id=post_id).order_by("id").only("id", "parent_id", "is_active"))
+        by_pk = {c.pk: c for c in comments}
+        replies = {}
+        for c in comments:
+            parent = by_pk.get(c.parent_id)
+            while parent is not None and parent.depth >= MAX_DEPTH:
+                parent = by_pk.get(parent.parent_id)
+            c.parent_id = parent.pk if parent is not None else None
+            c.path, c.depth, c.thread_id = tree_position(c.pk, parent)
+            if c.depth and c.is_active:
+                replies[c.thread_id] = replies.get(c.thread_id, 0) + 1
+        for c in comments:
+            c.replies_count = replies.get(c.pk, 0) if c.depth == 0 else 0
+        Comment.objects.bulk_update(comments, ["parent", "path", "depth", "thread", "replies_count"], batch_size=500)
+        Post.objects.filter(pk=post_id).update(comments_count=sum(1 for c in comments if c.is_active))
+        updated += len(comments)
+    return updated
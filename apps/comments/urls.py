@@ -7,4 +7,6 @@ urlpatterns = [
     path("add/<int:post_pk>/", views.AddCommentView.as_view(), name="add"),
     path("edit/<int:pk>/", views.EditCommentView.as_view(), name="edit"),
     path("delete/<int:pk>/", views.DeleteCommentView.as_view(), name="delete"),
+    path("post/<int:post_pk>/threads/", views.CommentThreadsView.as_view(), name="threads"),
+    path("<int:pk>/replies/", views.CommentRepliesView.as_view(), name="replies"),
 ]
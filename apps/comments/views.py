@@ -1,5 +1,6 @@
 from django.urls import reverse_lazy
 from django.shortcuts import get_object_or_404, redirect
+from django.views import View
 from django.views.generic import CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseForbidden
@@ -7,7 +8,9 @@ from django.template.loader import render_to_string
 from utils.posts_utils import AuthorRequiredMixin
 from .models import Comment
 from .forms import CommentForm
+from .threads import comment_payload, replies_page, thread_page
 from apps.posts.models import Post
+from django.db import transaction
 from django.utils import timezone
 from django.urls import reverse
 
@@ -21,45 +24,48 @@ class AddCommentView(LoginRequiredMixin, CreateView):
         self.post_obj = get_object_or_404(Post, pk=kwargs.get("post_pk"), is_active=True)
         return super().dispatch(request, *args, **kwargs)
 
+    @transaction.atomic
     def form_valid(self, form):
         comment = form.save(commit=False)
+        if comment.parent_id and comment.parent.post_id != self.post_obj.pk:
+            form.add_error("parent", "Reply must belong to the same post.")
+            return self.form_invalid(form)
         comment.user = self.request.user
         comment.post = self.post_obj
         comment.save()
 
         # --- notify post author ---
-        try:
-            from apps.notifications.services import create_notification
-            post_author = getattr(comment.post, "user", None)
-            if post_author and post_author != comment.user:
+        # not swallowed: a failed enqueue rolls the comment back with it
+        from apps.notifications.services import enqueue_notification
+        post_author_id = comment.post.user_id
+        if post_author_id and post_author_id != comment.user_id:
+            post_url = None
+            try:
+                if hasattr(comment.post, "get_absolute_url"):
+                    post_url = comment.post.get_absolute_url()
+            except Exception:
                 post_url = None
+            if not post_url:
                 try:
-                    if hasattr(comment.post, "get_absolute_url"):
-                        post_url = comment.post.get_absolute_url()
+                    post_url = reverse("posts:detail", args=[comment.post.pk])
                 except Exception:
                     post_url = None
-                if not post_url:
-                    try:
-                        post_url = reverse("posts:detail", args=[comment.post.pk])
-                    except Exception:
-                        post_url = None
-
-                create_notification(
-                    recipient=post_author,
-                    actor=comment.user,
-                    verb="commented on your post",
-                    target=comment.post,
-                    data={"post_id": comment.post.pk, "comment_id": comment.pk, "url": post_url},
-                )
-        except Exception:
-            pass
+
+            enqueue_notification(
+                post_author_id,
+                actor=comment.user,
+                verb="commented on your post",
+                target=comment.post,
+                data={"post_id": comment.post.pk, "comment_id": comment.pk, "url": post_url},
+            )
 
 
         if self.request.headers.get("x-requested-with") == "XMLHttpRequest":
             html = render_to_string("apps/comments/_comment.html",
                                     {"comment": comment, "user": self.request.user},
                                     request=self.request)
-            return JsonResponse({"status": "ok", "html": html, "comment_id": comment.pk})
+            return JsonResponse({"status": "ok", "html": html, "comment_id": comment.pk,
+                                 "parent_id": comment.parent_id, "thread_id": comment.thread_id})
         return redirect(self.post_obj.get_absolute_url() if hasattr(self.post_obj, "get_absolute_url")
                         else reverse_lazy("posts:detail", args=[self.post_obj.pk]))
 
@@ -116,3 +122,47 @@ class DeleteCommentView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
             return JsonResponse({"status": "ok", "comment_id": comment.pk})
         return redirect(comment.post.get_absolute_url() if hasattr(comment.post, "get_absolute_url")
                         else reverse_lazy("posts:detail", args=[comment.post.pk]))
+
+
+class CommentThreadsView(View):
+    """
+    JSON page of a post's top-level comments, oldest first, each with its
+    first replies inlined. Page with ?after=<next cursor>.
+    """
+    def get(self, request, post_pk, *args, **kwargs):
+        post = get_object_or_404(Post, pk=post_pk, is_active=True)
+        threads, next_cursor = thread_page(post, after=request.GET.get("after"))
+        html = render_to_string("apps/comments/_threads.html", {"threads": threads, "post": post}, request=request)
+        return JsonResponse({
+            "status": "ok",
+            "threads": [
+                {
+                    **comment_payload(t),
+                    "replies": [comment_payload(r) for r in t.inline_replies],
+                    "more_replies": t.more_replies,
+                    "replies_cursor": t.replies_cursor,
+                }
+                for t in threads
+            ],
+            "next": next_cursor,
+            "html": html,
+        })
+
+
+class CommentRepliesView(View):
+    """
+    JSON page of the replies under a top-level comment, in tree order.
+    Page with ?after=<next cursor> (the replies_cursor of an inlined thread).
+    """
+    def get(self, request, pk, *args, **kwargs):
+        thread = get_object_or_404(Comment, pk=pk, depth=0, post__is_active=True)
+        replies, next_cursor = replies_page(thread, after=request.GET.get("after"))
+        html = "".join(
+            render_to_string("apps/comments/_comment.html", {"comment": r}, request=request) for r in replies
+        )
+        return JsonResponse({
+            "status": "ok",
+            "replies": [comment_payload(r) for r in replies],
+            "next": next_cursor,
+            "html": html,
+        })
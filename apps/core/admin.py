@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import OutboxEvent
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ("id", "topic", "attempts", "created_at", "available_at", "processed_at")
+    list_filter = ("topic",)
+    search_fields = ("last_error",)
@@ -0,0 +1,13 @@
+"""
+Context processors shared by all templates.
+"""
+from django.utils.functional import SimpleLazyObject
+from .nav import get_nav_state
+
+
+def nav_state(request):
+    """
+    Expose navbar state as a lazy object: nothing is queried (or read from
+    cache) unless a template actually accesses `nav_state`.
+    """
+    return {"nav_state": SimpleLazyObject(lambda: get_nav_state(getattr(request, "user", None)))}
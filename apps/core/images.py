@@ -0,0 +1,207 @@
+"""
+Resized, re-encoded derivatives of uploaded images (post images, avatars).
+
+Uploads are stored as-is; saving a model whose image changed records an
+"images.variants" outbox event and the outbox worker renders every
+IMAGE_VARIANTS size in every IMAGE_VARIANT_FORMATS format next to the
+original. Only the storage API (open/save/delete/url) is used, so the same
+code runs on FileSystemStorage and S3.
+
+What was generated is kept on the model in a `<field>_variants` JSONField:
+
+    {"source": "posts/img/a.jpg",
+     "card": {"width": 600, "height": 400,
+              "webp": "posts/img/variants/a.jpg.card.webp",
+              "jpeg": "posts/img/variants/a.jpg.card.jpg"}, ...}
+
+Variant names keep the whole source file name, so a.jpg and a.png get
+distinct derivatives. `source` ties the derivatives to the file they were
+made from; until they match the current file name, variant_url() falls back
+to the original. Only paths listed in an instance's own `<field>_variants`
+are ever overwritten or deleted.
+"""
+import logging
+import posixpath
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .outbox import enqueue
+
+logger = logging.getLogger(__name__)
+
+VARIANTS = getattr(settings, "IMAGE_VARIANTS", {"thumb": 160, "card": 600, "full": 1600})
+FORMATS = tuple(getattr(settings, "IMAGE_VARIANT_FORMATS", ("webp", "jpeg")))
+QUALITY = getattr(settings, "IMAGE_VARIANT_QUALITY", 82)
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+VARIANTS_TOPIC = "images.variants"
+
+
+def variants_field(field_name):
+    return f"{field_name}_variants"
+
+
+def needs_variants(instance, field_name):
+    """True when the stored derivatives don't belong to the current file."""
+    name = getattr(instance, field_name).name or ""
+    variants = getattr(instance, variants_field(field_name)) or {}
+    return name != variants.get("source", "")
+
+
+def enqueue_variants(instance, field_name):
+    """
+    Record a derivative job for instance.<field_name> in the outbox, inside
+    the caller's transaction.
+    """
+    return enqueue(VARIANTS_TOPIC, {
+        "model": instance._meta.label_lower,
+        "pk": instance.pk,
+        "field": field_name,
+        "source": getattr(instance, field_name).name or "",
+    })
+
+
+def variant_path(source, variant, fmt):
+    directory, filename = posixpath.split(source)
+    return posixpath.join(directory, "variants", f"{filename}.{variant}.{EXTENSIONS[fmt]}")
+
+
+def _encode(image, fmt):
+    buf = BytesIO()
+    if fmt == "jpeg":
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        image.save(buf, "JPEG", quality=QUALITY, optimize=True, progressive=True)
+    else:
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() or image.mode == "P" else "RGB")
+        image.save(buf, "WEBP", quality=QUALITY, method=4)
+    return ContentFile(buf.getvalue())
+
+
+def render_variants(fieldfile, owned=()):
+    """
+    Write every variant of `fieldfile` to its storage and return the
+    variants dict. Images are never upscaled. An existing file at a variant
+    path is replaced only when it is in `owned`; otherwise the storage picks
+    a free name.
+    """
+    storage = fieldfile.storage
+    with fieldfile.open("rb") as fh:
+        original = Image.open(fh)
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+    variants = {"source": fieldfile.name}
+    for variant, size in VARIANTS.items():
+        image = original.copy()
+        image.thumbnail((size, size), Image.LANCZOS)
+        entry = {"width": image.width, "height": image.height}
+        for fmt in FORMATS:
+            path = variant_path(fieldfile.name, variant, fmt)
+            if path in owned and storage.exists(path):
+                storage.delete(path)  # ours: regenerate in place
+            entry[fmt] = storage.save(path, _encode(image, fmt))
+        variants[variant] = entry
+    return variants
+
+
+def delete_variants(storage, variants, keep=()):
+    for variant, entry in (variants or {}).items():
+        if variant == "source":
+            continue
+        for fmt in FORMATS:
+            path = entry.get(fmt)
+            if path and path not in keep:
+                try:
+                    storage.delete(path)
+                except Exception:
+                    logger.warning("Could not delete image variant %s", path, exc_info=True)
+
+
+def _paths(variants):
+    return {entry.get(fmt) for key, entry in (variants or {}).items() if key != "source" for fmt in FORMATS}
+
+
+def generate(instance, field_name, force=False):
+    """
+    Bring instance.<field_name>_variants in line with the current file:
+    render derivatives for a new file, drop them when the image was cleared.
+    Up-to-date derivatives are left alone unless `force`, which re-renders
+    them in place over the paths already recorded. The row is updated with a
+    queryset update (no save signals); models with an `updated_at` column get
+    it bumped so cached fragments refresh.
+    """
+    fieldfile = getattr(instance, field_name)
+    old = getattr(instance, variants_field(field_name)) or {}
+    if not force and not needs_variants(instance, field_name):
+        return old
+    new = render_variants(fieldfile, owned=_paths(old)) if fieldfile.name else {}
+
+    changes = {variants_field(field_name): new}
+    if any(f.name == "updated_at" for f in instance._meta.concrete_fields):
+        changes["updated_at"] = timezone.now()
+    # only store them if the file wasn't replaced again in the meantime
+    current = Q(**{field_name: fieldfile.name}) if fieldfile.name else (
+        Q(**{field_name: ""}) | Q(**{f"{field_name}__isnull": True})
+    )
+    updated = type(instance)._default_manager.filter(current, pk=instance.pk).update(**changes)
+    if not updated:
+        delete_variants(fieldfile.storage, new)
+        return None
+    for attr, value in changes.items():
+        setattr(instance, attr, value)
+    delete_variants(fieldfile.storage, old, keep=_paths(new))
+    return new
+
+
+def handle_variants_event(payload):
+    model = apps.get_model(payload["model"])
+    field_name = payload["field"]
+    instance = model._default_manager.filter(pk=payload["pk"]).first()
+    if instance is None or (getattr(instance, field_name).name or "") != payload["source"]:
+        return  # deleted, or replaced again: a newer event covers it
+    generate(instance, field_name)
+
+
+def variant_url(fieldfile, variant, fmt="jpeg"):
+    """
+    URL of the `variant` derivative in `fmt`, or of the original file while
+    derivatives are missing or stale. Empty string when there is no file.
+    """
+    if not fieldfile:
+        return ""
+    variants = getattr(fieldfile.instance, variants_field(fieldfile.field.name), None) or {}
+    if variants.get("source") == fieldfile.name:
+        path = (variants.get(variant) or {}).get(fmt)
+        if path:
+            return fieldfile.storage.url(path)
+    return fieldfile.url
+
+
+def variant_urls(fieldfile):
+    """{variant: {fmt: url, "width": w, "height": h}} for generated derivatives."""
+    if not fieldfile:
+        return {}
+    variants = getattr(fieldfile.instance, variants_field(fieldfile.field.name), None) or {}
+    if variants.get("source") != fieldfile.name:
+        return {}
+    return {
+        variant: {
+            key: (fieldfile.storage.url(value) if key in FORMATS else value)
+            for key, value in entry.items()
+        }
+        for variant, entry in variants.items()
+        if variant != "source"
+    }
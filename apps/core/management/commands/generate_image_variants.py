@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from apps.core.images import generate, needs_variants
+from apps.posts.models import Post
+from apps.users.models import User
+
+TARGETS = ((Post, "image"), (User, "avatar"))
+
+
+class Command(BaseCommand):
+    help = "Render missing or stale image derivatives (post images, avatars) inline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Re-render derivatives that are up to date.")
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        for model, field_name in TARGETS:
+            qs = model.objects.exclude(**{field_name: ""}).exclude(**{f"{field_name}__isnull": True})
+            for instance in qs.iterator():
+                if not options["force"] and not needs_variants(instance, field_name):
+                    continue
+                try:
+                    generate(instance, field_name, force=options["force"])
+                    done += 1
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"{model._meta.label} {instance.pk}: {exc}")
+        self.stdout.write(f"Rendered derivatives for {done} image(s), {failed} failed.")
@@ -0,0 +1,72 @@
+import logging
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+from apps.core.outbox import drain, prune, shared_backend_problems
+
+logger = logging.getLogger(__name__)
+
+PRUNE_INTERVAL_SECONDS = 600
+
+
+class Command(BaseCommand):
+    help = "Long-running worker draining the transactional outbox (notifications and other side effects)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--idle-sleep", type=float, default=1.0, help="Seconds to wait when the outbox is empty.")
+        parser.add_argument("--once", action="store_true", help="Drain what is due and exit.")
+        parser.add_argument(
+            "--allow-local-backends",
+            action="store_true",
+            help="Run even though cache/realtime broker are process-local (tests, single-process setups).",
+        )
+
+    def handle(self, *args, **options):
+        problems = shared_backend_problems()
+        if problems and not options["allow_local_backends"]:
+            raise CommandError(
+                "Refusing to start: the worker's cache invalidations and realtime events would not reach "
+                "the web processes because " + "; ".join(problems) + "."
+            )
+
+        self._stop = False
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        periodic = [
+            (path, import_string(path), interval)
+            for path, interval in getattr(settings, "OUTBOX_PERIODIC_TASKS", {}).items()
+        ]
+        next_run = {path: 0.0 for path, _, _ in periodic}
+
+        total = 0
+        next_prune = 0.0
+        while not self._stop:
+            if time.monotonic() >= next_prune:
+                pruned = prune()
+                if pruned:
+                    self.stdout.write(f"Pruned {pruned} processed event(s).")
+                next_prune = time.monotonic() + PRUNE_INTERVAL_SECONDS
+            for path, task, interval in periodic:
+                if time.monotonic() >= next_run[path]:
+                    try:
+                        task()
+                    except Exception:
+                        logger.exception("Periodic task %s failed", path)
+                    next_run[path] = time.monotonic() + interval
+            handled = drain(options["batch_size"])
+            total += handled
+            if handled:
+                self.stdout.write(f"Processed {handled} event(s).")
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["idle_sleep"])
+        self.stdout.write(f"Outbox worker stopped after {total} event(s).")
+
+    def _request_stop(self, signum, frame):
+        self._stop = True
@@ -0,0 +1,39 @@
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEvent(models.Model):
+    """
+    Transactional outbox row. Side effects are recorded with
+    apps.core.outbox.enqueue() inside the caller's transaction and executed
+    later by `manage.py run_outbox_worker`, which dispatches on `topic`
+    through settings.OUTBOX_HANDLERS.
+    processed_at is set on success and also once attempts reach the retry
+    limit (last_error is kept for the dead-lettered rows). Processed rows are
+    pruned by apps.core.outbox.prune().
+    """
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("pk",)
+        indexes = [
+            models.Index(
+                fields=["available_at"],
+                condition=models.Q(processed_at__isnull=True),
+                name="outbox_pending_idx",
+            ),
+            models.Index(
+                fields=["processed_at"],
+                condition=models.Q(processed_at__isnull=False),
+                name="outbox_processed_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"OutboxEvent {self.pk} ({self.topic})"
@@ -0,0 +1,111 @@
+"""
+Navbar state service.
+
+Builds everything the navbar needs (unread messages, unread notifications,
+recent conversations and notifications) in a fixed number of queries and
+caches it per user. Cached entries are dropped by invalidate_nav_state()
+from the messaging/notifications signals whenever the underlying data changes.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+
+logger = logging.getLogger(__name__)
+
+NAV_STATE_TIMEOUT = getattr(settings, "NAV_STATE_CACHE_TIMEOUT", 300)
+RECENT_CONVERSATIONS_LIMIT = 5
+RECENT_NOTIFICATIONS_LIMIT = 6
+
+EMPTY_NAV_STATE = {
+    "unread_messages_count": 0,
+    "recent_conversations": [],
+    "unread_notifications_count": 0,
+    "recent_notifications": [],
+}
+
+
+def _cache_key(user_id):
+    return f"nav_state:{user_id}"
+
+
+def build_nav_state(user):
+    """
+    Compute nav state for `user` without touching the cache (5 queries, plus
+    one per content type among the recent notifications' targets).
+    """
+    from apps.messaging.models import Participant
+    from apps.notifications.counters import unread_count
+    from apps.notifications.models import Notification
+    from apps.notifications.serializers import load_notifications
+
+    parts = Participant.objects.filter(user=user, is_active=True)
+    unread_messages = parts.aggregate(total=Sum("unread_count"))["total"] or 0
+
+    recent_parts = list(
+        parts.select_related("conversation")
+        .order_by("-last_message_at", "-id")[:RECENT_CONVERSATIONS_LIMIT]
+    )
+    conv_ids = [p.conversation_id for p in recent_parts]
+
+    others = {}
+    if conv_ids:
+        other_parts = (
+            Participant.objects.filter(conversation_id__in=conv_ids)
+            .exclude(user=user)
+            .select_related("user")
+            .order_by("pk")
+        )
+        for op in other_parts:
+            others.setdefault(op.conversation_id, op.user)
+
+    recent_conversations = [
+        {
+            "conversation": p.conversation,
+            "other_user": others.get(p.conversation_id),
+            "unread": p.unread_count,
+        }
+        for p in recent_parts
+    ]
+
+    notifications = Notification.objects.filter(recipient=user)
+    unread_notifications = unread_count(user)
+    recent_notifications = load_notifications(
+        notifications.order_by("-created_at")[:RECENT_NOTIFICATIONS_LIMIT]
+    )
+
+    return {
+        "unread_messages_count": int(unread_messages),
+        "recent_conversations": recent_conversations,
+        "unread_notifications_count": unread_notifications,
+        "recent_notifications": recent_notifications,
+    }
+
+
+def get_nav_state(user):
+    """
+    Return cached nav state for `user`, building it on a cache miss.
+    Anonymous users always get the empty state.
+    """
+    if not user or not user.is_authenticated:
+        return EMPTY_NAV_STATE
+    key = _cache_key(user.pk)
+    state = cache.get(key)
+    if state is None:
+        try:
+            state = build_nav_state(user)
+        except Exception:
+            logger.exception("Failed to build nav state")
+            return EMPTY_NAV_STATE
+        cache.set(key, state, NAV_STATE_TIMEOUT)
+    return state
+
+
+def invalidate_nav_state(*user_ids):
+    """
+    Drop cached nav state for the given user ids.
+    """
+    keys = [_cache_key(uid) for uid in user_ids if uid]
+    if keys:
+        cache.delete_many(keys)
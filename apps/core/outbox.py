@@ -0,0 +1,126 @@
+"""
+Transactional outbox.
+
+enqueue() writes a small OutboxEvent row in the current transaction, so the
+side effect is recorded if and only if the request's changes commit.
+drain() processes a batch of due events; `manage.py run_outbox_worker` calls
+it in a loop. Failed events are retried with exponential backoff up to
+OUTBOX_MAX_ATTEMPTS. prune() deletes processed rows after
+OUTBOX_RETENTION_HOURS (dead-lettered ones after OUTBOX_DEAD_LETTER_RETENTION_DAYS);
+the worker runs it periodically.
+
+Handlers run in the worker process, so the cache and realtime broker must be
+shared with the web processes; shared_backend_problems() reports when not.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = getattr(settings, "OUTBOX_MAX_ATTEMPTS", 5)
+RETENTION = timedelta(hours=getattr(settings, "OUTBOX_RETENTION_HOURS", 72))
+DEAD_LETTER_RETENTION = timedelta(days=getattr(settings, "OUTBOX_DEAD_LETTER_RETENTION_DAYS", 30))
+PRUNE_BATCH_SIZE = 1000
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+RETRY_BASE_SECONDS = 10
+
+_handlers = {}
+
+
+def get_handler(topic):
+    if topic not in _handlers:
+        path = getattr(settings, "OUTBOX_HANDLERS", {}).get(topic)
+        _handlers[topic] = import_string(path) if path else None
+    return _handlers[topic]
+
+
+def enqueue(topic, payload):
+    return OutboxEvent.objects.create(topic=topic, payload=payload)
+
+
+def _process(event, now):
+    handler = get_handler(event.topic)
+    try:
+        if handler is None:
+            raise LookupError(f"No outbox handler for topic {event.topic!r}")
+        with transaction.atomic():
+            handler(event.payload)
+    except Exception as exc:
+        logger.exception("Outbox event %s (%s) failed", event.pk, event.topic)
+        event.attempts += 1
+        event.last_error = repr(exc)[:2000]
+        if event.attempts >= MAX_ATTEMPTS:
+            event.processed_at = now
+        else:
+            event.available_at = now + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (event.attempts - 1))
+        return False
+    event.processed_at = now
+    return True
+
+
+def drain(batch_size=100):
+    """
+    Process up to `batch_size` due events, each claimed, handled and marked
+    in its own short transaction so slow handlers never hold other rows
+    locked. Returns the number of events handled (successfully or not); 0
+    means the queue is idle.
+    """
+    handled = 0
+    while handled < batch_size:
+        now = timezone.now()
+        with transaction.atomic():
+            event = (
+                OutboxEvent.objects.select_for_update(skip_locked=True)
+                .filter(processed_at__isnull=True, available_at__lte=now)
+                .order_by("pk")
+                .first()
+            )
+            if event is None:
+                break
+            _process(event, now)
+            event.save(update_fields=["attempts", "last_error", "available_at", "processed_at"])
+        handled += 1
+    return handled
+
+
+def prune(batch_size=PRUNE_BATCH_SIZE):
+    """
+    Delete processed events past their retention in primary-key batches.
+    Returns the number of rows deleted.
+    """
+    now = timezone.now()
+    expired = OutboxEvent.objects.filter(processed_at__isnull=False).filter(
+        models.Q(processed_at__lt=now - RETENTION, attempts__lt=MAX_ATTEMPTS)
+        | models.Q(processed_at__lt=now - DEAD_LETTER_RETENTION)
+    )
+    deleted = 0
+    while True:
+        batch = list(expired.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        deleted += OutboxEvent.objects.filter(pk__in=batch).delete()[0]
+
+
+def shared_backend_problems():
+    """
+    Reasons why side effects of a separate worker process would not reach
+    the web processes (process-local cache or realtime broker).
+    """
+    problems = []
+    backend = settings.CACHES.get("default", {}).get("BACKEND", "")
+    if backend in PROCESS_LOCAL_CACHES:
+        problems.append(f"the default cache ({backend}) is process-local; set REDIS_URL")
+    broker = getattr(settings, "REALTIME_BROKER", "")
+    if broker.endswith(".LocalBroker"):
+        problems.append(f"REALTIME_BROKER ({broker}) is process-local; use apps.realtime.brokers.RedisBroker")
+    return problems
@@ -0,0 +1,36 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from apps.core.images import FORMATS, variant_url, variant_urls
+
+register = template.Library()
+
+
+@register.simple_tag
+def image_url(fieldfile, variant="card", fmt="jpeg"):
+    """{% image_url post.image "thumb" %} -> derivative URL, original as fallback."""
+    return variant_url(fieldfile, variant, fmt)
+
+
+@register.simple_tag
+def picture(fieldfile, variant="card", **attrs):
+    """
+    {% picture post.image "card" alt=post.title class="card-img-top" %}
+    renders a <picture> offering WebP with a JPEG <img> fallback, or a plain
+    <img> of the original while derivatives are being generated.
+    """
+    if not fieldfile:
+        return ""
+    attrs.setdefault("loading", "lazy")
+    entry = variant_urls(fieldfile).get(variant)
+    if not entry:
+        return format_html("<img src=\"{}\"{}>", fieldfile.url, flatatt(attrs))
+    attrs.setdefault("width", entry["width"])
+    attrs.setdefault("height", entry["height"])
+    sources = format_html_join(
+        "", "<source type=\"image/{}\" srcset=\"{}\">",
+        ((fmt, entry[fmt]) for fmt in FORMATS if fmt != "jpeg" and fmt in entry),
+    )
+    fallback = entry.get("jpeg") or fieldfile.url
+    return format_html("<picture>{}<img src=\"{}\"{}></picture>", sources, fallback, flatatt(attrs))
@@ -1,4 +1,5 @@
 from django.views.generic import TemplateView
+from apps.likes.services import liked_post_ids
 from apps.posts.models import Post
 
 class MainView(TemplateView):
@@ -6,9 +7,11 @@ class MainView(TemplateView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx["latest_posts"] = (
+        ctx["latest_posts"] = list(
             Post.objects.filter(is_active=True)
             .select_related("user")
+            .prefetch_related("tags")
             .order_by("-created_at")[:6]
         )
+        ctx["liked_post_ids"] = liked_post_ids(self.request.user, [p.pk for p in ctx["latest_posts"]])
         return ctx
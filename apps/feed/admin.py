@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import TimelineEntry
+
+
+@admin.register(TimelineEntry)
+class TimelineEntryAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "post", "author", "created_at")
+    search_fields = ("user__email", "author__email", "post__title")
+    raw_id_fields = ("user", "post", "author")
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class FeedConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.feed"
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from apps.feed.models import TimelineEntry
+from apps.feed.timeline import TIMELINE_DEPTH, backfill, pull_authors, trim
+from apps.subscriptions.models import Subscription
+
+
+class Command(BaseCommand):
+    help = "Rebuild home timelines from current subscriptions (all users or --user)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="users")
+
+    def handle(self, *args, **options):
+        subs = Subscription.objects.filter(is_active=True)
+        if options["users"]:
+            subs = subs.filter(follower_id__in=options["users"])
+        follower_ids = list(subs.values_list("follower_id", flat=True).distinct())
+        pulled = pull_authors()
+        for follower_id in follower_ids:
+            TimelineEntry.objects.filter(user_id=follower_id).delete()
+            for following_id in subs.filter(follower_id=follower_id).values_list("following_id", flat=True):
+                if following_id not in pulled:
+                    backfill(follower_id, following_id, limit=TIMELINE_DEPTH)
+            trim(follower_id)
+        self.stdout.write(f"Rebuilt {len(follower_ids)} timeline(s).")
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from apps.feed.models import TimelineEntry
+from apps.feed.timeline import TIMELINE_DEPTH, trim
+
+
+class Command(BaseCommand):
+    help = "Trim every home timeline to the newest FEED_TIMELINE_DEPTH entries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--depth", type=int, default=TIMELINE_DEPTH)
+
+    def handle(self, *args, **options):
+        depth = options["depth"]
+        over = (
+            TimelineEntry.objects.values("user_id")
+            .annotate(n=Count("pk"))
+            .filter(n__gt=depth)
+            .values_list("user_id", flat=True)
+        )
+        users = removed = 0
+        for user_id in over.iterator():
+            removed += trim(user_id, depth)
+            users += 1
+        self.stdout.write(f"Removed {removed} timeline entries from {users} timeline(s).")
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.db import models
+
+
+class TimelineEntry(models.Model):
+    """
+    One post in one follower's materialized home timeline.
+    created_at copies the post's, so a timeline page is a single range read
+    on (user, created_at, post). author is kept for cheap removal on unfollow.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="timeline_entries")
+    post = models.ForeignKey("posts.Post", on_delete=models.CASCADE, related_name="+")
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "post"], name="timeline_entry_unique"),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-post"], name="timeline_user_recent_idx"),
+            models.Index(fields=["user", "author"], name="timeline_user_author_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} ← post {self.post_id}"
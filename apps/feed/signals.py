@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from apps.posts.models import Post
+from .timeline import enqueue_post_created
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    if created and instance.is_active:
+        enqueue_post_created(instance)
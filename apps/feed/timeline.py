@@ -0,0 +1,199 @@
+"""
+Home timeline ("posts from people I follow").
+
+Fan-out on write: a new post is pushed into every follower's TimelineEntry
+rows by the outbox worker, in bulk batches, so reading a feed is one indexed
+range read. Authors with more than FEED_FANOUT_MAX_FOLLOWERS followers are
+not fanned out; their recent posts are merged in at read time instead
+(fan-out on read). Following someone backfills their latest posts,
+unfollowing removes them. Reading the first page of a timeline trims it once
+it has grown FEED_TIMELINE_TRIM_SLACK entries past FEED_TIMELINE_DEPTH (one
+LIMIT 1 probe at that offset), so fan-out stays a plain insert;
+`manage.py trim_timelines` (cron) trims everyone, including idle readers.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from apps.core.outbox import enqueue
+from apps.posts.models import Post
+from apps.subscriptions.models import Subscription
+from utils.pagination import decode_cursor, encode_cursor, older_than
+
+from .models import TimelineEntry
+
+logger = logging.getLogger(__name__)
+
+FEED_PAGE_SIZE = 20
+TIMELINE_DEPTH = getattr(settings, "FEED_TIMELINE_DEPTH", 800)
+TRIM_SLACK = getattr(settings, "FEED_TIMELINE_TRIM_SLACK", 50)
+FANOUT_BATCH_SIZE = getattr(settings, "FEED_FANOUT_BATCH_SIZE", 1000)
+FANOUT_MAX_FOLLOWERS = getattr(settings, "FEED_FANOUT_MAX_FOLLOWERS", 5000)
+BACKFILL_POSTS = getattr(settings, "FEED_BACKFILL_POSTS", 50)
+PULL_AUTHORS_CACHE_KEY = "feed:pull_authors"
+PULL_AUTHORS_TIMEOUT = 600
+
+POST_CREATED_TOPIC = "feed.post_created"
+FOLLOW_CHANGED_TOPIC = "feed.follow_changed"
+
+
+def _followers(author_id):
+    return Subscription.objects.filter(following_id=author_id, is_active=True)
+
+
+def pull_authors():
+    """
+    Ids of authors served by fan-out on read (too many followers to push to).
+    """
+    ids = cache.get(PULL_AUTHORS_CACHE_KEY)
+    if ids is None:
+        ids = list(
+            Subscription.objects.filter(is_active=True)
+            .values("following_id")
+            .annotate(n=Count("pk"))
+            .filter(n__gt=FANOUT_MAX_FOLLOWERS)
+            .values_list("following_id", flat=True)
+        )
+        cache.set(PULL_AUTHORS_CACHE_KEY, ids, PULL_AUTHORS_TIMEOUT)
+    return set(ids)
+
+
+def _entry(user_id, post):
+    return TimelineEntry(user_id=user_id, post_id=post.pk, author_id=post.user_id, created_at=post.created_at)
+
+
+# ---------------------------------------------------------------------
+# Write side (outbox handlers)
+# ---------------------------------------------------------------------
+def enqueue_post_created(post):
+    return enqueue(POST_CREATED_TOPIC, {"post_id": post.pk})
+
+
+def enqueue_follow_changed(follower, following):
+    return enqueue(FOLLOW_CHANGED_TOPIC, {
+        "follower_id": getattr(follower, "pk", follower),
+        "following_id": getattr(following, "pk", following),
+    })
+
+
+def fan_out(post):
+    """
+    Push `post` into its author's followers' timelines, one bulk insert per
+    FANOUT_BATCH_SIZE followers. Returns the number of followers reached.
+    """
+    followers = _followers(post.user_id)
+    if followers.count() > FANOUT_MAX_FOLLOWERS:
+        return 0
+    reached, last_pk = 0, 0
+    while True:
+        batch = list(
+            followers.filter(pk__gt=last_pk).order_by("pk").values_list("pk", "follower_id")[:FANOUT_BATCH_SIZE]
+        )
+        if not batch:
+            return reached
+        last_pk = batch[-1][0]
+        TimelineEntry.objects.bulk_create(
+            [_entry(follower_id, post) for _, follower_id in batch], ignore_conflicts=True
+        )
+        reached += len(batch)
+
+
+def backfill(follower_id, following_id, limit=None):
+    posts = Post.objects.filter(user_id=following_id, is_active=True).order_by("-created_at")[:limit or BACKFILL_POSTS]
+    TimelineEntry.objects.bulk_create([_entry(follower_id, p) for p in posts], ignore_conflicts=True)
+
+
+def trim(user_id, depth=None):
+    """
+    Drop the user's timeline entries beyond the newest `depth`.
+    """
+    depth = depth or TIMELINE_DEPTH
+    entries = TimelineEntry.objects.filter(user_id=user_id)
+    first_dropped = (
+        entries.order_by("-created_at", "-post_id").values_list("created_at", "post_id")[depth:depth + 1].first()
+    )
+    if first_dropped is None:
+        return 0
+    created_at, post_id = first_dropped
+    deleted, _ = entries.filter(
+        Q(created_at__lt=created_at) | Q(created_at=created_at, post_id__lte=post_id)
+    ).delete()
+    return deleted
+
+
+def trim_if_overgrown(user_id):
+    """
+    Trim the user's timeline if it has an entry at offset depth + slack;
+    the probe reads at most that many index entries. Returns rows removed.
+    """
+    offset = TIMELINE_DEPTH + TRIM_SLACK
+    probe = TimelineEntry.objects.filter(user_id=user_id).order_by("-created_at", "-post_id")
+    if not probe.values_list("post_id", flat=True)[offset:offset + 1]:
+        return 0
+    return trim(user_id)
+
+
+def handle_post_created(payload):
+    post = Post.objects.filter(pk=payload["post_id"], is_active=True).only("pk", "user_id", "created_at").first()
+    if post is not None:
+        fan_out(post)
+
+
+def handle_follow_changed(payload):
+    """
+    Follow → backfill the author's recent posts; unfollow → remove them.
+    The current Subscription state decides, so replays and quick toggles
+    converge on the right result.
+    """
+    follower_id, following_id = payload["follower_id"], payload["following_id"]
+    following = Subscription.objects.filter(
+        follower_id=follower_id, following_id=following_id, is_active=True
+    ).exists()
+    if following:
+        if following_id not in pull_authors():
+            backfill(follower_id, following_id)
+            trim(follower_id)
+    else:
+        TimelineEntry.objects.filter(user_id=follower_id, author_id=following_id).delete()
+
+
+# ---------------------------------------------------------------------
+# Read side
+# ---------------------------------------------------------------------
+def home_timeline(user, before=None, limit=None):
+    """
+    Return (posts, older_cursor) for a page of `user`'s home timeline,
+    newest first. older_cursor is None on the last page.
+    """
+    limit = limit or FEED_PAGE_SIZE
+    position = decode_cursor(before)
+    if not before:
+        trim_if_overgrown(user.pk)
+
+    entries = older_than(
+        TimelineEntry.objects.filter(user=user, post__is_active=True).select_related("post__user"),
+        position,
+        pk_field="post_id",
+    )
+    posts = [e.post for e in entries[:limit + 1]]
+
+    pulled = pull_authors()
+    if pulled:
+        followed = list(
+            Subscription.objects.filter(follower=user, is_active=True, following_id__in=pulled)
+            .values_list("following_id", flat=True)
+        )
+        if followed:
+            extra = older_than(
+                Post.objects.filter(user_id__in=followed, is_active=True).select_related("user"), position
+            )
+            seen = {p.pk for p in posts}
+            posts += [p for p in extra[:limit + 1] if p.pk not in seen]
+            posts.sort(key=lambda p: (p.created_at, p.pk), reverse=True)
+
+    has_more = len(posts) > limit
+    posts = posts[:limit]
+    older_cursor = encode_cursor(posts[-1].created_at, posts[-1].pk) if has_more and posts else None
+    return posts, older_cursor
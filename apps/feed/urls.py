@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = "feed"
+
+urlpatterns = [
+    path("", views.HomeTimelineView.as_view(), name="home"),
+]
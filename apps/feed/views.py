@@ -0,0 +1,20 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.views.generic import TemplateView
+from apps.likes.services import liked_post_ids
+from .timeline import home_timeline
+
+
+class HomeTimelineView(LoginRequiredMixin, TemplateView):
+    """
+    Posts from the people the current user follows, newest first, paged
+    with an opaque ?before= cursor.
+    """
+    template_name = "apps/feed/timeline.html"
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        posts, older_cursor = home_timeline(self.request.user, before=self.request.GET.get("before"))
+        ctx["posts"] = posts
+        ctx["older_cursor"] = older_cursor
+        ctx["liked_post_ids"] = liked_post_ids(self.request.user, [p.pk for p in posts])
+        return ctx
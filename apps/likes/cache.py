@@ -0,0 +1,165 @@
+"""
+Per-user liked-posts membership cache.
+
+The set of post ids a user has liked is loaded lazily with one query and
+kept in the cache. Users with up to LIKED_SET_MAX_IDS likes get the exact
+id set, so "did I like this" is answered without touching the database.
+Heavier likers get a Bloom filter instead (LIKED_SET_FALSE_POSITIVE_RATE):
+a miss is definite, only the "maybe" ids are checked with an exact query.
+
+After a like or unlike commits, an exact set cached under the current
+version token is updated in place (the id added or discarded) while holding
+a short per-user cache lock. Anything else -- a Bloom filter, no entry, a
+stale one, a set growing past MAX_IDS, or the lock being taken -- replaces
+the version token and deletes the entry instead; an entry is only used
+while it carries the current token. Builds only store into an empty slot
+(cache.add), so one that read the database before a change committed never
+overwrites the updated set; if it lands after an invalidation it carries
+the old token and is never served.
+
+Cached answers (misses in particular) are only trusted when the cache is
+shared by all processes (LIKED_SET_CACHE_SHARED, on unless the default cache
+is process-local); otherwise every lookup is answered from the database.
+"""
+import hashlib
+import math
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.core.outbox import PROCESS_LOCAL_CACHES
+from .models import Like
+
+MAX_IDS = getattr(settings, "LIKED_SET_MAX_IDS", 5000)
+FALSE_POSITIVE_RATE = getattr(settings, "LIKED_SET_FALSE_POSITIVE_RATE", 0.01)
+CACHE_TIMEOUT = getattr(settings, "LIKED_SET_CACHE_TIMEOUT", 6 * 3600)
+# how long one process may hold a user's entry for an in-place update
+LOCK_TIMEOUT = 5
+SHARED = getattr(
+    settings,
+    "LIKED_SET_CACHE_SHARED",
+    settings.CACHES.get("default", {}).get("BACKEND", "") not in PROCESS_LOCAL_CACHES,
+)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over integer ids (double hashing of one
+    blake2b digest). Sized for `capacity` items at `error_rate`.
+    """
+
+    def __init__(self, capacity, error_rate=FALSE_POSITIVE_RATE):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(str(value).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+def _key(user_id):
+    return f"likes:liked_set:{user_id}"
+
+
+def _version_key(user_id):
+    return f"likes:liked_set_version:{user_id}"
+
+
+def _lock_key(user_id):
+    return f"likes:liked_set_lock:{user_id}"
+
+
+def _build(user_id):
+    ids = list(Like.objects.filter(user_id=user_id).values_list("post_id", flat=True))
+    if len(ids) <= MAX_IDS:
+        return set(ids)
+    bloom = BloomFilter(capacity=len(ids))
+    for post_id in ids:
+        bloom.add(post_id)
+    return bloom
+
+
+def liked_set(user_id):
+    """
+    The user's liked set: a `set` of post ids or a BloomFilter. Built from
+    the database, without caching, when the cache isn't shared.
+    """
+    if not SHARED:
+        return _build(user_id)
+    key, version_key = _key(user_id), _version_key(user_id)
+    found = cache.get_many([key, version_key])
+    version = found.get(version_key)
+    if version is None:
+        cache.add(version_key, uuid.uuid4().hex, CACHE_TIMEOUT)
+        version = cache.get(version_key)
+    cached = found.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    entry = _build(user_id)
+    if cached is None:
+        cache.add(key, (version, entry), CACHE_TIMEOUT)
+    else:
+        cache.delete(key)  # left behind by a build that raced an invalidation
+    return entry
+
+
+def split(entry, post_ids):
+    """(ids certainly liked, ids that need an exact check) for a cached entry."""
+    if isinstance(entry, BloomFilter):
+        return set(), {pk for pk in post_ids if pk in entry}
+    return {pk for pk in post_ids if pk in entry}, set()
+
+
+def forget(user_id):
+    """Retire the user's cached entry, including one being built right now."""
+    cache.set(_version_key(user_id), uuid.uuid4().hex, CACHE_TIMEOUT)
+    cache.delete(_key(user_id))
+
+
+def _update(user_id, post_id, liked):
+    """Add or discard `post_id` in the user's cached exact set, or forget it."""
+    if not SHARED:
+        return
+    lock_key = _lock_key(user_id)
+    if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        forget(user_id)  # another update is in flight
+        return
+    try:
+        key, version_key = _key(user_id), _version_key(user_id)
+        found = cache.get_many([key, version_key])
+        cached = found.get(key)
+        if cached is None or cached[0] != found.get(version_key) or isinstance(cached[1], BloomFilter):
+            forget(user_id)
+            return
+        entry = set(cached[1])
+        if liked:
+            entry.add(post_id)
+        else:
+            entry.discard(post_id)
+        if len(entry) > MAX_IDS:
+            forget(user_id)
+            return
+        cache.set(key, (cached[0], entry), CACHE_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+
+
+def record_like(user_id, post_id):
+    transaction.on_commit(lambda: _update(user_id, post_id, liked=True))
+
+
+def record_unlike(user_id, post_id):
+    transaction.on_commit(lambda: _update(user_id, post_id, liked=False))
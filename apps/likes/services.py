@@ -0,0 +1,24 @@
+from . import cache as liked_cache
+from .models import Like
+
+
+def liked_post_ids(user, post_ids):
+    """
+    The subset of `post_ids` the user has liked, as a set (empty for
+    anonymous users). Answered from the cached liked set; the database is
+    only asked about Bloom filter hits of heavy likers, or about all of
+    `post_ids` when the cache isn't shared.
+    """
+    post_ids = {pk for pk in post_ids if pk is not None}
+    if not post_ids or not getattr(user, "is_authenticated", False):
+        return set()
+    if not liked_cache.SHARED:
+        return set(Like.objects.filter(user=user, post_id__in=post_ids).values_list("post_id", flat=True))
+    liked, maybe = liked_cache.split(liked_cache.liked_set(user.pk), post_ids)
+    if maybe:
+        liked |= set(Like.objects.filter(user=user, post_id__in=maybe).values_list("post_id", flat=True))
+    return liked
+
+
+def has_liked(user, post_id):
+    return post_id in liked_post_ids(user, [post_id])
@@ -1,26 +1,21 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.db.models import F
+from . import cache as liked_cache
 from .models import Like
 from apps.posts.models import Post
 
 
 @receiver(post_save, sender=Like)
 def inc_post_likes_count(sender, instance, created, **kwargs):
-    if created:
-        Post.objects.filter(pk=instance.post_id).update(likes_count=F("likes_count") + 1)
+    if not created:
+        return
+    Post.objects.filter(pk=instance.post_id).update(likes_count=F("likes_count") + 1)
+    liked_cache.record_like(instance.user_id, instance.post_id)
 
     try:
-        from apps.notifications.services import create_notification
-        post = Post.objects.filter(pk=instance.post_id).select_related('user').first()
-        if post and post.user_id != instance.user_id:
-            create_notification(
-                recipient=post.user,
-                actor=instance.user,
-                verb="liked your post",
-                target=post,
-                data={"post_id": post.pk, "post_title": post.title}
-            )
+        from apps.notifications.services import enqueue_post_liked
+        enqueue_post_liked(instance)
     except Exception:
         pass
 
@@ -28,3 +23,4 @@ def inc_post_likes_count(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=Like)
 def dec_post_likes_count(sender, instance, **kwargs):
     Post.objects.filter(pk=instance.post_id).update(likes_count=F("likes_count") - 1)
+    liked_cache.record_unlike(instance.user_id, instance.post_id)
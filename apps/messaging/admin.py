@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Conversation, Participant, Message
+from .models import Conversation, Participant, Message, ArchivedMessage
 
 @admin.register(Conversation)
 class ConversationAdmin(admin.ModelAdmin):
@@ -15,3 +15,9 @@ class MessageAdmin(admin.ModelAdmin):
     list_display = ("id", "conversation", "sender", "created_at", "is_deleted")
     list_filter = ("is_deleted",)
     search_fields = ("content", "sender__email", "sender__username")
+
+
+@admin.register(ArchivedMessage)
+class ArchivedMessageAdmin(admin.ModelAdmin):
+    list_display = ("id", "conversation", "sender", "created_at", "archived_at", "is_deleted")
+    list_filter = ("is_deleted",)
@@ -0,0 +1,45 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from apps.messaging.models import ArchivedMessage, Conversation, Message
+
+
+class Command(BaseCommand):
+    help = (
+        "Move messages older than the archive horizon from the hot table into ArchivedMessage. "
+        "A conversation's current last message stays hot (the inbox points at it); archived "
+        "messages leave message search, which only covers the hot table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=getattr(settings, "MESSAGE_ARCHIVE_AFTER_DAYS", 365))
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--sleep", type=float, default=0.0, help="Seconds to pause between batches.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        batch_size = options["batch_size"]
+        moved = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    Message.objects.filter(created_at__lt=cutoff)
+                    .exclude(Exists(Conversation.objects.filter(last_message_id=OuterRef("pk"))))
+                    .order_by("pk")[:batch_size]
+                )
+                if not batch:
+                    break
+                ArchivedMessage.objects.bulk_create(
+                    [ArchivedMessage.from_message(m) for m in batch], ignore_conflicts=True
+                )
+                Message.objects.filter(pk__in=[m.pk for m in batch]).delete()
+            moved += len(batch)
+            self.stdout.write(f"Archived {moved} message(s)...")
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+        self.stdout.write(f"Done. Archived {moved} message(s) older than {cutoff:%Y-%m-%d}.")
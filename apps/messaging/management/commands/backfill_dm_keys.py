@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from apps.messaging.models import Conversation, Participant
+
+
+class Command(BaseCommand):
+    help = "Set Conversation.dm_key for existing untitled two-participant conversations."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        candidates = (
+            Conversation.objects.filter(dm_key__isnull=True, title="")
+            .annotate(num_participants=Count("participants"))
+            .filter(num_participants=2)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        taken = set(Conversation.objects.filter(dm_key__isnull=False).values_list("dm_key", flat=True))
+        updated = skipped = 0
+        last_pk = 0
+        while True:
+            ids = list(candidates.filter(pk__gt=last_pk)[:batch_size])
+            if not ids:
+                break
+            last_pk = ids[-1]
+            users = {}
+            for conv_id, user_id in Participant.objects.filter(conversation_id__in=ids).values_list("conversation_id", "user_id"):
+                users.setdefault(conv_id, []).append(user_id)
+            to_update = []
+            for conv_id in ids:
+                key = Conversation.make_dm_key(*users[conv_id])
+                if key in taken:
+                    # an older conversation already owns this pair; leave the duplicate untouched
+                    skipped += 1
+                    self.stdout.write(f"Conversation {conv_id}: duplicate DM for {key}, skipped")
+                    continue
+                taken.add(key)
+                to_update.append(Conversation(pk=conv_id, dm_key=key))
+            Conversation.objects.bulk_update(to_update, ["dm_key"])
+            updated += len(to_update)
+        self.stdout.write(f"Set dm_key on {updated} conversation(s), skipped {skipped} duplicate(s).")
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from apps.messaging.receipts import flush
+
+
+class Command(BaseCommand):
+    help = "Write buffered read receipts (Participant.last_read) to the database."
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Flushed {flush()} read receipt(s).")
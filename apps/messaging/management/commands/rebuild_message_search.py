@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from apps.messaging.models import Message
+from apps.messaging.search import message_index
+
+
+class Command(BaseCommand):
+    help = "Create (if needed) and re-populate the message full-text index."
+
+    def handle(self, *args, **options):
+        count = message_index.rebuild(Message.objects.filter(is_deleted=False))
+        self.stdout.write(f"Indexed {count} message(s).")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from apps.messaging.models import Participant
+from apps.messaging.receipts import flush
+
+
+class Command(BaseCommand):
+    help = "Recount Participant.unread_count based on Message rows and last_read."
+
+    def handle(self, *args, **options):
+        flush()
+        fixed = 0
+        for p in Participant.objects.only("pk", "conversation_id", "user_id", "last_read", "unread_count").iterator():
+            cnt = p.count_unread()
+            if cnt != p.unread_count:
+                Participant.objects.filter(pk=p.pk).update(unread_count=cnt)
+                fixed += 1
+                self.stdout.write(f"Participant {p.pk}: {p.unread_count} -> {cnt}")
+        self.stdout.write(f"Fixed {fixed} participant(s).")
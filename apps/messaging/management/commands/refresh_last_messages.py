@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from apps.messaging.models import Conversation
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Conversation.last_message* and Participant.last_message_at from Message rows "
+        "(conversations without messages fall back to created_at)."
+    )
+
+    def handle(self, *args, **options):
+        count = 0
+        for conv in Conversation.objects.only("pk").iterator():
+            conv.refresh_last_message()
+            count += 1
+        self.stdout.write(f"Refreshed {count} conversation(s).")
@@ -1,16 +1,29 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.utils import timezone
 
 User = settings.AUTH_USER_MODEL
 
+PREVIEW_LENGTH = 140
+
 class Conversation(models.Model):
     """
     Simple conversation container. Can be used for 1:1 DM or group chats.
-    For a 1:1 chat we create exactly one Conversation with two Participants.
+    For a 1:1 chat we create exactly one Conversation with two Participants;
+    dm_key ("<lower user id>:<higher user id>") is set for DMs only and its
+    unique index makes the lookup a single indexed read and creation race-free.
+    last_message/last_message_at/last_message_preview are denormalized and
+    maintained by the messaging signals and Message.mark_deleted().
     """
     title = models.CharField(max_length=200, blank=True)
+    dm_key = models.CharField(max_length=64, null=True, blank=True, unique=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    last_message = models.ForeignKey(
+        "Message", null=True, blank=True, on_delete=models.SET_NULL, related_name="+", editable=False
+    )
+    # created_at until the first message, so inbox ordering never meets NULLs
+    last_message_at = models.DateTimeField(default=timezone.now, editable=False)
+    last_message_preview = models.CharField(max_length=PREVIEW_LENGTH, blank=True, editable=False)
 
     class Meta:
         ordering = ("-created_at",)
@@ -21,31 +34,67 @@ class Conversation(models.Model):
     def __str__(self):
         return f"Conversation {self.pk} ({self.title or 'dm'})"
 
-    def last_message(self):
-        return self.messages.order_by("-created_at").first()
+    @staticmethod
+    def make_dm_key(user_id, other_id):
+        low, high = sorted((int(user_id), int(other_id)))
+        return f"{low}:{high}"
+
+    @classmethod
+    def get_or_create_dm(cls, user, other):
+        """
+        Return (conversation, created) for the DM between `user` and `other`.
+        Concurrent callers racing on the insert fall back to the winner's row.
+        """
+        key = cls.make_dm_key(user.pk, other.pk)
+        conv = cls.objects.filter(dm_key=key).first()
+        if conv is not None:
+            return conv, False
+        try:
+            with transaction.atomic():
+                conv = cls.objects.create(dm_key=key)
+                Participant.objects.create(conversation=conv, user=user)
+                Participant.objects.create(conversation=conv, user=other)
+        except IntegrityError:
+            return cls.objects.get(dm_key=key), False
+        return conv, True
+
+    def refresh_last_message(self):
+        """
+        Recompute the denormalized last-message fields from Message rows,
+        falling back to ArchivedMessage when the hot table has none left
+        (and copy last_message_at to the participants).
+        """
+        last = self.messages.order_by("-created_at", "-id").first()
+        if last is None:
+            last = self.archived_messages.order_by("-created_at", "-id").first()
+        self.last_message = last if isinstance(last, Message) else None
+        self.last_message_at = last.created_at if last else self.created_at
+        self.last_message_preview = last.preview() if last else ""
+        self.save(update_fields=["last_message", "last_message_at", "last_message_preview"])
+        self.participants.update(last_message_at=self.last_message_at)
 
     def unread_count_for(self, user):
         """
-        Count messages with created_at > participant.last_read for given user.
+        Return the maintained unread counter of the given user's participant row.
         If no participant found - return 0.
         """
-        try:
-            p = self.participants.get(user=user)
-        except Participant.DoesNotExist:
-            return 0
-        if p.last_read:
-            return self.messages.filter(created_at__gt=p.last_read).exclude(sender=p.user).count()
-        return self.messages.exclude(sender=p.user).count()
+        count = self.participants.filter(user=user).values_list("unread_count", flat=True).first()
+        return count or 0
 
 
 class Participant(models.Model):
     """
     Through model connecting users to a Conversation.
-    last_read used to compute unread counts efficiently.
+    unread_count is denormalized: incremented for the other participants when
+    a message is sent (see signals) and reset by mark_read().
+    Run `manage.py recount_unread` to repair drift against last_read.
     """
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name="participants")
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="conversations")
     last_read = models.DateTimeField(null=True, blank=True)
+    unread_count = models.PositiveIntegerField(default=0)
+    # copy of conversation.last_message_at so the inbox is a single index range scan
+    last_message_at = models.DateTimeField(default=timezone.now, editable=False)
     is_active = models.BooleanField(default=True)  # soft leave
     joined_at = models.DateTimeField(auto_now_add=True)
 
@@ -54,11 +103,39 @@ class Participant(models.Model):
         indexes = [
             models.Index(fields=["user"]),
             models.Index(fields=["conversation", "user"]),
+            models.Index(fields=["user", "is_active", "-last_message_at", "-id"], name="participant_inbox_idx"),
         ]
 
     def __str__(self):
         return f"{self.user} in {self.conversation.pk}"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.conversation_id:
+            # joining an existing conversation sorts it by its own activity
+            self.last_message_at = self.conversation.last_message_at
+        super().save(*args, **kwargs)
+
+    def mark_read(self, when=None):
+        from .receipts import discard_buffered
+
+        self.last_read = when or timezone.now()
+        self.unread_count = 0
+        self.save(update_fields=["last_read", "unread_count"])
+        discard_buffered(self.pk, self.last_read)
+
+    def count_unread(self):
+        """
+        Count unread messages from scratch (used to reconcile unread_count),
+        against last_read including a buffered, not yet flushed receipt.
+        """
+        from .receipts import last_read_for
+
+        last_read = last_read_for(self)
+        qs = Message.objects.filter(conversation_id=self.conversation_id).exclude(sender_id=self.user_id)
+        if last_read:
+            qs = qs.filter(created_at__gt=last_read)
+        return qs.count()
+
 
 class Message(models.Model):
     """
@@ -90,6 +167,51 @@ class Message(models.Model):
     def __str__(self):
         return f"Message {self.pk} by {self.sender}"
 
+    def preview(self):
+        return "" if self.is_deleted else self.content[:PREVIEW_LENGTH]
+
     def mark_deleted(self):
         self.is_deleted = True
         self.save(update_fields=["is_deleted"])
+        Conversation.objects.filter(pk=self.conversation_id, last_message_id=self.pk).update(last_message_preview="")
+
+
+
+class ArchivedMessage(models.Model):
+    """
+    Cold copy of a Message moved out of the hot table by `manage.py archive_messages`.
+    Keeps the original id so history cursors stay valid; read through by
+    apps.messaging.pagination.message_page().
+    """
+    id = models.BigIntegerField(primary_key=True)
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name="archived_messages")
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    content = models.TextField(max_length=4000)
+    created_at = models.DateTimeField()
+    edited_at = models.DateTimeField(null=True, blank=True)
+    is_deleted = models.BooleanField(default=False)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("created_at",)
+        indexes = [
+            models.Index(fields=["conversation", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"Archived message {self.pk} by {self.sender}"
+
+    def preview(self):
+        return "" if self.is_deleted else self.content[:PREVIEW_LENGTH]
+
+    @classmethod
+    def from_message(cls, msg):
+        return cls(
+            id=msg.pk,
+            conversation_id=msg.conversation_id,
+            sender_id=msg.sender_id,
+            content=msg.content,
+            created_at=msg.created_at,
+            edited_at=msg.edited_at,
+            is_deleted=msg.is_deleted,
+        )
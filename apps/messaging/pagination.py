@@ -0,0 +1,37 @@
+"""
+Keyset (cursor) pagination for conversation history.
+
+Pages are ordered by (created_at, id) and served from the
+Message(conversation, created_at) index, so the cost of a page does not
+depend on how long the conversation is. Once the hot table is exhausted,
+paging continues transparently into ArchivedMessage.
+"""
+from utils.pagination import decode_cursor, encode_cursor, older_than
+
+from .models import ArchivedMessage
+
+MESSAGES_PAGE_SIZE = 50
+
+
+def _older_than(qs, position):
+    return older_than(qs.select_related("sender"), position)
+
+
+def message_page(conversation, before=None, limit=None):
+    """
+    Return (messages, older_cursor) for the `limit` newest messages older than
+    the `before` cursor. Messages come back in chronological order;
+    older_cursor is None when there is nothing older.
+    """
+    limit = limit or MESSAGES_PAGE_SIZE
+    position = decode_cursor(before)
+    rows = list(_older_than(conversation.messages.all(), position)[:limit + 1])
+    if len(rows) <= limit:
+        # hot history exhausted: read through into the archive
+        archived = ArchivedMessage.objects.filter(conversation=conversation)
+        rows += list(_older_than(archived, position)[:limit + 1 - len(rows)])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    rows.reverse()
+    older_cursor = encode_cursor(rows[0].created_at, rows[0].pk) if has_more and rows else None
+    return rows, older_cursor
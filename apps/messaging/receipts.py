@@ -0,0 +1,135 @@
+"""
+Coalesced read receipts.
+
+Opening a conversation or sending a message used to UPDATE
+Participant.last_read every time. record_read() instead keeps the latest
+timestamp per participant in the shared cache and flush() writes the
+pending ones in one bulk UPDATE, either when READ_RECEIPT_FLUSH_THRESHOLD
+participants are pending or READ_RECEIPT_FLUSH_INTERVAL seconds have passed
+(checked on each record), on every OUTBOX_PERIODIC_TASKS tick of
+run_outbox_worker (so quiet conversations are flushed too), or from
+`manage.py flush_read_receipts`.
+
+The unread counter is still reset immediately, but only when it is non-zero,
+so repeated views of an already-read conversation do not write at all.
+Participant.count_unread() reads last_read through last_read_for(), which
+includes the buffered value.
+
+Pending participants are appended to a log of numbered cache keys (slot
+numbers come from an atomic cache.incr), so concurrent record_read() calls
+never overwrite each other. flush() only ever moves last_read forward, and
+mark_read() drops a buffered value it supersedes.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Participant
+
+FLUSH_INTERVAL = getattr(settings, "READ_RECEIPT_FLUSH_INTERVAL", 30)
+FLUSH_THRESHOLD = getattr(settings, "READ_RECEIPT_FLUSH_THRESHOLD", 200)
+# buffered values outlive several flush intervals so readers never see them vanish early
+VALUE_TIMEOUT = max(FLUSH_INTERVAL * 20, 600)
+
+PENDING_SEQ_KEY = "read_receipts:pending_seq"
+FLUSHED_SEQ_KEY = "read_receipts:flushed_seq"
+LAST_FLUSH_KEY = "read_receipts:last_flush"
+FLUSH_LOCK_KEY = "read_receipts:flush_lock"
+
+
+def _key(participant_id):
+    return f"read_receipt:{participant_id}"
+
+
+def _slot_key(seq):
+    return f"read_receipts:pending:{seq}"
+
+
+def _next_seq():
+    cache.add(PENDING_SEQ_KEY, 0, None)
+    try:
+        return cache.incr(PENDING_SEQ_KEY)
+    except ValueError:  # evicted between add() and incr()
+        cache.add(PENDING_SEQ_KEY, 0, None)
+        return cache.incr(PENDING_SEQ_KEY)
+
+
+def discard_buffered(participant_id, upto):
+    """
+    Forget a buffered value that a direct write of `upto` supersedes.
+    """
+    buffered = cache.get(_key(participant_id))
+    if buffered is not None and buffered <= upto:
+        cache.delete(_key(participant_id))
+
+
+def record_read(participant, when=None):
+    """
+    Mark `participant` as having read the conversation up to `when` (default now).
+    """
+    when = when or timezone.now()
+    if participant.unread_count:
+        # state change: reset the counter right away (also stores last_read)
+        participant.mark_read(when)
+        return
+
+    cache.set(_key(participant.pk), when, VALUE_TIMEOUT)
+    seq = _next_seq()
+    cache.set(_slot_key(seq), participant.pk, VALUE_TIMEOUT)
+    maybe_flush(seq - (cache.get(FLUSHED_SEQ_KEY) or 0))
+
+
+def last_read_for(participant):
+    """
+    Effective last_read: the newer of the stored and the buffered value.
+    """
+    buffered = cache.get(_key(participant.pk))
+    if buffered and (participant.last_read is None or buffered > participant.last_read):
+        return buffered
+    return participant.last_read
+
+
+def maybe_flush(pending_count):
+    last_flush = cache.get(LAST_FLUSH_KEY)
+    if last_flush is None:
+        cache.add(LAST_FLUSH_KEY, time.time(), None)
+        last_flush = cache.get(LAST_FLUSH_KEY) or time.time()
+    if pending_count >= FLUSH_THRESHOLD or time.time() - last_flush >= FLUSH_INTERVAL:
+        flush()
+
+
+def flush():
+    """
+    Write all pending buffered last_read values to the database, never
+    moving a stored last_read backwards. Returns the number of participants
+    updated.
+    """
+    if not cache.add(FLUSH_LOCK_KEY, 1, 60):
+        return 0
+    try:
+        upto = cache.get(PENDING_SEQ_KEY) or 0
+        start = cache.get(FLUSHED_SEQ_KEY) or 0
+        cache.set(LAST_FLUSH_KEY, time.time(), None)
+        if upto <= start:
+            return 0
+        slot_keys = [_slot_key(seq) for seq in range(start + 1, upto + 1)]
+        pending = set(cache.get_many(slot_keys).values())
+        cache.set(FLUSHED_SEQ_KEY, upto, None)
+        cache.delete_many(slot_keys)
+        if not pending:
+            return 0
+        values = cache.get_many([_key(pid) for pid in pending])
+        rows = []
+        for pid in pending:
+            if _key(pid) not in values:
+                continue
+            when = Value(values[_key(pid)])
+            rows.append(Participant(pk=pid, last_read=Greatest(Coalesce(F("last_read"), when), when)))
+        Participant.objects.bulk_update(rows, ["last_read"], batch_size=500)
+        return len(rows)
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
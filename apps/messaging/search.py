@@ -0,0 +1,27 @@
+"""
+Full-text search over the current user's conversations.
+
+Only the hot Message table is indexed: messages moved to ArchivedMessage by
+`manage.py archive_messages` (older than MESSAGE_ARCHIVE_AFTER_DAYS) drop
+out of search by design, while history pages still read them through.
+"""
+from utils.search import FullTextIndex
+from .models import Message
+
+message_index = FullTextIndex("messaging_message_fts", Message, ["content"])
+
+
+def search_messages(user, query):
+    """
+    Ranked, non-deleted messages matching `query` in conversations where
+    `user` is an active participant.
+    """
+    qs = (
+        Message.objects.filter(
+            is_deleted=False,
+            conversation__participants__user=user,
+            conversation__participants__is_active=True,
+        )
+        .select_related("sender", "conversation")
+    )
+    return message_index.search(qs, query, highlight="content")
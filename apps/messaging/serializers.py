@@ -11,3 +11,22 @@ class MessageSerializer(serializers.ModelSerializer):
         model = Message
         fields = ("id","conversation","sender","content","created_at","is_deleted")
         read_only_fields = ("id","sender","created_at","is_deleted")
+
+
+def message_payload(msg, viewer_id=None):
+    """
+    Plain-dict representation of a message as rendered by static/js/messaging.js
+    (JSON responses and realtime events).
+    """
+    sender = msg.sender
+    return {
+        "id": msg.pk,
+        "conversation_id": msg.conversation_id,
+        "sender_id": msg.sender_id,
+        "sender_name": sender.get_full_name() or sender.username,
+        "sender_avatar": sender.avatar.url if sender.avatar else None,
+        "is_mine": msg.sender_id == viewer_id,
+        "content": "" if msg.is_deleted else msg.content,
+        "is_deleted": msg.is_deleted,
+        "created_at": msg.created_at.isoformat(),
+    }
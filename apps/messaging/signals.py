@@ -0,0 +1,54 @@
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.db.models import Case, F, Q, When
+from apps.core.nav import invalidate_nav_state
+from apps.realtime.brokers import publish_to_users
+from .models import Conversation, Message, Participant
+from .search import message_index
+from .serializers import message_payload
+
+
+@receiver(post_save, sender=Message)
+def message_saved(sender, instance, created, **kwargs):
+    message_index.update(instance, searchable=not instance.is_deleted)
+    user_ids = list(Participant.objects.filter(conversation_id=instance.conversation_id).values_list("user_id", flat=True))
+    if not created:
+        # edits / soft deletes change what the nav dropdown shows
+        invalidate_nav_state(*user_ids)
+        return
+
+    Conversation.objects.filter(pk=instance.conversation_id).update(
+        last_message=instance,
+        last_message_at=instance.created_at,
+        last_message_preview=instance.preview(),
+    )
+    Participant.objects.filter(conversation_id=instance.conversation_id).update(
+        last_message_at=instance.created_at,
+        unread_count=Case(
+            When(Q(is_active=True) & ~Q(user_id=instance.sender_id), then=F("unread_count") + 1),
+            default=F("unread_count"),
+            output_field=models.PositiveIntegerField(),
+        ),
+    )
+    invalidate_nav_state(*user_ids)
+
+    recipients = [uid for uid in user_ids if uid != instance.sender_id]
+    if recipients:
+        payload = message_payload(instance)
+        transaction.on_commit(lambda: publish_to_users(recipients, "message", payload))
+
+
+@receiver(post_delete, sender=Message)
+def message_deleted(sender, instance, **kwargs):
+    message_index.remove(instance.pk)
+
+
+def ensure_search_index(sender, **kwargs):
+    message_index.ensure()
+
+
+@receiver(post_save, sender=Participant)
+@receiver(post_delete, sender=Participant)
+def participant_changed(sender, instance, **kwargs):
+    invalidate_nav_state(instance.user_id)
@@ -1,10 +1,13 @@
 from django.db import transaction
-from django.db.models import OuterRef, Subquery, Count
-from django.utils import timezone
 from django.views.generic import ListView, DetailView, FormView
 from django.views.generic.edit import FormMixin
 from .models import Participant, Message
 from .forms import MessageForm
+from .pagination import message_page
+from .receipts import record_read
+from .search import search_messages
+from utils.search import render_snippet
+from .serializers import message_payload
 from django.http import JsonResponse, HttpResponseForbidden, HttpResponseBadRequest, HttpResponseServerError
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -46,39 +49,57 @@ class ParticipantRequiredMixin:
 
 class InboxView(LoginRequiredMixin, ListView):
     """
-    List of conversations for the current user.
-    We list Conversation objects where user is a Participant.
+    List of conversations for the current user, newest activity first.
+    We list the user's Participant rows and expose their conversations.
     """
-    model = Conversation
+    model = Participant
     template_name = "apps/messaging/inbox.html"
     context_object_name = "conversations"
     paginate_by = 30
 
     def get_queryset(self):
-
-        last_msg_qs = Message.objects.filter(conversation=OuterRef("pk")).order_by("-created_at")
-        qs = (
-            Conversation.objects.filter(participants__user=self.request.user, participants__is_active=True)
-            .distinct()
-            .annotate(last_message_id=Subquery(last_msg_qs.values("id")[:1]),
-                      last_message_at=Subquery(last_msg_qs.values("created_at")[:1]))
-            .order_by("-last_message_at", "-created_at")
+        """
+        One range read over Participant(user, is_active, -last_message_at, -id);
+        conversation and last message come in via joins.
+        """
+        return (
+            Participant.objects.filter(user=self.request.user, is_active=True)
+            .select_related("conversation", "conversation__last_message__sender")
+            .order_by("-last_message_at", "-id")
         )
-        return qs
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        conversations = []
-        for conv in ctx["conversations"]:
-            last = None
-            if getattr(conv, "last_message_id", None):
-                last = Message.objects.filter(pk=conv.last_message_id).select_related("sender").first()
-            conversations.append({
-                "conversation": conv,
-                "last_message": last,
-                "unread": conv.unread_count_for(self.request.user),
-            })
-        ctx["conversations"] = conversations
+        ctx["conversations"] = [
+            {
+                "conversation": p.conversation,
+                "last_message": p.conversation.last_message,
+                "unread": p.unread_count,
+            }
+            for p in ctx["conversations"]
+        ]
+        return ctx
+
+
+class MessageSearchView(LoginRequiredMixin, ListView):
+    """
+    Ranked full-text search over messages in the user's conversations.
+    """
+    template_name = "apps/messaging/search.html"
+    context_object_name = "results"
+    paginate_by = 20
+
+    def get_queryset(self):
+        self.query = (self.request.GET.get("q") or "").strip()
+        if not self.query:
+            return Message.objects.none()
+        return search_messages(self.request.user, self.query)
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        for msg in ctx["results"]:
+            msg.snippet_html = render_snippet(getattr(msg, "search_snippet", None) or msg.content[:200])
+        ctx["q"] = self.query
         return ctx
 
 
@@ -101,37 +122,26 @@ class ConversationDetailView(LoginRequiredMixin, ParticipantRequiredMixin, FormM
 
     def get(self, request, *args, **kwargs):
         response = super().get(request, *args, **kwargs)
-        self.participant.last_read = timezone.now()
-        self.participant.save(update_fields=["last_read"])
+        record_read(self.participant)
         return response
 
     def get_context_data(self, **kwargs):
         """
-        Prepare messages with a unified text attribute and detect the other participant.
+        Prepare the newest page of messages and detect the other participant.
+        Older history is fetched page by page from ConversationHistoryView.
         """
         ctx = super().get_context_data(**kwargs)
-        messages_qs = self.conversation.messages.select_related("sender").order_by("created_at")
-        messages = list(messages_qs)
-
-        possible_text_fields = ("content", "body", "text", "message", "message_text", "body_text")
-        for m in messages:
-            txt = ""
-            for fname in possible_text_fields:
-                val = getattr(m, fname, None)
-                if val:
-                    txt = val
-                    break
-            m.display_text = txt or ""
+        messages, older_cursor = message_page(self.conversation)
 
         other_part = self.conversation.participants.exclude(user=self.request.user).select_related("user").first()
         other_user = getattr(other_part, "user", None)
 
         ctx["messages"] = messages
+        ctx["older_cursor"] = older_cursor
         ctx["form"] = ctx.get("form") or self.get_form()
         ctx["other_user"] = other_user
         return ctx
 
-
     def post(self, request, *args, **kwargs):
         """
         Support posting message to same URL. If you prefer separate send endpoint,
@@ -151,19 +161,25 @@ class ConversationDetailView(LoginRequiredMixin, ParticipantRequiredMixin, FormM
         msg.conversation = self.conversation
         msg.sender = self.request.user
         msg.save()
-        Participant.objects.filter(conversation=self.conversation, user=self.request.user).update(last_read=timezone.now())
+        record_read(self.participant)
 
         if self.request.headers.get("x-requested-with") == "XMLHttpRequest":
-            return JsonResponse({
-                "status": "ok",
-                "message": {
-                    "id": msg.pk,
-                    "sender_id": msg.sender_id,
-                    "content": msg.content,
-                    "created_at": msg.created_at.isoformat(),
-                }
-            })
-        return redirect(reverse("messaging:conversation_detail", args=[self.conversation.pk]))
+            return JsonResponse({"status": "ok", "message": message_payload(msg, self.request.user.pk)})
+        return redirect(reverse("messages:conversation_detail", args=[self.conversation.pk]))
+
+
+class ConversationHistoryView(LoginRequiredMixin, ParticipantRequiredMixin, View):
+    """
+    JSON page of older messages: GET ?before=<cursor>.
+    Returns messages in chronological order plus the cursor for the next older page.
+    """
+    def get(self, request, *args, **kwargs):
+        messages, older_cursor = message_page(self.conversation, before=request.GET.get("before"))
+        return JsonResponse({
+            "status": "ok",
+            "messages": [message_payload(m, request.user.pk) for m in messages],
+            "older_cursor": older_cursor,
+        })
 
 
 class ConversationSendMessageView(LoginRequiredMixin, ParticipantRequiredMixin, FormView):
@@ -185,34 +201,27 @@ class ConversationSendMessageView(LoginRequiredMixin, ParticipantRequiredMixin,
         msg.sender = self.request.user
         msg.save()
 
-        Participant.objects.filter(conversation=self.conversation, user=self.request.user).update(last_read=timezone.now())
+        record_read(self.participant)
 
-        try:
-            from apps.notifications.services import create_notification
-            others = msg.conversation.participants.exclude(user=msg.sender, is_active=False).select_related('user')
-            for p in others:
-                if getattr(p, 'user', None) and p.user_id != msg.sender_id:
-                    create_notification(
-                        recipient=p.user,
-                        actor=msg.sender,
-                        verb="sent you a message",
-                        target=msg.conversation,
-                        data={"conversation_id": msg.conversation.pk, "message_id": msg.pk}
-                    )
-        except Exception:
-            pass
+        # a failed enqueue rolls the message back with it instead of leaving a
+        # broken transaction behind
+        from apps.notifications.services import enqueue_notification
+        recipient_ids = (
+            msg.conversation.participants.filter(is_active=True)
+            .exclude(user_id=msg.sender_id)
+            .values_list("user_id", flat=True)
+        )
+        enqueue_notification(
+            recipient_ids,
+            actor=msg.sender,
+            verb="sent you a message",
+            target=msg.conversation,
+            data={"conversation_id": msg.conversation.pk, "message_id": msg.pk},
+        )
 
         if self.request.headers.get("x-requested-with") == "XMLHttpRequest":
-            return JsonResponse({
-                "status": "ok",
-                "message": {
-                    "id": msg.pk,
-                    "sender_id": msg.sender_id,
-                    "content": msg.content,
-                    "created_at": msg.created_at.isoformat(),
-                }
-            })
-        return redirect(reverse("messaging:conversation_detail", args=[self.conversation.pk]))
+            return JsonResponse({"status": "ok", "message": message_payload(msg, self.request.user.pk)})
+        return redirect(reverse("messages:conversation_detail", args=[self.conversation.pk]))
 
 
 
@@ -225,20 +234,7 @@ class StartDMView(LoginRequiredMixin, View):
         if recipient == request.user:
             return HttpResponseBadRequest("Cannot start a conversation with yourself.")
 
-        conv_qs = (
-            Conversation.objects
-            .annotate(num_participants=Count("participants"))
-            .filter(num_participants=2)
-            .filter(participants__user=request.user)
-            .filter(participants__user=recipient)
-        )
-        conversation = conv_qs.first()
-
-        if conversation is None:
-            with transaction.atomic():
-                conversation = Conversation.objects.create()
-                Participant.objects.create(conversation=conversation, user=request.user)
-                Participant.objects.create(conversation=conversation, user=recipient)
+        conversation, _ = Conversation.get_or_create_dm(request.user, recipient)
 
         subject = (request.POST.get("subject") or "").strip()
         body = (request.POST.get("body") or "").strip()
@@ -302,8 +298,7 @@ class MarkReadView(LoginRequiredMixin, ParticipantRequiredMixin, View):
     Mark conversation as read for current user (POST).
     """
     def post(self, request, *args, **kwargs):
-        self.participant.last_read = timezone.now()
-        self.participant.save(update_fields=["last_read"])
+        record_read(self.participant)
         if request.headers.get("x-requested-with") == "XMLHttpRequest":
             return JsonResponse({"status": "ok"})
-        return redirect(reverse("messaging:conversation_detail", args=[self.conversation.pk]))
+        return redirect(reverse("messages:conversation_detail", args=[self.conversation.pk]))
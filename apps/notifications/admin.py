@@ -1,8 +1,15 @@
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, NotificationCounter
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ("id","recipient","actor","verb","unread","created_at")
     list_filter = ("unread","created_at")
     search_fields = ("recipient__email","actor__email","verb")
+
+
+@admin.register(NotificationCounter)
+class NotificationCounterAdmin(admin.ModelAdmin):
+    list_display = ("user","unread")
+    search_fields = ("user__email",)
+    raw_id_fields = ("user",)
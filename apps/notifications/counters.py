@@ -0,0 +1,122 @@
+"""
+Per-user unread notification counter.
+
+NotificationCounter.unread is kept in step with Notification.unread by the
+services (create), Notification.mark_read and MarkAllReadView, so the badge
+is a primary-key read instead of a COUNT(*). Rows are created on first use;
+`manage.py recount_notifications` rebuilds them from Notification rows.
+
+Each counter row also carries a `version` that touch() bumps whenever the
+user's notifications change; RecentNotificationsView uses it as ETag /
+"since" cursor. It lives in the database rather than the cache so a change
+made by the outbox worker is seen by every web process at once.
+"""
+from collections import Counter
+
+from django.db import connection
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import Notification, NotificationCounter
+
+
+def _upsert_sql():
+    table = connection.ops.quote_name(NotificationCounter._meta.db_table)
+    user_col = connection.ops.quote_name("user_id")
+    unread_col = connection.ops.quote_name("unread")
+    version_col = connection.ops.quote_name("version")
+    return (
+        f"INSERT INTO {table} ({user_col}, {unread_col}, {version_col}) VALUES {{values}} "
+        f"ON CONFLICT ({user_col}) DO UPDATE SET {unread_col} = {table}.{unread_col} + excluded.{unread_col}, "
+        f"{version_col} = {table}.{version_col} + 1"
+    )
+
+
+def increment(user_ids, by=1):
+    """
+    Add `by` to the counters of `user_ids` (repeats count repeatedly) in one
+    upsert statement.
+    """
+    deltas = Counter(uid for uid in user_ids if uid)
+    if not deltas or not by:
+        return
+    params = []
+    for uid, n in deltas.items():
+        params.extend([uid, n * by, 1])
+    sql = _upsert_sql().format(values=", ".join(["(%s, %s, %s)"] * len(deltas)))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def decrement(user_id, by=1):
+    if by:
+        NotificationCounter.objects.filter(user_id=user_id).update(unread=Greatest(F("unread") - by, 0))
+
+
+def unread_count(user):
+    """
+    O(1) unread badge value for `user` (0 if no counter row yet).
+    """
+    user_id = getattr(user, "pk", user)
+    value = NotificationCounter.objects.filter(user_id=user_id).values_list("unread", flat=True).first()
+    return value or 0
+
+
+def recount(user_ids=None):
+    """
+    Rebuild counters from Notification rows; returns {user_id: (old, new)}
+    for every counter that changed.
+    """
+    unread = Notification.objects.filter(unread=True)
+    counters = NotificationCounter.objects.all()
+    if user_ids is not None:
+        unread = unread.filter(recipient_id__in=user_ids)
+        counters = counters.filter(user_id__in=user_ids)
+
+    actual = dict(unread.values("recipient_id").annotate(n=Count("pk")).values_list("recipient_id", "n"))
+    stored = dict(counters.values_list("user_id", "unread"))
+
+    changed = {}
+    for uid in set(actual) | set(stored):
+        new, old = actual.get(uid, 0), stored.get(uid)
+        if old == new:
+            continue
+        changed[uid] = (old or 0, new)
+        NotificationCounter.objects.update_or_create(user_id=uid, defaults={"unread": new})
+    return changed
+
+
+def _touch_sql():
+    table = connection.ops.quote_name(NotificationCounter._meta.db_table)
+    user_col = connection.ops.quote_name("user_id")
+    unread_col = connection.ops.quote_name("unread")
+    version_col = connection.ops.quote_name("version")
+    return (
+        f"INSERT INTO {table} ({user_col}, {unread_col}, {version_col}) VALUES {{values}} "
+        f"ON CONFLICT ({user_col}) DO UPDATE SET {version_col} = {table}.{version_col} + 1"
+    )
+
+
+def state_version(user_id):
+    """
+    Opaque token for the current state of `user_id`'s notifications: the
+    counter row's version and unread count, read by primary key.
+    """
+    row = NotificationCounter.objects.filter(user_id=user_id).values_list("version", "unread").first()
+    version, unread = row or (0, 0)
+    return f"{version}-{unread}"
+
+
+def touch(*user_ids):
+    """
+    Mark the notifications of `user_ids` as changed (one upsert statement).
+    """
+    ids = sorted({uid for uid in user_ids if uid})
+    if not ids:
+        return
+    params = []
+    for uid in ids:
+        params.extend([uid, 0, 1])
+    sql = _touch_sql().format(values=", ".join(["(%s, %s, %s)"] * len(ids)))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from apps.notifications import retention
+
+
+class Command(BaseCommand):
+    help = "Delete read notifications past the retention horizon and cap notifications per recipient."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=retention.RETENTION_DAYS,
+                            help="Delete read notifications older than this many days (0 disables).")
+        parser.add_argument("--keep", type=int, default=retention.MAX_PER_USER,
+                            help="Keep at most this many notifications per recipient (0 disables).")
+        parser.add_argument("--batch-size", type=int, default=retention.BATCH_SIZE)
+        parser.add_argument("--sleep", type=float, default=0.1, help="Seconds to pause between batches.")
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted.")
+
+    def handle(self, *args, **options):
+        report = retention.prune(
+            days=options["days"],
+            keep=options["keep"],
+            batch_size=options["batch_size"],
+            sleep=options["sleep"],
+            dry_run=options["dry_run"],
+        )
+        prefix = "Would remove" if options["dry_run"] else "Removed"
+        self.stdout.write(
+            f"{prefix} {report['expired']} expired read notification(s) "
+            f"and {report['over_cap']} over the per-user cap."
+        )
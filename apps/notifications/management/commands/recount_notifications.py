@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from apps.notifications.counters import recount
+
+
+class Command(BaseCommand):
+    help = "Rebuild NotificationCounter.unread from Notification rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="users",
+                            help="Only recount this user id (repeatable).")
+
+    def handle(self, *args, **options):
+        changed = recount(options["users"])
+        for uid, (old, new) in sorted(changed.items()):
+            self.stdout.write(f"User {uid}: {old} -> {new}")
+        self.stdout.write(f"Fixed {len(changed)} counter(s).")
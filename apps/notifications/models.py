@@ -13,6 +13,7 @@ class Notification(models.Model):
     verb: short human-friendly action, e.g. "liked your post"
     unread: True by default
     optional generic target (post/comment/conversation/message) and extra JSON data
+    aggregated notifications keep `actor_count` and a sample of `actor_ids` in data
     """
     recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notifications")
     actor = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="actor_notifications")
@@ -30,10 +31,43 @@ class Notification(models.Model):
         ordering = ("-created_at",)
         indexes = [
             models.Index(fields=["recipient", "unread"]),
+            models.Index(fields=["recipient", "-created_at"]),
             models.Index(fields=["created_at"]),
         ]
 
+    @property
+    def actor_count(self):
+        return (self.data or {}).get("actor_count") or (1 if self.actor_id else 0)
+
+    @property
+    def others_count(self):
+        return max(self.actor_count - 1, 0)
+
     def mark_read(self):
-        if self.unread:
-            self.unread = False
-            self.save(update_fields=["unread"])
+        """
+        Mark as read; the conditional UPDATE makes sure the unread counter is
+        decremented once even if two requests race.
+        """
+        if not self.unread:
+            return
+        self.unread = False
+        if Notification.objects.filter(pk=self.pk, unread=True).update(unread=False):
+            from apps.core.nav import invalidate_nav_state
+            from .counters import decrement, touch
+
+            decrement(self.recipient_id)
+            invalidate_nav_state(self.recipient_id)
+            touch(self.recipient_id)
+
+
+class NotificationCounter(models.Model):
+    """
+    Maintained number of unread notifications per user (see counters.py).
+    """
+    user = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE, related_name="notification_counter")
+    unread = models.PositiveIntegerField(default=0)
+    # bumped on every change to the user's notifications (counters.touch)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread}"
@@ -0,0 +1,114 @@
+"""
+Notification retention.
+
+prune() deletes read notifications older than a horizon and trims every
+recipient to their newest `keep` rows. Deletes go out in bounded primary-key
+chunks with an optional pause in between, so a run on a busy database never
+holds long locks or produces one huge transaction. Run it from
+`manage.py prune_notifications` (cron) or any scheduler.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Count
+from django.utils import timezone
+
+from apps.core.nav import invalidate_nav_state
+from . import counters
+from .models import Notification
+
+logger = logging.getLogger(__name__)
+
+RETENTION_DAYS = getattr(settings, "NOTIFICATION_RETENTION_DAYS", 90)
+MAX_PER_USER = getattr(settings, "NOTIFICATION_MAX_PER_USER", 500)
+BATCH_SIZE = 1000
+
+
+def _delete_rows(rows):
+    """
+    Delete (pk, recipient_id, unread) rows in one DELETE statement and fix
+    the per-user state. The plain SQL delete skips the per-row post_delete
+    signal, whose bookkeeping is done here once per chunk instead.
+    """
+    pks = [pk for pk, _, _ in rows]
+    connection = connections[router.db_for_write(Notification)]
+    table = connection.ops.quote_name(Notification._meta.db_table)
+    pk_col = connection.ops.quote_name(Notification._meta.pk.column)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {pk_col} IN ({', '.join(['%s'] * len(pks))})", pks)
+        deleted = cursor.rowcount
+
+    unread = {}
+    for _, recipient_id, is_unread in rows:
+        if is_unread:
+            unread[recipient_id] = unread.get(recipient_id, 0) + 1
+    for recipient_id, n in unread.items():
+        counters.decrement(recipient_id, n)
+    recipients = {recipient_id for _, recipient_id, _ in rows}
+    invalidate_nav_state(*recipients)
+    counters.touch(*recipients)
+    return deleted
+
+
+def _prune_expired(cutoff, batch_size, sleep, dry_run):
+    qs = Notification.objects.filter(unread=False, created_at__lt=cutoff)
+    if dry_run:
+        return qs.count()
+    removed, last_pk = 0, 0
+    while True:
+        rows = list(
+            qs.filter(pk__gt=last_pk).order_by("pk").values_list("pk", "recipient_id", "unread")[:batch_size]
+        )
+        if not rows:
+            return removed
+        last_pk = rows[-1][0]
+        removed += _delete_rows(rows)
+        if sleep:
+            time.sleep(sleep)
+
+
+def _prune_over_cap(keep, batch_size, sleep, dry_run):
+    over = (
+        Notification.objects.values("recipient_id")
+        .annotate(n=Count("pk"))
+        .filter(n__gt=keep)
+        .values_list("recipient_id", "n")
+    )
+    removed = 0
+    for recipient_id, total in over.iterator():
+        if dry_run:
+            removed += total - keep
+            continue
+        while True:
+            rows = list(
+                Notification.objects.filter(recipient_id=recipient_id)
+                .order_by("-created_at", "-pk")
+                .values_list("pk", "recipient_id", "unread")[keep:keep + batch_size]
+            )
+            if not rows:
+                break
+            removed += _delete_rows(rows)
+            if sleep:
+                time.sleep(sleep)
+    return removed
+
+
+def prune(days=None, keep=None, batch_size=BATCH_SIZE, sleep=0.0, dry_run=False):
+    """
+    Apply the retention policy; returns {"expired": n, "over_cap": n} with
+    the number of rows removed (or that would be removed with dry_run).
+    `days`/`keep` of 0 disable that rule.
+    """
+    days = RETENTION_DAYS if days is None else days
+    keep = MAX_PER_USER if keep is None else keep
+    report = {"expired": 0, "over_cap": 0}
+    if days:
+        cutoff = timezone.now() - timedelta(days=days)
+        report["expired"] = _prune_expired(cutoff, batch_size, sleep, dry_run)
+    if keep:
+        report["over_cap"] = _prune_over_cap(keep, batch_size, sleep, dry_run)
+    logger.info("Notification retention: %s", report)
+    return report
@@ -0,0 +1,86 @@
+"""
+Notification payloads with batched lookups.
+
+serialize_notifications() loads actors and content types with the rows and
+resolves generic targets with one query per target content type, so the
+number of queries does not depend on how many notifications are shown.
+"""
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import QuerySet
+
+from .models import Notification
+
+def prefetch_targets(notifications):
+    """
+    Fill the `target` GenericForeignKey cache of `notifications` in one query
+    per content type. Missing targets are cached as None.
+    """
+    by_ct = defaultdict(set)
+    for n in notifications:
+        if n.target_ct_id and n.target_id:
+            by_ct[n.target_ct_id].add(n.target_id)
+
+    resolved = {}
+    for ct_id, raw_ids in by_ct.items():
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        if model is None:
+            continue
+        pk_field = model._meta.pk
+        ids = {}
+        for raw in raw_ids:
+            try:
+                ids[pk_field.to_python(raw)] = raw
+            except Exception:
+                continue
+        for pk, obj in model._base_manager.in_bulk(list(ids)).items():
+            resolved[(ct_id, ids[pk])] = obj
+
+    field = Notification._meta.get_field("target")
+    for n in notifications:
+        if n.target_ct_id and n.target_id:
+            field.set_cached_value(n, resolved.get((n.target_ct_id, n.target_id)))
+    return notifications
+
+
+def _target_payload(n):
+    if not n.target_ct_id:
+        return None
+    target = n.target
+    payload = {"ct": n.target_ct.model, "id": n.target_id, "exists": target is not None}
+    # no str(target): many __str__ methods follow foreign keys
+    if target is not None and hasattr(target, "get_absolute_url"):
+        payload["url"] = target.get_absolute_url()
+    return payload
+
+
+def notification_payload(n):
+    """
+    Compact dict for one notification; expects actor, target_ct and target to
+    be loaded already (see serialize_notifications).
+    """
+    return {
+        "id": n.pk,
+        "verb": n.verb,
+        "actor": n.actor.username if n.actor_id and n.actor else None,
+        "created_at": n.created_at.isoformat(),
+        "unread": n.unread,
+        "actor_count": n.actor_count,
+        "target": _target_payload(n),
+        "data": n.data or {},
+    }
+
+
+def load_notifications(notifications):
+    """
+    Evaluate `notifications` (queryset or iterable) with actors, content
+    types and targets loaded in a fixed number of queries.
+    """
+    if isinstance(notifications, QuerySet):
+        notifications = notifications.select_related("actor", "target_ct")
+    return prefetch_targets(list(notifications))
+
+
+def serialize_notifications(notifications):
+    return [notification_payload(n) for n in load_notifications(notifications)]
@@ -1,12 +1,53 @@
+import logging
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
+from django.utils import timezone
+from apps.core.nav import invalidate_nav_state
+from apps.core.outbox import enqueue
+from apps.realtime.brokers import publish_to_users
+from . import counters
 from .models import Notification
 
+logger = logging.getLogger(__name__)
+
+BULK_BATCH_SIZE = 500
+ACTOR_SAMPLE_SIZE = 5
+AGGREGATE_VERBS = frozenset(getattr(settings, "NOTIFICATION_AGGREGATE_VERBS", ()))
+AGGREGATION_WINDOW = timedelta(seconds=getattr(settings, "NOTIFICATION_AGGREGATION_WINDOW", 24 * 3600))
+
+NOTIFY_TOPIC = "notifications.notify"
+POST_LIKED_TOPIC = "notifications.post_liked"
+
+
+def notification_event(notification):
+    """
+    Realtime payload pushed to the recipient when a notification is created.
+    """
+    actor = notification.actor
+    return {
+        "id": notification.pk,
+        "verb": notification.verb,
+        "actor": getattr(actor, "username", None) if actor else None,
+        "created_at": notification.created_at.isoformat(),
+        "actor_count": notification.actor_count,
+        "data": notification.data or {},
+    }
+
+
 def create_notification(recipient, verb, actor=None, target=None, data=None):
     """
     Create a notification safely. Non-fatal on failure.
-    `target` can be any model instance.
+    `target` can be any model instance. Aggregated verbs (settings.
+    NOTIFICATION_AGGREGATE_VERBS) may merge into an existing unread row.
     """
+    if verb in AGGREGATE_VERBS:
+        create_notifications([recipient], verb, actor=actor, target=target, data=data)
+        return
     try:
         with transaction.atomic():
             kwargs = {
@@ -18,8 +59,214 @@ def create_notification(recipient, verb, actor=None, target=None, data=None):
             if target is not None:
                 kwargs["target_ct"] = ContentType.objects.get_for_model(target)
                 kwargs["target_id"] = str(getattr(target, "pk", target))
-            Notification.objects.create(**kwargs)
+            notification = Notification.objects.create(**kwargs)
+            counters.increment([notification.recipient_id])
+            _publish_created([notification])
     except Exception:
+        logger.exception("Failed to create notification")
+
+
+def _publish_created(notifications):
+    events = [(n.recipient_id, notification_event(n)) for n in notifications]
+
+    def publish():
+        for recipient_id, payload in events:
+            publish_to_users([recipient_id], "notification", payload)
+
+    transaction.on_commit(publish)
+
+
+def create_notifications(recipients, verb, actor=None, target=None, data=None, batch_size=BULK_BATCH_SIZE,
+                         target_ct=None, target_id=None, aggregate=None):
+    """
+    Fan out the same notification to many recipients (users or user ids).
+    The target content type is resolved once and rows are inserted with
+    bulk_create, one round trip per `batch_size` chunk. The target may also be
+    given pre-resolved as target_ct/target_id.
+
+    With `aggregate` (default: verb is in settings.NOTIFICATION_AGGREGATE_VERBS)
+    a recipient's unread notification with the same verb and target from the
+    last NOTIFICATION_AGGREGATION_WINDOW seconds is updated in place instead
+    ("Alice and 41 others liked your post").
+
+    Non-fatal on failure; returns the number of notifications created or merged.
+    """
+    try:
+        return _create_notifications(recipients, verb, actor, target, data, batch_size, target_ct, target_id,
+                                     aggregate)
+    except Exception:
+        logger.exception("Failed to create notifications")
+        return 0
+
+
+def _merge_actor(notification, actor, data):
+    """
+    Fold one more event into an aggregated notification: the newest actor
+    becomes `actor`, `data` keeps a distinct actor count and a short sample.
+    """
+    merged = dict(notification.data or {})
+    merged.update(data or {})
+    sample = list(merged.get("actor_ids") or ([notification.actor_id] if notification.actor_id else []))
+    count = merged.get("actor_count", len(sample))
+    actor_id = getattr(actor, "pk", None)
+    if actor_id is not None:
+        if actor_id in sample:
+            sample.remove(actor_id)
+        else:
+            count += 1
+        sample.insert(0, actor_id)
+        notification.actor = actor
+    merged["actor_ids"] = sample[:ACTOR_SAMPLE_SIZE]
+    merged["actor_count"] = count
+    notification.data = merged
+    notification.created_at = timezone.now()
+
+
+def _create_notifications(recipients, verb, actor=None, target=None, data=None, batch_size=BULK_BATCH_SIZE,
+                          target_ct=None, target_id=None, aggregate=None):
+    recipient_ids = list(dict.fromkeys(getattr(r, "pk", r) for r in recipients))
+    if not recipient_ids:
+        return 0
+    if target is not None:
+        target_ct = ContentType.objects.get_for_model(target)
+        target_id = str(getattr(target, "pk", target))
+    if aggregate is None:
+        aggregate = verb in AGGREGATE_VERBS
+
+    created = 0
+    for start in range(0, len(recipient_ids), batch_size):
+        chunk = recipient_ids[start:start + batch_size]
+        if aggregate:
+            created += _aggregate_chunk(chunk, verb, actor, target_ct, target_id, data)
+            continue
+        rows = [
+            Notification(
+                recipient_id=rid,
+                actor=actor,
+                verb=verb,
+                target_ct=target_ct,
+                target_id=target_id,
+                data=dict(data or {}),
+            )
+            for rid in chunk
+        ]
+        rows = Notification.objects.bulk_create(rows)
+        counters.increment(chunk)  # also moves the state version
+        _publish_created(rows)
+        invalidate_nav_state(*chunk)
+        created += len(rows)
+    return created
+
+
+def _aggregate_chunk(chunk, verb, actor, target_ct, target_id, data):
+    """
+    Merge into recent unread rows where they exist, bulk-insert the rest.
+    The matching rows are locked so concurrent workers don't lose counts.
+    """
+    with transaction.atomic():
+        existing = {}
+        candidates = (
+            Notification.objects.select_for_update()
+            .filter(
+                recipient_id__in=chunk,
+                verb=verb,
+                target_ct=target_ct,
+                target_id=target_id,
+                unread=True,
+                created_at__gte=timezone.now() - AGGREGATION_WINDOW,
+            )
+            .order_by("created_at")
+        )
+        for n in candidates:
+            existing[n.recipient_id] = n  # newest row per recipient wins
+
+        merged = list(existing.values())
+        for n in merged:
+            _merge_actor(n, actor, data)
+        if merged:
+            Notification.objects.bulk_update(merged, ["actor", "data", "created_at"])
+
+        fresh = []
+        for rid in chunk:
+            if rid in existing:
+                continue
+            n = Notification(recipient_id=rid, verb=verb, target_ct=target_ct, target_id=target_id)
+            _merge_actor(n, actor, data)
+            fresh.append(n)
+        fresh = Notification.objects.bulk_create(fresh)
+        counters.increment([n.recipient_id for n in fresh])
+
+    _publish_created(merged + fresh)
+    invalidate_nav_state(*chunk)
+    counters.touch(*chunk)
+    return len(merged) + len(fresh)
+
+
+# ---------------------------------------------------------------------
+# Outbox: request-path side effects only record an event; the outbox
+# worker (manage.py run_outbox_worker) turns it into Notification rows.
+# ---------------------------------------------------------------------
+def enqueue_notification(recipients, verb, actor=None, target=None, data=None):
+    """
+    Record a notification for one or many recipients (users or ids) in the
+    outbox, inside the caller's transaction.
+    """
+    if isinstance(recipients, (int, str)) or hasattr(recipients, "pk"):
+        recipients = [recipients]
+    recipient_ids = [getattr(r, "pk", r) for r in recipients]
+    if not recipient_ids:
+        return None
+    payload = {
+        "recipient_ids": recipient_ids,
+        "verb": verb,
+        "actor_id": getattr(actor, "pk", actor),
+        "data": data or {},
+    }
+    if target is not None:
+        ct = ContentType.objects.get_for_model(target)
+        payload["target"] = [ct.app_label, ct.model, str(getattr(target, "pk", target))]
+    return enqueue(NOTIFY_TOPIC, payload)
+
+
+def enqueue_post_liked(like):
+    """
+    Record a "liked your post" notification; the post and its author are
+    resolved by the worker, not in the request.
+    """
+    return enqueue(POST_LIKED_TOPIC, {"post_id": like.post_id, "actor_id": like.user_id})
+
+
+def _get_actor(actor_id):
+    if not actor_id:
+        return None
+    return get_user_model().objects.filter(pk=actor_id).first()
+
+
+def handle_notify_event(payload):
+    target_ct = target_id = None
+    if payload.get("target"):
+        app_label, model, target_id = payload["target"]
+        target_ct = ContentType.objects.get_by_natural_key(app_label, model)
+    _create_notifications(
+        payload["recipient_ids"],
+        verb=payload["verb"],
+        actor=_get_actor(payload.get("actor_id")),
+        data=payload.get("data"),
+        target_ct=target_ct,
+        target_id=target_id,
+    )
+
+
+def handle_post_liked(payload):
+    from apps.posts.models import Post
 
-        import logging
-        logging.getLogger(__name__).exception("Failed to create notification")
+    post = Post.objects.filter(pk=payload["post_id"]).only("pk", "title", "user_id").first()
+    if post is None or post.user_id == payload["actor_id"]:
+        return
+    _create_notifications(
+        [post.user_id],
+        verb="liked your post",
+        actor=_get_actor(payload["actor_id"]),
+        target=post,
+        data={"post_id": post.pk, "post_title": post.title},
+    )
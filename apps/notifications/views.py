@@ -1,37 +1,106 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import JsonResponse, HttpResponseForbidden
+from django.contrib.auth.views import redirect_to_login
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, HttpResponseForbidden, HttpResponseNotModified
 from django.shortcuts import get_object_or_404
+from apps.core.nav import invalidate_nav_state
+from apps.realtime.brokers import get_broker, user_channel
+from .counters import decrement, state_version, touch, unread_count
 from .models import Notification
+from .serializers import serialize_notifications
+
+RECENT_LIMIT = 8
+LONG_POLL_MAX_SECONDS = getattr(settings, "NOTIFICATIONS_LONG_POLL_MAX_SECONDS", 25)
+LONG_POLL_RECHECK_SECONDS = 5
+
+
+def recent_payload(user):
+    qs = Notification.objects.filter(recipient=user).order_by("-created_at")[:RECENT_LIMIT]
+    return {"status":"ok","unread_count": unread_count(user), "items": serialize_notifications(qs)}
+
+
+async def _wait_for_change(user_id, since, timeout):
+    """
+    Hold until a notification event reaches the user's channel, the state
+    version moves past `since`, or `timeout` seconds pass. The version is
+    re-read every LONG_POLL_RECHECK_SECONDS, so changes that publish no
+    event (mark read elsewhere) still end the wait.
+    """
+    async with get_broker().subscribe(user_channel(user_id)) as queue:
+        # subscribed first, so a change between the checks can't be missed
+        if await sync_to_async(state_version)(user_id) != since:
+            return
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                return
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=min(remaining, LONG_POLL_RECHECK_SECONDS))
+            except asyncio.TimeoutError:
+                if await sync_to_async(state_version)(user_id) != since:
+                    return
+                continue
+            if message.get("event") == "notification":
+                return
+
+
+class RecentNotificationsView(View):
+    """
+    Latest notifications plus unread count.
+
+    Conditional: the response carries an ETag (the user's notification state
+    version, also returned as "version"). A matching If-None-Match gets 304,
+    a matching ?since=<version> gets {"changed": false}; either costs one
+    primary-key read of the counter row. With ?since=...&wait=<seconds> under ASGI the request is held
+    (long poll) until something changes or the wait runs out.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+
+        if_none_match = request.headers.get("If-None-Match", "").strip('"')
+        since = request.GET.get("since") or if_none_match
+        version = await sync_to_async(state_version)(user.pk)
+
+        try:
+            wait = min(float(request.GET.get("wait", 0)), LONG_POLL_MAX_SECONDS)
+        except ValueError:
+            wait = 0
+        if since == version and wait > 0 and isinstance(request, ASGIRequest):
+            await _wait_for_change(user.pk, since, wait)
+            version = await sync_to_async(state_version)(user.pk)
 
-class RecentNotificationsView(LoginRequiredMixin, View):
-    def get(self, request, *args, **kwargs):
-        qs = Notification.objects.filter(recipient=request.user).order_by("-created_at")[:8]
-        items = []
-        for n in qs:
-            items.append({
-                "id": n.pk,
-                "verb": n.verb,
-                "actor": getattr(n.actor, "username", None) if n.actor else None,
-                "created_at": n.created_at.isoformat(),
-                "unread": n.unread,
-                "target": {
-                    "ct": n.target_ct.model if n.target_ct else None,
-                    "id": n.target_id
-                } if n.target_ct else None,
-                "data": n.data or {}
-            })
-        unread = Notification.objects.filter(recipient=request.user, unread=True).count()
-        return JsonResponse({"status":"ok","unread_count": unread, "items": items})
+        if since == version:
+            if if_none_match == version:
+                response = HttpResponseNotModified()
+            else:
+                response = JsonResponse({"status":"ok","changed": False, "version": version})
+        else:
+            payload = await sync_to_async(recent_payload)(user)
+            payload.update({"changed": True, "version": version})
+            response = JsonResponse(payload)
+        response["ETag"] = f'"{version}"'
+        response["Cache-Control"] = "private, no-cache"
+        return response
 
 class MarkReadView(LoginRequiredMixin, View):
     def post(self, request, pk, *args, **kwargs):
         n = get_object_or_404(Notification, pk=pk, recipient=request.user)
         n.mark_read()
-        unread = Notification.objects.filter(recipient=request.user, unread=True).count()
-        return JsonResponse({"status":"ok","unread_count": unread})
+        return JsonResponse({"status":"ok","unread_count": unread_count(request.user)})
 
 class MarkAllReadView(LoginRequiredMixin, View):
     def post(self, request, *args, **kwargs):
-        Notification.objects.filter(recipient=request.user, unread=True).update(unread=False)
+        marked = Notification.objects.filter(recipient=request.user, unread=True).update(unread=False)
+        decrement(request.user.pk, marked)
+        invalidate_nav_state(request.user.pk)
+        touch(request.user.pk)
         return JsonResponse({"status":"ok","unread_count": 0})
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Post
+from .models import Post, TagStat
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
@@ -8,3 +8,10 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ("title", "text", "user__email", "user__username")
     autocomplete_fields = ("user",)
     ordering = ("-created_at",)
+
+
+@admin.register(TagStat)
+class TagStatAdmin(admin.ModelAdmin):
+    list_display = ("tag", "slug", "posts_count", "updated_at")
+    search_fields = ("slug", "name")
+    ordering = ("-posts_count",)
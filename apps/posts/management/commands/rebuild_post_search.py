@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from apps.posts.models import Post
+from apps.posts.search import post_index
+
+
+class Command(BaseCommand):
+    help = "Create (if needed) and re-populate the post full-text index."
+
+    def handle(self, *args, **options):
+        count = post_index.rebuild(Post.objects.filter(is_active=True))
+        self.stdout.write(f"Indexed {count} post(s).")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from apps.posts.tags import refresh
+
+
+class Command(BaseCommand):
+    help = "Rebuild TagStat (normalized slug and active post count) for every tag."
+
+    def handle(self, *args, **options):
+        count = refresh()
+        self.stdout.write(f"Refreshed {count} tag(s).")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from apps.posts import trending
+
+
+class Command(BaseCommand):
+    help = "Fold new likes and comments into the time-decayed trending scores (run every few minutes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=trending.BATCH_SIZE)
+        parser.add_argument("--no-prune", action="store_true", help="Keep scores that decayed to nothing.")
+
+    def handle(self, *args, **options):
+        consumed = trending.update(batch_size=options["batch_size"])
+        pruned = 0 if options["no_prune"] else trending.prune()
+        self.stdout.write(
+            f"Consumed {consumed.get('like', 0)} like(s) and {consumed.get('comment', 0)} comment(s); "
+            f"pruned {pruned} stale score(s)."
+        )
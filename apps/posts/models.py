@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.db import models
 from taggit.managers import TaggableManager
+from taggit.models import Tag
 
 
 class Post(models.Model):
@@ -12,7 +13,10 @@ class Post(models.Model):
     title = models.CharField(max_length=100)
     text = models.TextField(max_length=2500)
     image = models.ImageField(null=True, blank=True, upload_to='posts/img/')
+    # resized copies of `image`, see apps.core.images
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
@@ -23,11 +27,85 @@ class Post(models.Model):
         indexes = [
             models.Index(fields=['created_at']),
             models.Index(fields=['user']),
+            # keyset pagination of the public and per-user lists
+            models.Index(fields=['is_active', '-created_at', '-id'], name='post_active_recent_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='post_user_recent_idx'),
         ]
 
     def __str__(self):
         return f"{self.title} ({self.user})"
 
 
+class PostScore(models.Model):
+    """
+    Trending score of a post, maintained by apps.posts.trending.
+    `score` is the log of the time-decayed engagement, shifted to a fixed
+    epoch, so ordering by it equals ordering by the current decayed score
+    and never needs recomputation as time passes.
+    """
+    post = models.OneToOneField(Post, primary_key=True, on_delete=models.CASCADE, related_name="trending")
+    score = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-score"], name="postscore_score_idx"),
+        ]
+
+
+class TrendingCheckpoint(models.Model):
+    """
+    How far update_trending has consumed each event source (by primary key).
+    `pending` holds ids below last_id that were missing when it was passed
+    (uncommitted at the time, or removed) as {id: unix time first missed}.
+    """
+    source = models.CharField(max_length=50, primary_key=True)
+    last_id = models.BigIntegerField(default=0)
+    pending = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source}: {self.last_id}"
+
+
+class TrendingLike(models.Model):
+    """
+    Last time update_trending counted a like by `user` on `post`. Unlike and
+    like again re-creates the Like row; a new row for the same pair within
+    TRENDING_LIKE_DEDUPE_HOURS of the counted one adds nothing.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="+")
+    counted_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "post"], name="trendinglike_user_post_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["counted_at"], name="trendinglike_counted_idx"),
+        ]
+
+
+class TagStat(models.Model):
+    """
+    Denormalized tag index: lowercase slug and the number of active posts
+    carrying the tag. Maintained by apps.posts.tags from post/tag signals.
+    """
+    tag = models.OneToOneField(Tag, primary_key=True, on_delete=models.CASCADE, related_name="stat")
+    slug = models.CharField(max_length=100, unique=True)
+    name = models.CharField(max_length=100)
+    posts_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-posts_count", "slug"], name="tagstat_popular_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.posts_count})"
+
+
 class Model:
     pass
\ No newline at end of file
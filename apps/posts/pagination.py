@@ -0,0 +1,56 @@
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from utils.pagination import CachedCountPaginator, keyset_page
+
+
+class PostPagination(PageNumberPagination):
+    """
+    Newest-first listings are keyset-paged: `next`/`previous` carry
+    ?before=/?after= cursors on (created_at, id), so every page is one index
+    range read. Explicit ?page=, a non-default ?ordering= or a search fall
+    back to page numbers. `count` is always present and comes from a cached
+    COUNT(*).
+    """
+    django_paginator_class = CachedCountPaginator
+    keyset_ordering = ("-created_at",)
+
+    def use_keyset(self, request, view):
+        if self.page_query_param in request.query_params or getattr(view, "search_query", None):
+            return False
+        ordering = request.query_params.get("ordering")
+        return not ordering or tuple(ordering.split(",")) == self.keyset_ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.use_keyset(request, view)
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        page_size = self.get_page_size(request)
+        self.count = CachedCountPaginator(queryset, page_size).count
+        self.page = keyset_page(
+            queryset,
+            page_size,
+            before=request.query_params.get("before"),
+            after=request.query_params.get("after"),
+        )
+        return list(self.page.object_list)
+
+    def _cursor_link(self, param, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        for other in ("before", "after", self.page_query_param):
+            url = remove_query_param(url, other)
+        return replace_query_param(url, param, cursor)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            "count": self.count,
+            "next": self._cursor_link("before", self.page.older_cursor),
+            "previous": self._cursor_link("after", self.page.newer_cursor),
+            "results": data,
+        })
@@ -0,0 +1,25 @@
+"""
+Ranked full-text search over posts (title weighted above text).
+"""
+from utils.search import FullTextIndex, render_snippet
+from .models import Post
+
+post_index = FullTextIndex("posts_post_fts", Post, ["title", "text"], weights=[4, 1])
+
+
+def search_posts(queryset, query, tags=None):
+    """
+    Filter `queryset` to posts matching `query` (and all of `tags`, by slug),
+    ordered by relevance; each row gets `search_rank` and `search_snippet`.
+    """
+    qs = post_index.search(queryset, query, highlight="text")
+    for tag in tags or ():
+        qs = qs.filter(tags__slug=tag.lower())
+    return qs
+
+
+def highlight(post, length=200):
+    """
+    Safe HTML excerpt for a search hit, falling back to the start of the text.
+    """
+    return render_snippet(getattr(post, "search_snippet", None) or post.text[:length])
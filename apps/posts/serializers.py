@@ -1,14 +1,53 @@
 from rest_framework import serializers
+from apps.core.images import variant_url, variant_urls
+from apps.likes.services import liked_post_ids
 from .models import Post
+from .search import highlight
 
 class PostSerializer(serializers.ModelSerializer):
     user = serializers.ReadOnlyField(source="user.id")
     likes_count = serializers.IntegerField(read_only=True)
+    highlight = serializers.SerializerMethodField()
+    liked_by_me = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
+    image_thumb = serializers.SerializerMethodField()
+    image_card = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
         fields = [
-            "id", "user", "title", "text", "image",
-            "likes_count", "is_active", "created_at", "updated_at",
+            "id", "user", "title", "text", "image", "image_variants", "image_thumb", "image_card",
+            "likes_count", "comments_count", "liked_by_me", "is_active", "created_at", "updated_at", "highlight",
         ]
-        read_only_fields = ["id", "user", "likes_count", "created_at", "updated_at"]
+        read_only_fields = ["id", "user", "likes_count", "comments_count", "created_at", "updated_at"]
+
+    def get_highlight(self, obj):
+        """Excerpt with <mark>ed matches, only on search results."""
+        if not hasattr(obj, "search_rank"):
+            return None
+        return str(highlight(obj))
+
+    def get_liked_by_me(self, obj):
+        """From `liked_post_ids` in the context (one lookup per page), else looked up for this post."""
+        liked = self.context.get("liked_post_ids")
+        if liked is None:
+            request = self.context.get("request")
+            liked = liked_post_ids(getattr(request, "user", None), [obj.pk])
+        return obj.pk in liked
+
+    def _absolute(self, url):
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request is not None and url else url
+
+    def get_image_variants(self, obj):
+        """{"thumb": {"webp": url, "jpeg": url, "width": w, "height": h}, ...} once generated."""
+        return {
+            variant: {key: (self._absolute(value) if isinstance(value, str) else value) for key, value in entry.items()}
+            for variant, entry in variant_urls(obj.image).items()
+        }
+
+    def get_image_thumb(self, obj):
+        return self._absolute(variant_url(obj.image, "thumb")) or None
+
+    def get_image_card(self, obj):
+        return self._absolute(variant_url(obj.image, "card")) or None
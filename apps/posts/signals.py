@@ -0,0 +1,60 @@
+from django.db.models.signals import m2m_changed, post_init, post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from taggit.models import TaggedItem
+from apps.core.images import enqueue_variants, needs_variants
+from . import tags
+from .models import Post
+from .search import post_index
+
+
+@receiver(post_init, sender=Post)
+def post_loaded(sender, instance, **kwargs):
+    instance._was_active = instance.is_active
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    post_index.update(instance, searchable=instance.is_active)
+    if needs_variants(instance, "image"):
+        enqueue_variants(instance, "image")
+    if not created and instance.is_active != instance._was_active:
+        # new posts have no tags yet
+        tags.adjust(tags.tag_ids_for(instance), 1 if instance.is_active else -1)
+    instance._was_active = instance.is_active
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    instance._tag_ids = tags.tag_ids_for(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    post_index.remove(instance.pk)
+    if instance._was_active:
+        tags.adjust(getattr(instance, "_tag_ids", ()), -1)
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+def post_tags_changed(sender, instance, action, pk_set, **kwargs):
+    if not isinstance(instance, Post):
+        return
+    if action == "pre_clear":
+        instance._tag_ids = tags.tag_ids_for(instance)
+    elif instance._was_active:
+        # taggit sends exactly the tag ids added / removed
+        if action == "post_clear":
+            tags.adjust(getattr(instance, "_tag_ids", ()), -1)
+        elif action == "post_add":
+            tags.adjust(pk_set, 1)
+        elif action == "post_remove":
+            tags.adjust(pk_set, -1)
+    if action in ("post_add", "post_remove", "post_clear"):
+        # tags are rendered on cached post cards, keyed on updated_at
+        instance.updated_at = timezone.now()
+        Post.objects.filter(pk=instance.pk).update(updated_at=instance.updated_at)
+
+
+def ensure_search_index(sender, **kwargs):
+    post_index.ensure()
@@ -0,0 +1,133 @@
+"""
+Tag index with precomputed counts.
+
+TagStat keeps a lowercase slug and the number of active posts per tag.
+Post signals keep the counts current with adjust(): a tag added to or
+removed from an active post, or a post activated, deactivated or deleted,
+moves the affected counts by one with a single UPDATE, so tag clouds and
+tag pages are plain indexed lookups. popular_tags() and autocomplete() are
+cached. refresh() recounts from TaggedItem and backs
+`manage.py recount_tags`, which rebuilds the whole table.
+"""
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.utils.text import slugify
+from taggit.models import Tag, TaggedItem
+
+from .models import Post, TagStat
+
+POPULAR_CACHE_KEY = "tags:popular"
+POPULAR_LIMIT = 30
+AUTOCOMPLETE_LIMIT = 10
+CACHE_TIMEOUT = getattr(settings, "TAG_CACHE_TIMEOUT", 300)
+
+
+def normalize(value):
+    return (value or "").strip().lower()
+
+
+def _post_items():
+    return TaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(Post))
+
+
+def tag_ids_for(post):
+    return set(_post_items().filter(object_id=post.pk).values_list("tag_id", flat=True))
+
+
+def adjust(tag_ids, delta):
+    """
+    Move posts_count of `tag_ids` by `delta` (never below zero), creating
+    the TagStat rows of tags seen for the first time.
+    """
+    tag_ids = set(tag_ids or ())
+    if not tag_ids or not delta:
+        return
+    if delta > 0:
+        missing = tag_ids - set(TagStat.objects.filter(tag_id__in=tag_ids).values_list("tag_id", flat=True))
+        if missing:
+            TagStat.objects.bulk_create(
+                [
+                    TagStat(tag_id=pk, slug=normalize(slug), name=name)
+                    for pk, slug, name in Tag.objects.filter(pk__in=missing).values_list("pk", "slug", "name")
+                ],
+                ignore_conflicts=True,
+            )
+    TagStat.objects.filter(tag_id__in=tag_ids).update(posts_count=Greatest(F("posts_count") + delta, 0))
+    cache.delete(POPULAR_CACHE_KEY)
+
+
+def refresh(tag_ids=None):
+    """
+    Recount active posts for `tag_ids` (all tags if None) and upsert TagStat.
+    """
+    tags = Tag.objects.all()
+    if tag_ids is not None:
+        tag_ids = set(tag_ids)
+        if not tag_ids:
+            return 0
+        tags = tags.filter(pk__in=tag_ids)
+    active_post_ids = Post.objects.filter(is_active=True).values("pk")
+    counts = dict(
+        _post_items()
+        .filter(tag__in=tags, object_id__in=active_post_ids)
+        .values("tag_id")
+        .annotate(n=Count("pk"))
+        .values_list("tag_id", "n")
+    )
+    stats = [
+        TagStat(tag_id=pk, slug=normalize(slug), name=name, posts_count=counts.get(pk, 0))
+        for pk, slug, name in tags.values_list("pk", "slug", "name")
+    ]
+    TagStat.objects.bulk_create(
+        stats,
+        update_conflicts=True,
+        unique_fields=["tag"],
+        update_fields=["slug", "name", "posts_count", "updated_at"],
+    )
+    cache.delete(POPULAR_CACHE_KEY)
+    return len(stats)
+
+
+def get_tag(slug):
+    """
+    Tag for a URL slug (case-insensitive via the normalized TagStat.slug).
+    """
+    stat = TagStat.objects.select_related("tag").filter(slug=slugify(normalize(slug), allow_unicode=True)).first()
+    return stat.tag if stat else None
+
+
+def popular_tags(limit=POPULAR_LIMIT):
+    """
+    [{"name", "slug", "count"}] of the most used tags, cached.
+    """
+    tags = cache.get(POPULAR_CACHE_KEY)
+    if tags is None:
+        tags = list(
+            TagStat.objects.filter(posts_count__gt=0)
+            .order_by("-posts_count", "slug")
+            .values("name", "slug", count=F("posts_count"))[:POPULAR_LIMIT]
+        )
+        cache.set(POPULAR_CACHE_KEY, tags, CACHE_TIMEOUT)
+    return tags[:limit]
+
+
+def autocomplete(prefix, limit=AUTOCOMPLETE_LIMIT):
+    """
+    Most used tags whose slug starts with `prefix`, cached per prefix.
+    """
+    prefix = slugify(normalize(prefix)[:50], allow_unicode=True)
+    if not prefix:
+        return []
+    key = f"tags:ac:{prefix}"
+    tags = cache.get(key)
+    if tags is None:
+        tags = list(
+            TagStat.objects.filter(slug__startswith=prefix, posts_count__gt=0)
+            .order_by("-posts_count", "slug")
+            .values("name", "slug", count=F("posts_count"))[:AUTOCOMPLETE_LIMIT]
+        )
+        cache.set(key, tags, CACHE_TIMEOUT)
+    return tags[:limit]
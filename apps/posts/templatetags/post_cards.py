@@ -0,0 +1,49 @@
+"""
+{% post_card post liked_post_ids %} renders a post card through a versioned
+fragment cache.
+
+The cached HTML is viewer-independent: it is keyed on post id, updated_at
+(bumped on edit and tag change), likes_count (changes on every like toggle)
+and the author name shown on the card, so stale entries are never read and
+need no explicit invalidation.
+The viewer's liked state is substituted into the cached HTML afterwards.
+"""
+import hashlib
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+CARD_TEMPLATE = "includes/post_card.html"
+CACHE_TIMEOUT = getattr(settings, "POST_CARD_CACHE_TIMEOUT", 24 * 3600)
+LIKED_MARKER = "__post_liked_state__"
+LIKED_CLASSES = {True: "bi-heart-fill text-danger", False: "bi-heart"}
+
+
+def card_cache_key(post, template_name=CARD_TEMPLATE):
+    version = post.updated_at.timestamp() if post.updated_at else 0
+    author = hashlib.blake2b(
+        (post.user.username or post.user.email).encode(), digest_size=8
+    ).hexdigest()
+    return f"post_card:{template_name}:{post.pk}:{version}:{post.likes_count}:{post.user_id}:{author}"
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post, liked_post_ids=None, template_name=CARD_TEMPLATE):
+    request = context.get("request")
+    card_context = {"post": post, "liked_state": LIKED_MARKER}
+    if getattr(post, "snippet_html", None):
+        # search hits carry a per-query excerpt: never cache those
+        html = render_to_string(template_name, card_context, request=request)
+    else:
+        key = card_cache_key(post, template_name)
+        html = cache.get(key)
+        if html is None:
+            html = render_to_string(template_name, card_context, request=request)
+            cache.set(key, html, CACHE_TIMEOUT)
+    liked = bool(liked_post_ids) and post.pk in liked_post_ids
+    return mark_safe(html.replace(LIKED_MARKER, LIKED_CLASSES[liked]))
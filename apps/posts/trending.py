@@ -0,0 +1,247 @@
+"""
+Time-decayed trending ranking.
+
+Each like or comment adds its weight to a post's score, and the score decays
+with a half-life of TRENDING_HALF_LIFE_HOURS. Scores are kept in log space
+relative to a fixed epoch:
+
+    score = log(sum(weight * exp(lambda * (event_time - EPOCH))))
+
+which makes the stored value time-invariant: ordering by it equals ordering
+by the current decayed score, so nothing has to be recomputed as time passes
+and PostScore(-score) is a plain index scan. update() consumes new Like and
+Comment rows in primary-key batches past a checkpoint, folds each batch into
+per-post log-sum-exp terms and upserts the touched rows. Requests only read
+the cached top list.
+
+Ids are handed out at insert but become visible at commit, so a slow
+transaction can commit a row below an id already consumed. Ids skipped over
+next to recent rows are kept on the checkpoint and re-read on every run for
+TRENDING_LATE_WINDOW_SECONDS; each event is still folded exactly once.
+
+Scores only grow: removals (unlikes, deleted or deactivated comments) are
+not subtracted. An event removed after it was folded keeps contributing
+until it decays away with the half-life; one removed before update() reached
+it is never counted. Since unliking deletes the Like row and liking again
+creates a new one, each (user, post) like is counted at most once per
+TRENDING_LIKE_DEDUPE_HOURS (TrendingLike), so toggling can't pump a score.
+"""
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Post, PostScore, TrendingCheckpoint, TrendingLike
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+HALF_LIFE_HOURS = getattr(settings, "TRENDING_HALF_LIFE_HOURS", 12)
+DECAY_PER_SECOND = math.log(2) / (HALF_LIFE_HOURS * 3600)
+WEIGHTS = getattr(settings, "TRENDING_WEIGHTS", {"like": 1.0, "comment": 3.0})
+BATCH_SIZE = 5000
+TRENDING_LIMIT = 50
+CACHE_KEY = "trending:post_ids"
+CACHE_TIMEOUT = getattr(settings, "TRENDING_CACHE_TIMEOUT", 120)
+# rows whose decayed score fell below this are dropped by prune()
+MIN_SCORE = 0.05
+LATE_WINDOW_SECONDS = getattr(settings, "TRENDING_LATE_WINDOW_SECONDS", 600)
+# at most this many ids are remembered for one hole in the id sequence
+MAX_GAP = 1000
+# a re-like of the same post by the same user within this window adds nothing
+LIKE_DEDUPE_HOURS = getattr(settings, "TRENDING_LIKE_DEDUPE_HOURS", 4 * HALF_LIFE_HOURS)
+
+
+def _log_time(when):
+    return DECAY_PER_SECOND * (when - EPOCH).total_seconds()
+
+
+def logaddexp(a, b):
+    if a is None:
+        return b
+    hi, lo = (a, b) if a >= b else (b, a)
+    return hi + math.log1p(math.exp(lo - hi))
+
+
+def current_score(log_score, now=None):
+    """
+    Decayed engagement of a stored log-space score at `now`.
+    """
+    return math.exp(log_score - _log_time(now or timezone.now()))
+
+
+def _sources():
+    from apps.comments.models import Comment
+    from apps.likes.models import Like
+
+    return {
+        "like": Like.objects.all(),
+        "comment": Comment.objects.filter(is_active=True),
+    }
+
+
+def _fold(rows, weight):
+    """
+    Per-post log-sum-exp of (post_id, created_at) events.
+    """
+    log_weight = math.log(weight)
+    terms = defaultdict(list)
+    for post_id, created_at in rows:
+        terms[post_id].append(log_weight + _log_time(created_at))
+    folded = {}
+    for post_id, values in terms.items():
+        top = max(values)
+        folded[post_id] = top + math.log(math.fsum(math.exp(v - top) for v in values))
+    return folded
+
+
+def _apply(batch_scores):
+    existing = dict(
+        PostScore.objects.filter(post_id__in=list(batch_scores)).values_list("post_id", "score")
+    )
+    live = set(Post.objects.filter(pk__in=list(batch_scores)).values_list("pk", flat=True))
+    rows = [
+        PostScore(post_id=post_id, score=logaddexp(existing.get(post_id), score))
+        for post_id, score in batch_scores.items()
+        if post_id in live
+    ]
+    PostScore.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=["post"], update_fields=["score", "updated_at"]
+    )
+    return len(rows)
+
+
+def _gaps(rows, last_id, horizon, now_ts):
+    """
+    {id: now_ts} for ids missing between consecutive `rows` (ordered by pk)
+    whose upper neighbour was created after `horizon`; older holes can't be
+    transactions still in flight.
+    """
+    gaps = {}
+    prev = last_id
+    for pk, _, created_at, _ in rows:
+        if prev and pk - prev > 1 and created_at >= horizon:
+            gaps.update((str(missing), now_ts) for missing in range(max(prev + 1, pk - MAX_GAP), pk))
+        prev = pk
+    return gaps
+
+
+def _first_likes(rows):
+    """
+    The `rows` whose (user, post) wasn't counted within LIKE_DEDUPE_HOURS
+    before them; records those as counted.
+    """
+    window = timedelta(hours=LIKE_DEDUPE_HOURS)
+    counted = {
+        (user_id, post_id): counted_at
+        for user_id, post_id, counted_at in TrendingLike.objects.filter(
+            post_id__in={post_id for _, post_id, _, _ in rows},
+            user_id__in={user_id for _, _, _, user_id in rows},
+        ).values_list("user_id", "post_id", "counted_at")
+    }
+    first = []
+    for row in rows:
+        _, post_id, created_at, user_id = row
+        previous = counted.get((user_id, post_id))
+        if previous is not None and abs(created_at - previous) < window:
+            continue
+        counted[(user_id, post_id)] = created_at
+        first.append(row)
+    TrendingLike.objects.bulk_create(
+        [
+            TrendingLike(user_id=user_id, post_id=post_id, counted_at=created_at)
+            for _, post_id, created_at, user_id in first
+        ],
+        update_conflicts=True,
+        unique_fields=["user", "post"],
+        update_fields=["counted_at"],
+    )
+    return first
+
+
+def _consume(checkpoint, rows, weight, pending):
+    with transaction.atomic():
+        if rows:
+            events = _first_likes(rows) if checkpoint.source == "like" else rows
+            if events:
+                _apply(_fold([(post_id, created_at) for _, post_id, created_at, _ in events], weight))
+            checkpoint.last_id = max(checkpoint.last_id, rows[-1][0])
+        checkpoint.pending = pending
+        checkpoint.save(update_fields=["last_id", "pending", "updated_at"])
+
+
+def update(batch_size=BATCH_SIZE, now=None):
+    """
+    Fold all Like/Comment rows newer than the checkpoints, and the late
+    commits behind them, into PostScore. Returns {source: events consumed}.
+    """
+    now = now or timezone.now()
+    horizon = now - timedelta(seconds=LATE_WINDOW_SECONDS)
+    consumed = {}
+    for source, queryset in _sources().items():
+        consumed[source] = 0
+        checkpoint, _ = TrendingCheckpoint.objects.get_or_create(source=source)
+        pending = {pk: seen for pk, seen in checkpoint.pending.items() if seen >= horizon.timestamp()}
+        late = []
+        if pending:
+            late = list(
+                queryset.filter(pk__in=[int(pk) for pk in pending])
+                .order_by("pk")
+                .values_list("pk", "post_id", "created_at", "user_id")
+            )
+            for pk, _, _, _ in late:
+                del pending[str(pk)]
+        if late or pending != checkpoint.pending:
+            _consume(checkpoint, late, WEIGHTS[source], pending)
+            consumed[source] += len(late)
+
+        while True:
+            rows = list(
+                queryset.filter(pk__gt=checkpoint.last_id)
+                .order_by("pk")
+                .values_list("pk", "post_id", "created_at", "user_id")[:batch_size]
+            )
+            if not rows:
+                break
+            pending = {**checkpoint.pending, **_gaps(rows, checkpoint.last_id, horizon, now.timestamp())}
+            _consume(checkpoint, rows, WEIGHTS[source], pending)
+            consumed[source] += len(rows)
+    if any(consumed.values()):
+        cache.delete(CACHE_KEY)
+    return consumed
+
+
+def prune(now=None):
+    """
+    Delete scores that decayed below MIN_SCORE, and like records past the
+    dedupe window; returns score rows removed.
+    """
+    now = now or timezone.now()
+    threshold = math.log(MIN_SCORE) + _log_time(now)
+    deleted, _ = PostScore.objects.filter(score__lt=threshold).delete()
+    TrendingLike.objects.filter(counted_at__lt=now - timedelta(hours=LIKE_DEDUPE_HOURS)).delete()
+    return deleted
+
+
+def trending_post_ids(limit=TRENDING_LIMIT):
+    ids = cache.get(CACHE_KEY)
+    if ids is None:
+        ids = list(
+            PostScore.objects.filter(post__is_active=True)
+            .order_by("-score")
+            .values_list("post_id", flat=True)[:TRENDING_LIMIT]
+        )
+        cache.set(CACHE_KEY, ids, CACHE_TIMEOUT)
+    return ids[:limit]
+
+
+def trending_posts(limit=TRENDING_LIMIT):
+    """
+    Top trending active posts in rank order, read from the stored scores.
+    """
+    ids = trending_post_ids(limit)
+    posts = Post.objects.filter(pk__in=ids, is_active=True).select_related("user").prefetch_related("tags")
+    by_id = {p.pk: p for p in posts}
+    return [by_id[pk] for pk in ids if pk in by_id]
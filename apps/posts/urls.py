@@ -9,7 +9,10 @@ urlpatterns = [
     path("", views.PostListView.as_view(), name="list"),
     path("<int:pk>/", views.PostDetailView.as_view(), name="detail"),
     path("my-posts/", views.UserPostsView.as_view(), name="user_posts"),
+    path("trending/", views.TrendingPostsView.as_view(), name="trending"),
     path('tag/<slug:slug>/', views.TagPostListView.as_view(), name='by_tag'),
+    path("tags/popular/", views.PopularTagsView.as_view(), name="popular_tags"),
+    path("tags/autocomplete/", views.TagAutocompleteView.as_view(), name="tag_autocomplete"),
 
     path("create/", forms.PostCreateView.as_view(), name="create"),
     path("<int:pk>/edit/", forms.PostUpdateView.as_view(), name="edit"),
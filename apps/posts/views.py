@@ -1,17 +1,20 @@
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import redirect, get_object_or_404
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.templatetags.static import static
+from django.views import View
 from django.views.generic import ListView, DetailView
-from django.http import Http404
+from django.http import Http404, JsonResponse
 from .models import Post
-from apps.likes.models import Like
-from django.db.models import Q
-from taggit.models import Tag
+from .search import highlight, search_posts
+from .tags import autocomplete, get_tag, popular_tags
+from .trending import trending_posts
+from apps.comments.threads import thread_page
+from apps.likes.services import has_liked, liked_post_ids
+from utils.pagination import KeysetPaginationMixin
 
 
-class PostListView(ListView):
+class PostListView(KeysetPaginationMixin, ListView):
     model = Post
     template_name = "apps/posts/posts_list.html"
     context_object_name = "posts"
@@ -25,47 +28,37 @@ class PostListView(ListView):
             .order_by("-created_at")
         )
 
-        q = self.request.GET.get('q', '')
+        q = self.request.GET.get('q', '').strip()
+        tag = self.request.GET.get('tag')
         if q:
-            q = q.strip()
-            qs = qs.filter(Q(title__icontains=q) | Q(text__icontains=q))
+            return search_posts(qs, q, tags=[tag] if tag else None)
 
-        tag = self.request.GET.get('tag')
         if tag:
-            qs = qs.filter(tags__slug__iexact=tag)
+            tag_obj = get_tag(tag)
+            qs = qs.filter(tags__id=tag_obj.pk) if tag_obj else qs.none()
 
         return qs
 
-    def paginate_queryset(self, queryset, page_size):
-        paginator = Paginator(queryset, page_size)
-        page_number = self.request.GET.get("page") or 1
-        try:
-            page_obj = paginator.page(page_number)
-        except (PageNotAnInteger, EmptyPage):
-            page_obj = paginator.page(paginator.num_pages or 1)
-        return paginator, page_obj, page_obj.object_list, page_obj.has_other_pages()
+    def use_keyset(self):
+        # ranked search results are not in (created_at, id) order
+        return not self.request.GET.get('q', '').strip()
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        object_list = getattr(self, "object_list", None) or ctx.get("object_list", None)
+        object_list = ctx.get("object_list")
 
         ctx["no_posts"] = (object_list is None) or (len(object_list) == 0)
         if ctx["no_posts"]:
             ctx.setdefault("empty_message", "No posts yet. Be the first to create one.")
 
-        user = self.request.user
-        ctx["liked_post_ids"] = set()
-        if user.is_authenticated and object_list:
-            try:
-                post_pks = [p.pk for p in object_list]
-            except Exception:
-                post_pks = []
-            if post_pks:
-                liked_qs = Like.objects.filter(user=user, post_id__in=post_pks).values_list("post_id", flat=True)
-                ctx["liked_post_ids"] = set(liked_qs)
+        ctx["liked_post_ids"] = liked_post_ids(self.request.user, [p.pk for p in object_list or ()])
 
         ctx["q"] = self.request.GET.get('q', '').strip()
+        if ctx["q"]:
+            for post in ctx["posts"]:
+                post.snippet_html = highlight(post)
         ctx["tag"] = self.request.GET.get('tag', '').strip()
+        ctx["popular_tags"] = popular_tags(limit=15)
         return ctx
 
 
@@ -89,26 +82,18 @@ class PostDetailView(DetailView):
         user = self.request.user
         post = self.object
 
-        ctx["user_liked"] = False
-        if user.is_authenticated:
-            ctx["user_liked"] = Like.objects.filter(user=user, post=post).exists()
+        ctx["user_liked"] = has_liked(user, post.pk)
 
         from apps.comments.forms import CommentForm
         ctx["form"] = CommentForm()
 
-        ctx["comments"] = (
-            post.comments
-            .filter(is_active=True)
-            .select_related("user")
-            .order_by("created_at")
-        )
-
-        ctx["comments_count"] = ctx["comments"].count()
+        ctx["threads"], ctx["threads_cursor"] = thread_page(post)
+        ctx["comments_count"] = post.comments_count
 
         return ctx
 
 
-class UserPostsView(LoginRequiredMixin, ListView):
+class UserPostsView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Post
     template_name = "apps/posts/user_posts.html"
     context_object_name = "posts"
@@ -123,44 +108,19 @@ class UserPostsView(LoginRequiredMixin, ListView):
             .order_by("-created_at")
         )
 
-    def get_context_data(self, **kwargs):
-        ctx = super().get_context_data(**kwargs)
-        object_list = getattr(self, "object_list", None) or ctx.get("object_list", None)
-
-        user = self.request.user
-        ctx["liked_post_ids"] = set()
-        if user.is_authenticated and object_list:
-            try:
-                post_pks = [p.pk for p in object_list]
-            except Exception:
-                post_pks = []
-            if post_pks:
-                liked_qs = Like.objects.filter(user=user, post_id__in=post_pks).values_list("post_id", flat=True)
-                ctx["liked_post_ids"] = set(liked_qs)
-
-        return ctx
-
 
-class TagPostListView(ListView):
+class TagPostListView(KeysetPaginationMixin, ListView):
     template_name = 'apps/posts/posts_list.html'
     context_object_name = 'posts'
     paginate_by = 9
 
     def get_queryset(self):
-        value = self.kwargs.get('slug', '').strip()
-        if not value:
+        self.tag = get_tag(self.kwargs.get('slug', ''))
+        if self.tag is None:
             return Post.objects.none()
 
-        tag_fields = [f.name for f in Tag._meta.get_fields()]
-        if 'slug' in tag_fields:
-            filter_kwargs = {'tags__slug__iexact': value}
-            self.tag = Tag.objects.filter(slug__iexact=value).first()
-        else:
-            filter_kwargs = {'tags__name__iexact': value}
-            self.tag = Tag.objects.filter(name__iexact=value).first()
-
         return (
-            Post.objects.filter(is_active=True, **filter_kwargs)
+            Post.objects.filter(is_active=True, tags__id=self.tag.pk)
                         .select_related('user')
                         .prefetch_related('tags')
                         .order_by('-created_at')
@@ -169,4 +129,44 @@ class TagPostListView(ListView):
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ctx['tag'] = self.tag or self.kwargs.get('slug')
+        ctx['liked_post_ids'] = liked_post_ids(self.request.user, [p.pk for p in ctx['posts']])
+        return ctx
+
+
+class PopularTagsView(View):
+    """
+    JSON tag cloud: most used tags with their active post counts (cached).
+    """
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = max(1, min(int(request.GET.get("limit", 30)), 30))
+        except ValueError:
+            limit = 30
+        return JsonResponse({"status": "ok", "tags": popular_tags(limit=limit)})
+
+
+class TagAutocompleteView(View):
+    """
+    JSON tag suggestions for ?q=<prefix>, most used first (cached per prefix).
+    """
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({"status": "ok", "tags": autocomplete(request.GET.get("q", ""))})
+
+
+class TrendingPostsView(ListView):
+    """
+    Posts ranked by time-decayed like/comment velocity. Reads the cached
+    top list maintained by `manage.py update_trending`; nothing is scored
+    at request time.
+    """
+    template_name = "apps/posts/posts_list.html"
+    context_object_name = "posts"
+
+    def get_queryset(self):
+        return trending_posts()
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["list_title"] = "Trending"
+        ctx["liked_post_ids"] = liked_post_ids(self.request.user, [p.pk for p in ctx["posts"]])
         return ctx
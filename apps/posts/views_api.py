@@ -1,22 +1,39 @@
 from rest_framework import viewsets, permissions, filters
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
-from django.db.models import Q
+from apps.likes.services import liked_post_ids
 from .models import Post
+from .pagination import PostPagination
+from .search import search_posts
 from .serializers import PostSerializer
+from .trending import trending_posts
 from .permissions import IsAuthorOrReadOnly
 
+
+class PostOrderingFilter(filters.OrderingFilter):
+    """
+    Search results keep their relevance order unless ?ordering= is given.
+    """
+    def get_default_ordering(self, view):
+        if getattr(view, "search_query", None):
+            return None
+        return super().get_default_ordering(view)
+
+
 class PostViewSet(viewsets.ModelViewSet):
     """
     /api/posts/        GET list, POST create
     /api/posts/{id}/   GET retrieve, PUT/PATCH update (author), DELETE (author)
-    Supports: ?search=, ?ordering=, ?user=, ?active=1
+    Supports: ?q= (or ?search=) ranked full-text search, ?tag=, ?ordering=, ?user=, ?active=1
+    Paging: ?before=/?after= cursors (see `next`/`previous`), or ?page=N
     """
     serializer_class = PostSerializer
     queryset = Post.objects.select_related("user").all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
     parser_classes = [MultiPartParser, FormParser]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["title", "text", "user__email", "user__username"]
+    filter_backends = [PostOrderingFilter]
+    pagination_class = PostPagination
     ordering_fields = ["created_at", "likes_count"]
     ordering = ["-created_at"]
 
@@ -28,10 +45,28 @@ class PostViewSet(viewsets.ModelViewSet):
         active = self.request.query_params.get("active")
         if active in {"0","1","true","false"}:
             qs = qs.filter(is_active=active in {"1","true"})
-        q = self.request.query_params.get("q")
-        if q:
-            qs = qs.filter(Q(title__icontains=q) | Q(text__icontains=q))
+        tag = self.request.query_params.get("tag")
+        self.search_query = (self.request.query_params.get("q") or self.request.query_params.get("search") or "").strip()
+        if self.search_query:
+            return search_posts(qs, self.search_query, tags=[tag] if tag else None)
+        if tag:
+            qs = qs.filter(tags__slug=tag.lower())
         return qs
 
+    def get_serializer(self, *args, **kwargs):
+        """Lists get the viewer's liked ids for the whole page in the context."""
+        if args and kwargs.get("many"):
+            context = kwargs.setdefault("context", self.get_serializer_context())
+            context["liked_post_ids"] = liked_post_ids(self.request.user, [p.pk for p in args[0]])
+        return super().get_serializer(*args, **kwargs)
+
+    @action(detail=False, methods=["get"])
+    def trending(self, request):
+        """
+        /api/posts/trending/ -- top posts by decayed like/comment velocity
+        (precomputed scores, cached list).
+        """
+        return Response(self.get_serializer(trending_posts(), many=True).data)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
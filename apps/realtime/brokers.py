@@ -0,0 +1,193 @@
+"""
+Pub/sub brokers feeding the realtime event stream.
+
+publish() is synchronous and safe to call from request threads and signals;
+subscribe() is used by the async SSE view. Each connected client costs one
+small asyncio.Queue, so a worker can hold thousands of idle streams.
+
+LocalBroker fans out inside a single process (dev, tests, single-worker
+deployments). RedisBroker relays through Redis pub/sub so every worker sees
+every event; it keeps one Redis subscription per process and fans out locally.
+That subscription is supervised: when Redis drops it, the error is logged and
+the listener reconnects with backoff, re-subscribing to every channel.
+"""
+import asyncio
+import json
+import logging
+import threading
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = getattr(settings, "REALTIME_QUEUE_SIZE", 100)
+RECONNECT_MIN_SECONDS = 0.5
+RECONNECT_MAX_SECONDS = 30
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+def _offer(queue, message):
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        logger.warning("Realtime queue full, dropping event %s", message.get("event"))
+
+
+class BaseBroker:
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        """
+        Async context manager yielding an asyncio.Queue of messages for `channel`.
+        """
+        raise NotImplementedError
+
+
+class LocalBroker(BaseBroker):
+    """
+    In-process broker: subscribers are (event loop, queue) pairs per channel.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, channel, message):
+        self._deliver(channel, message)
+
+    def _deliver(self, channel, message):
+        with self._lock:
+            targets = list(self._subscribers.get(channel, ()))
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, message)
+            except RuntimeError:
+                # loop already closed; the subscriber is going away
+                pass
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+    async def _on_first_subscriber(self):
+        pass
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        await self._on_first_subscriber()
+        entry = (asyncio.get_running_loop(), asyncio.Queue(maxsize=QUEUE_SIZE))
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(entry)
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                subs = self._subscribers.get(channel)
+                if subs is not None:
+                    subs.discard(entry)
+                    if not subs:
+                        del self._subscribers[channel]
+
+
+class RedisBroker(LocalBroker):
+    """
+    Cross-process broker using Redis pub/sub (requires the `redis` package).
+    """
+    prefix = "realtime:"
+
+    def __init__(self, url=None):
+        super().__init__()
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("RedisBroker requires the 'redis' package.")
+        self.url = url or getattr(settings, "REALTIME_REDIS_URL", None) or settings.REDIS_URL
+        if not self.url:
+            raise ImproperlyConfigured("RedisBroker requires REALTIME_REDIS_URL or REDIS_URL.")
+        self._client = redis.Redis.from_url(self.url)
+        self._listener = None
+
+    def publish(self, channel, message):
+        try:
+            self._client.publish(self.prefix + channel, json.dumps(message))
+        except Exception:
+            logger.exception("Failed to publish realtime event")
+
+    async def _on_first_subscriber(self):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self):
+        """
+        Keep the Redis subscription alive for the life of the process:
+        log failures and reconnect with exponential backoff.
+        """
+        self._backoff = RECONNECT_MIN_SECONDS
+        while True:
+            try:
+                await self._relay()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Realtime Redis listener failed; reconnecting in %.1fs", self._backoff)
+            else:
+                logger.warning("Realtime Redis listener stopped; reconnecting in %.1fs", self._backoff)
+            await asyncio.sleep(self._backoff)
+            self._backoff = min(self._backoff * 2, RECONNECT_MAX_SECONDS)
+
+    async def _relay(self):
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        try:
+            # one pattern covers every live and future channel
+            await pubsub.psubscribe(self.prefix + "*")
+            self._backoff = RECONNECT_MIN_SECONDS
+            async for item in pubsub.listen():
+                if item.get("type") != "pmessage":
+                    continue
+                channel = item["channel"].decode()[len(self.prefix):]
+                try:
+                    message = json.loads(item["data"])
+                except ValueError:
+                    continue
+                self._deliver(channel, message)
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, "REALTIME_BROKER", "apps.realtime.brokers.LocalBroker")
+                _broker = import_string(path)()
+    return _broker
+
+
+def publish_to_users(user_ids, event, data):
+    """
+    Publish `event` with JSON-serializable `data` to each user's channel.
+    Never raises: realtime delivery is best effort.
+    """
+    message = {"event": event, "data": data}
+    try:
+        broker = get_broker()
+        for uid in set(user_ids):
+            broker.publish(user_channel(uid), message)
+    except Exception:
+        logger.exception("Failed to publish realtime event")
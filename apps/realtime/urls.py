@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = "realtime"
+
+urlpatterns = [
+    path("stream/", views.EventStreamView.as_view(), name="stream"),
+]
@@ -0,0 +1,46 @@
+import asyncio
+import json
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+from django.views import View
+
+from .brokers import get_broker, user_channel
+
+HEARTBEAT_SECONDS = getattr(settings, "REALTIME_HEARTBEAT_SECONDS", 20)
+
+
+def _format_event(message):
+    return f"event: {message['event']}\ndata: {json.dumps(message['data'])}\n\n"
+
+
+async def _event_stream(channel):
+    async with get_broker().subscribe(channel) as queue:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield _format_event(message)
+
+
+class EventStreamView(View):
+    """
+    Server-Sent Events stream of the current user's messages and notifications.
+    Only served under ASGI; under WSGI it answers 204 so EventSource stops
+    reconnecting and the frontend keeps polling.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return HttpResponseForbidden("Authentication required")
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(status=204)
+        response = StreamingHttpResponse(_event_stream(user_channel(user.pk)), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
@@ -5,7 +5,7 @@ from django.http import JsonResponse, HttpResponseBadRequest
 from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 
 from .models import Subscription
 
@@ -25,40 +25,37 @@ class ToggleSubscriptionView(View):
         if target == request.user:
             return HttpResponseBadRequest("Cannot subscribe to yourself")
 
-        try:
-            sub, created = Subscription.objects.get_or_create(
-                follower=request.user,
-                following=target,
-                defaults={"is_active": True}
-            )
-        except IntegrityError:
+        from apps.feed.timeline import enqueue_follow_changed
 
+        # the follow state and its timeline event commit (or roll back) together
+        with transaction.atomic():
             try:
-                sub_qs = Subscription.objects.filter(follower=request.user, following=target)
-                if sub_qs.exists():
-                    sub_qs.update(is_active=False)
-                    following = False
-                else:
-                    following = False
-            except Exception:
-                return HttpResponseBadRequest("DB error")
-        else:
-            if not created:
+                sub, created = Subscription.objects.get_or_create(
+                    follower=request.user,
+                    following=target,
+                    defaults={"is_active": True}
+                )
+            except IntegrityError:
+                Subscription.objects.filter(follower=request.user, following=target).update(is_active=False)
+                following = False
+            else:
+                if not created:
+
+                    sub.is_active = not sub.is_active
+                    sub.save(update_fields=["is_active", "updated_at"])
+                following = bool(sub.is_active)
 
-                sub.is_active = not sub.is_active
-                sub.save(update_fields=["is_active", "updated_at"])
-            following = bool(sub.is_active)
+            enqueue_follow_changed(request.user, target)
 
         followers_count = Subscription.objects.filter(following=target, is_active=True).count()
 
         if following:
             try:
-                from apps.notifications.services import create_notification
-                create_notification(
-                    recipient=target,
+                from apps.notifications.services import enqueue_notification
+                enqueue_notification(
+                    target,
                     actor=request.user,
                     verb="started following you",
-                    target=request.user,
                     data={"follower_id": request.user.pk, "follower_username": request.user.username}
                 )
             except Exception:
@@ -12,6 +12,7 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     birthday = models.DateField(null=True, blank=True)
     avatar = models.ImageField("avatar", upload_to="avatars/", null=True, blank=True)
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from apps.core.images import enqueue_variants, needs_variants
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    if needs_variants(instance, "avatar"):
+        enqueue_variants(instance, "avatar")
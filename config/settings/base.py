@@ -37,8 +37,10 @@ INSTALLED_APPS = [
     "apps.comments",
     "apps.likes",
     "apps.subscriptions",
+    "apps.feed",
     "apps.messaging",
     "apps.notifications",
+    "apps.realtime",
 ]
 
 MIDDLEWARE = [
@@ -69,11 +71,9 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
 
-                "apps.messaging.context_processors.messaging_notifications",
-                "apps.messaging.context_processors.unread_messages_count",
-                "apps.notifications.context_processors.notifications_for_nav"
-
-            ],        },
+                "apps.core.context_processors.nav_state",
+            ],
+        },
     }
 ]
 
@@ -139,6 +139,100 @@ DATABASES = {
     }
 }
 
+# ---------------------------------------------------------------------
+# Cache (local memory by default; set REDIS_URL to share it between workers)
+# ---------------------------------------------------------------------
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+NAV_STATE_CACHE_TIMEOUT = int(os.getenv("NAV_STATE_CACHE_TIMEOUT", "300"))
+READ_RECEIPT_FLUSH_INTERVAL = int(os.getenv("READ_RECEIPT_FLUSH_INTERVAL", "30"))
+READ_RECEIPT_FLUSH_THRESHOLD = 200
+MESSAGE_ARCHIVE_AFTER_DAYS = int(os.getenv("MESSAGE_ARCHIVE_AFTER_DAYS", "365"))
+
+# ---------------------------------------------------------------------
+# Realtime (SSE stream; served only under ASGI, e.g. uvicorn config.asgi:application)
+# ---------------------------------------------------------------------
+REALTIME_BROKER = os.getenv("REALTIME_BROKER", "apps.realtime.brokers.LocalBroker")
+REALTIME_HEARTBEAT_SECONDS = int(os.getenv("REALTIME_HEARTBEAT_SECONDS", "20"))
+REALTIME_QUEUE_SIZE = 100
+
+# ---------------------------------------------------------------------
+# Transactional outbox (drained by `manage.py run_outbox_worker`)
+# ---------------------------------------------------------------------
+OUTBOX_HANDLERS = {
+    "notifications.notify": "apps.notifications.services.handle_notify_event",
+    "notifications.post_liked": "apps.notifications.services.handle_post_liked",
+    "feed.post_created": "apps.feed.timeline.handle_post_created",
+    "feed.follow_changed": "apps.feed.timeline.handle_follow_changed",
+    "images.variants": "apps.core.images.handle_variants_event",
+}
+# Jobs run_outbox_worker also runs every N seconds
+OUTBOX_PERIODIC_TASKS = {
+    "apps.messaging.receipts.flush": READ_RECEIPT_FLUSH_INTERVAL,
+}
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETENTION_HOURS = 72
+OUTBOX_DEAD_LETTER_RETENTION_DAYS = 30
+
+# Notifications with these verbs merge per (recipient, verb, target) while unread
+NOTIFICATION_AGGREGATE_VERBS = ("liked your post", "commented on your post", "started following you")
+NOTIFICATION_AGGREGATION_WINDOW = int(os.getenv("NOTIFICATION_AGGREGATION_WINDOW", str(24 * 3600)))
+NOTIFICATIONS_LONG_POLL_MAX_SECONDS = 25
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "90"))
+NOTIFICATION_MAX_PER_USER = int(os.getenv("NOTIFICATION_MAX_PER_USER", "500"))
+
+# "Travel" and "travel" are one tag; TagStat keeps per-tag active post counts
+TAGGIT_CASE_INSENSITIVE = True
+TAG_CACHE_TIMEOUT = 300
+
+# Trending: likes/comments decay with this half-life (manage.py update_trending)
+TRENDING_HALF_LIFE_HOURS = 12
+TRENDING_WEIGHTS = {"like": 1.0, "comment": 3.0}
+TRENDING_CACHE_TIMEOUT = 120
+TRENDING_LATE_WINDOW_SECONDS = 600  # how long ids skipped by update_trending are re-checked
+TRENDING_LIKE_DEDUPE_HOURS = 48  # unlike + like again within this window counts once
+
+# COUNT(*) results behind numbered pages are cached this many seconds
+PAGINATION_COUNT_CACHE_TIMEOUT = 60
+
+# Rendered post cards; keys embed updated_at and likes_count, so entries never go stale
+POST_CARD_CACHE_TIMEOUT = 24 * 3600
+
+# Cached liked-post sets: exact ids up to LIKED_SET_MAX_IDS likes, a Bloom filter above
+LIKED_SET_MAX_IDS = 5000
+LIKED_SET_FALSE_POSITIVE_RATE = 0.01
+LIKED_SET_CACHE_TIMEOUT = 6 * 3600
+
+# Comments: top-level threads per page, replies inlined per thread, replies per "show more"
+COMMENT_THREADS_PAGE_SIZE = 20
+COMMENT_INLINE_REPLIES = 3
+COMMENT_REPLIES_PAGE_SIZE = 50
+
+# Derivatives of uploaded images (longest edge in px), rendered by the outbox worker
+IMAGE_VARIANTS = {"thumb": 160, "card": 600, "full": 1600}
+IMAGE_VARIANT_FORMATS = ("webp", "jpeg")
+IMAGE_VARIANT_QUALITY = 82
+
+# Home timeline: fan-out on write up to FEED_FANOUT_MAX_FOLLOWERS followers, on read above
+FEED_TIMELINE_DEPTH = 800
+FEED_TIMELINE_TRIM_SLACK = 50  # reading a timeline trims it once it is this far past the depth
+FEED_FANOUT_BATCH_SIZE = 1000
+FEED_FANOUT_MAX_FOLLOWERS = int(os.getenv("FEED_FANOUT_MAX_FOLLOWERS", "5000"))
+FEED_BACKFILL_POSTS = 50
+
 # ---------------------------------------------------------------------
 # DRF
 # ---------------------------------------------------------------------
@@ -17,11 +17,13 @@ urlpatterns = [
     path("", include("apps.core.urls", namespace="core")),
     path("users/", include("apps.users.urls", namespace="users")),
     path("posts/", include("apps.posts.urls", namespace="posts")),
+    path("feed/", include("apps.feed.urls", namespace="feed")),
     path("comments/", include("apps.comments.urls", namespace="comments")),
     path("likes/", include("apps.likes.urls", namespace="likes")),
     path("subscriptions/", include("apps.subscriptions.urls", namespace="subscriptions")),
     path("messages/", include("apps.messaging.urls", namespace="messages")),
     path("notifications/", include("apps.notifications.urls", namespace="notifications")),
+    path("realtime/", include("apps.realtime.urls", namespace="realtime")),
 
     path("api/", include(router.urls)),
 ]
@@ -7,6 +7,7 @@
  * - Delegated submit handler for the create form (works if form is re-rendered)
  * - Delegated click handler for reply links
  * - Delegated submit handler for delete forms (confirmation + double-submit protection)
+ * - Delegated click handlers for "Load more comments" / "Show more replies" (cursor-paged JSON)
  * - Robust handling of server responses: 200 JSON, 400 validation JSON, 403 forbidden, non-JSON -> reload
  * - Prevents duplicate listener initialization via data attribute on <body>
  */
@@ -127,7 +128,9 @@ async function handleCommentCreateSubmit(form) {
     // handle JSON payload
     if (json && json.status === 'ok') {
       if (json.html) {
-        const list = document.getElementById('comments-list');
+        // replies go to the end of their thread, top-level comments to the list
+        const list = (json.parent_id && document.getElementById('replies-' + json.thread_id))
+          || document.getElementById('comments-list');
         if (list) {
           list.insertAdjacentHTML('beforeend', json.html);
         } else {
@@ -185,6 +188,53 @@ function handleReplyClick(e) {
   if (ta) ta.focus();
 }
 
+/**
+ * Fetch the next cursor page behind a "load more" button and append its html.
+ * The button carries data-url and data-after; it is removed on the last page.
+ * @param {HTMLButtonElement} btn
+ * @param {HTMLElement} target container receiving the html
+ */
+async function loadMore(btn, target) {
+  if (!btn || !target || btn.disabled) return;
+  btn.disabled = true;
+  try {
+    const url = new URL(btn.dataset.url, window.location.origin);
+    if (btn.dataset.after) url.searchParams.set('after', btn.dataset.after);
+    const resp = await fetch(url, {
+      headers: { 'X-Requested-With': 'XMLHttpRequest' },
+      credentials: 'same-origin'
+    });
+    if (!resp.ok) throw new Error('HTTP ' + resp.status);
+    const json = await resp.json();
+    target.insertAdjacentHTML('beforeend', json.html || '');
+    if (json.next) {
+      btn.dataset.after = json.next;
+      btn.disabled = false;
+    } else {
+      btn.remove();
+    }
+  } catch (err) {
+    console.error('Load more error:', err);
+    btn.disabled = false;
+  }
+}
+
+/**
+ * Delegated click handler for "Load more comments" and "Show more replies".
+ * @param {MouseEvent} e
+ */
+function handleLoadMoreClick(e) {
+  const more = e.target.closest('#load-more-comments');
+  if (more) {
+    loadMore(more, document.getElementById('comments-list'));
+    return;
+  }
+  const replies = e.target.closest('.load-more-replies');
+  if (replies) {
+    loadMore(replies, document.getElementById(replies.dataset.target));
+  }
+}
+
 /**
  * Delegated submit handler for delete forms.
  * Shows confirm dialog and prevents double submit.
@@ -240,4 +290,5 @@ document.addEventListener('DOMContentLoaded', function () {
 
   // Delegated click for reply links
   document.body.addEventListener('click', handleReplyClick);
+  document.body.addEventListener('click', handleLoadMoreClick);
 });
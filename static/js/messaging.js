@@ -2,8 +2,23 @@
  * Minimal JS for sending messages via AJAX.
  * - Prevents double-submits
  * - Adds new message to #messages-list on success (simple optimistic approach)
+ * - "Load older messages" fetches history pages by cursor and prepends them
  */
 document.addEventListener('DOMContentLoaded', function () {
+  const list = document.getElementById('messages-list');
+  const olderBtn = document.getElementById('load-older');
+  if (list && olderBtn) {
+    olderBtn.addEventListener('click', () => loadOlder(list, olderBtn));
+  }
+  if (list) {
+    document.addEventListener('realtime:message', (e) => {
+      const m = e.detail;
+      if (!m || String(m.conversation_id) !== list.dataset.conversationId) return;
+      list.appendChild(renderMessage(m));
+      list.scrollTop = list.scrollHeight;
+    });
+  }
+
   const form = document.getElementById('message-send-form');
   if (!form) return;
 
@@ -58,3 +73,71 @@ document.addEventListener('DOMContentLoaded', function () {
     }
   });
 });
+
+function formatMessageDate(iso) {
+  const d = new Date(iso);
+  const pad = n => String(n).padStart(2, '0');
+  return `${pad(d.getDate())}.${pad(d.getMonth() + 1)}.${d.getFullYear()} ${pad(d.getHours())}:${pad(d.getMinutes())}`;
+}
+
+function renderMessage(m) {
+  const row = document.createElement('div');
+  row.className = m.is_mine
+    ? 'd-flex justify-content-end align-items-end message-row'
+    : 'd-flex align-items-start message-row';
+
+  const meta = document.createElement('div');
+  const bubble = document.createElement('div');
+  bubble.className = 'message-bubble ' + (m.is_mine ? 'message-me' : 'message-other');
+  if (m.is_deleted) {
+    bubble.innerHTML = '<em class="text-muted">Message removed</em>';
+  } else {
+    bubble.style.whiteSpace = 'pre-line';
+    bubble.textContent = m.content;
+  }
+
+  if (m.is_mine) {
+    meta.className = 'message-meta text-end me-2';
+    meta.innerHTML = '<small class="text-muted d-block">You</small><small class="text-muted"></small>';
+    meta.lastChild.textContent = formatMessageDate(m.created_at);
+    row.append(meta, bubble);
+  } else {
+    meta.className = 'message-meta mb-1';
+    meta.innerHTML = '<strong class="sender-name"></strong><div class="small text-muted"></div>';
+    meta.firstChild.textContent = m.sender_name;
+    meta.lastChild.textContent = formatMessageDate(m.created_at);
+    const body = document.createElement('div');
+    body.append(meta, bubble);
+    row.append(body);
+  }
+  return row;
+}
+
+async function loadOlder(list, btn) {
+  if (btn.dataset.busy === '1') return;
+  btn.dataset.busy = '1';
+  const url = new URL(list.dataset.historyUrl, window.location.origin);
+  url.searchParams.set('before', btn.dataset.cursor);
+  try {
+    const resp = await fetch(url, {
+      headers: { 'X-Requested-With': 'XMLHttpRequest' },
+      credentials: 'same-origin'
+    });
+    if (!resp.ok) return;
+    const json = await resp.json();
+    const wrapper = document.getElementById('load-older-wrapper');
+    const anchor = wrapper ? wrapper.nextSibling : list.firstChild;
+    const prevHeight = list.scrollHeight;
+    (json.messages || []).forEach(m => list.insertBefore(renderMessage(m), anchor));
+    list.scrollTop += list.scrollHeight - prevHeight;
+    if (json.older_cursor) {
+      btn.dataset.cursor = json.older_cursor;
+    } else if (wrapper) {
+      wrapper.remove();
+    }
+  } catch (err) {
+    console.error(err);
+  } finally {
+    btn.dataset.busy = '0';
+  }
+}
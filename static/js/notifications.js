@@ -5,14 +5,21 @@
   }
   const csrftoken = getCookie('csrftoken');
 
+  // state version of the last rendered payload; the server answers
+  // {changed: false} without touching the DB while it still matches
+  let version = null;
+
   async function fetchRecent() {
     try {
-      const resp = await fetch('/notifications/recent/', {
+      const url = '/notifications/recent/' + (version ? '?since=' + encodeURIComponent(version) : '');
+      const resp = await fetch(url, {
         headers: { 'X-Requested-With': 'XMLHttpRequest' },
         credentials: 'same-origin'
       });
       if (!resp.ok) return;
       const json = await resp.json();
+      if (json.changed === false) return;
+      version = json.version || null;
       updateDropdown(json.items || [], json.unread_count || 0);
     } catch (e) {
       console.error('notifications fetch failed', e);
@@ -42,8 +49,10 @@
       a.className = 'dropdown-item notification-item' + (it.unread ? ' fw-bold' : '');
       a.dataset.id = it.id;
       const time = new Date(it.created_at);
+      const others = (it.actor_count || 0) - 1;
+      const who = it.actor ? it.actor + (others > 0 ? ` and ${others} other${others > 1 ? 's' : ''}` : '') + ' ' : '';
       a.innerHTML = `<div><small class="text-muted">${time.toLocaleString()}</small></div>
-                     <div>${it.actor ? it.actor + ' ' : ''}${it.verb}</div>`;
+                     <div>${who}${it.verb}</div>`;
       list.appendChild(a);
     });
   }
@@ -107,9 +116,15 @@
     }
   });
 
-  // start polling every 30s and also fetch on DOM load
+  // realtime push: refresh the dropdown as soon as a notification arrives
+  document.addEventListener('realtime:notification', fetchRecent);
+
+  // poll every 30s (skipped while the realtime stream is connected) and also fetch on DOM load
   document.addEventListener('DOMContentLoaded', function(){
     fetchRecent();
-    setInterval(fetchRecent, 30000);
+    setInterval(function(){
+      if (window.chattyRealtime && window.chattyRealtime.connected) return;
+      fetchRecent();
+    }, 30000);
   });
 })();
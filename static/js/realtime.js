@@ -0,0 +1,27 @@
+/**
+ * Opens one Server-Sent Events stream per page (authenticated users only) and
+ * re-dispatches server events as DOM events: `realtime:message`,
+ * `realtime:notification`. window.chattyRealtime.connected tells the polling
+ * code in notifications.js whether it can back off.
+ */
+(function () {
+  const state = { connected: false };
+  window.chattyRealtime = state;
+
+  document.addEventListener('DOMContentLoaded', function () {
+    const url = document.body.dataset.realtimeUrl;
+    if (!url || !window.EventSource) return;
+
+    const source = new EventSource(url, { withCredentials: true });
+    source.addEventListener('open', () => { state.connected = true; });
+    source.addEventListener('error', () => { state.connected = source.readyState === EventSource.OPEN; });
+
+    ['message', 'notification'].forEach(name => {
+      source.addEventListener(name, (e) => {
+        let detail = null;
+        try { detail = JSON.parse(e.data); } catch (err) { return; }
+        document.dispatchEvent(new CustomEvent('realtime:' + name, { detail }));
+      });
+    });
+  });
+})();
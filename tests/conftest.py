@@ -0,0 +1,31 @@
+import pytest
+from django.core.cache import cache
+from django.test import Client
+from apps.users.models import User
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def login():
+    """login(user) -> a Client signed in as `user` (password "pass123")."""
+    def _login(user):
+        client = Client()
+        client.login(email=user.email, password="pass123")
+        return client
+    return _login
+
+
+@pytest.fixture
+def alice():
+    return User.objects.create_user(username="alice", email="alice@example.com", password="pass123")
+
+
+@pytest.fixture
+def bob():
+    return User.objects.create_user(username="bob", email="bob@example.com", password="pass123")
@@ -0,0 +1,129 @@
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from apps.comments import threads
+from apps.comments.models import Comment
+from apps.posts.models import Post
+from apps.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(username="reader", email="reader@example.com", password="pass123")
+
+
+@pytest.fixture
+def post(user):
+    return Post.objects.create(user=user, title="Discussed", text="x")
+
+
+def comment(post, user, parent=None, text="hi"):
+    return Comment.objects.create(post=post, user=user, parent=parent, content=text)
+
+
+def test_paths_depth_and_counters(post, user):
+    root = comment(post, user)
+    reply = comment(post, user, parent=root)
+    nested = comment(post, user, parent=reply)
+    other = comment(post, user)
+
+    nested.refresh_from_db()
+    assert nested.path == root.path + threads.encode_segment(reply.pk) + threads.encode_segment(nested.pk)
+    assert (nested.depth, nested.thread_id) == (2, root.pk)
+    root.refresh_from_db()
+    assert root.replies_count == 2 and root.thread_id == root.pk
+    post.refresh_from_db()
+    assert post.comments_count == 4
+
+    other.is_active = False
+    other.save(update_fields=["is_active"])
+    nested.delete()
+    post.refresh_from_db()
+    root.refresh_from_db()
+    assert post.comments_count == 2 and root.replies_count == 1
+
+    # only active replies are counted
+    removed = comment(post, user, parent=root)
+    removed.is_active = False
+    removed.save(update_fields=["is_active"])
+    root.refresh_from_db()
+    assert root.replies_count == 1
+    removed.delete()
+    root.refresh_from_db()
+    assert root.replies_count == 1
+
+    Comment.objects.update(path="", depth=0, thread=None, replies_count=0)
+    Post.objects.update(comments_count=0)
+    Comment.objects.create(user=user, post=post, parent=root, content="hidden", is_active=False)
+    threads.rebuild()
+    reply.refresh_from_db()
+    root.refresh_from_db()
+    post.refresh_from_db()
+    assert (reply.path, reply.depth, reply.thread_id) == (root.path + threads.encode_segment(reply.pk), 1, root.pk)
+    assert post.comments_count == 2 and root.replies_count == 1
+
+
+def test_thread_pages_inline_first_replies_and_page_the_rest(post, user):
+    roots = [comment(post, user, text=f"root {i}") for i in range(3)]
+    replies = [comment(post, user, parent=roots[0], text=f"reply {i}") for i in range(5)]
+    deep = comment(post, user, parent=replies[0], text="deep")
+    lone = comment(post, user, parent=roots[1], text="lone")
+
+    page, cursor = threads.thread_page(post, limit=2, inline=2)
+    assert [t.pk for t in page] == [roots[0].pk, roots[1].pk]
+    assert [r.pk for r in page[0].inline_replies] == [replies[0].pk, deep.pk]  # tree order
+    assert page[0].more_replies == 4
+    assert [r.pk for r in page[1].inline_replies] == [lone.pk]  # fewer than `inline`
+    assert page[1].more_replies == 0
+    rest, _ = threads.thread_page(post, after=cursor, limit=2)
+    assert [t.pk for t in rest] == [roots[2].pk]
+
+    client = Client()
+    data = client.get(f"/comments/{roots[0].pk}/replies/", {"after": page[0].replies_cursor}).json()
+    assert [r["id"] for r in data["replies"]] == [r.pk for r in replies[1:]]
+    assert data["next"] is None
+
+    data = client.get(f"/comments/post/{post.pk}/threads/").json()
+    assert [t["id"] for t in data["threads"]] == [r.pk for r in roots]
+    assert data["threads"][0]["more_replies"] == 6 - threads.INLINE_REPLIES
+
+    # removed replies aren't announced as more to load
+    for removed in (replies[0], replies[4]):
+        removed.is_active = False
+        removed.save(update_fields=["is_active"])
+    page, _ = threads.thread_page(post, limit=1, inline=2)
+    assert [r.pk for r in page[0].inline_replies] == [replies[0].pk, deep.pk]  # placeholder kept in the tree
+    assert page[0].more_replies == 3
+
+
+def test_detail_page_queries_do_not_grow_with_comments(post, user):
+    def detail_queries():
+        with CaptureQueriesContext(connection) as ctx:
+            assert Client().get(f"/posts/{post.pk}/").status_code == 200
+        return len(ctx.captured_queries)
+
+    root = comment(post, user)
+    comment(post, user, parent=root)
+    few = detail_queries()
+    for _ in range(30):
+        r = comment(post, user)
+        for _ in range(4):
+            comment(post, user, parent=r)
+    assert detail_queries() == few
+
+
+def test_reply_via_form_lands_in_its_thread(post, user, login):
+    root = comment(post, user)
+    client = login(user)
+    resp = client.post(f"/comments/add/{post.pk}/", {"content": "agreed", "parent": root.pk},
+                       HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+    assert resp.json()["thread_id"] == root.pk
+
+    other = Post.objects.create(user=user, title="Other", text="x")
+    resp = client.post(f"/comments/add/{other.pk}/", {"content": "lost", "parent": root.pk},
+                       HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+    assert resp.status_code == 400
+    assert "agreed" in client.get(f"/posts/{post.pk}/").content.decode()
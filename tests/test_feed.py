@@ -0,0 +1,99 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from apps.users.models import User
+from apps.posts.models import Post
+from apps.feed import timeline
+from apps.feed.models import TimelineEntry
+
+pytestmark = pytest.mark.django_db
+
+
+def work():
+    call_command("run_outbox_worker", "--once", "--allow-local-backends", stdout=StringIO())
+
+
+def test_follow_backfills_fan_out_and_unfollow(alice, bob, login):
+    old = Post.objects.create(user=bob, title="old", text="x")
+    client = login(alice)
+    client.post(f"/subscriptions/toggle/{bob.pk}/")
+    work()
+    assert list(TimelineEntry.objects.filter(user=alice).values_list("post_id", flat=True)) == [old.pk]
+
+    new = Post.objects.create(user=bob, title="new", text="x")
+    Post.objects.create(user=alice, title="mine", text="x")  # not in my own following feed
+    work()
+    resp = client.get("/feed/")
+    assert [p.pk for p in resp.context["posts"]] == [new.pk, old.pk]
+
+    client.post(f"/subscriptions/toggle/{bob.pk}/")
+    work()
+    assert not TimelineEntry.objects.filter(user=alice).exists()
+
+
+def test_timeline_pages_and_merges_pull_authors(alice, bob, monkeypatch):
+    from apps.subscriptions.models import Subscription
+
+    carol = User.objects.create_user(username="carol", email="carol@example.com", password="pass123")
+    Subscription.objects.create(follower=alice, following=bob)
+    Subscription.objects.create(follower=alice, following=carol)
+    for i in range(3):
+        timeline.fan_out(Post.objects.create(user=bob, title=f"b{i}", text="x"))
+    carol_posts = [Post.objects.create(user=carol, title=f"c{i}", text="x") for i in range(2)]
+
+    monkeypatch.setattr(timeline, "FANOUT_MAX_FOLLOWERS", 0)  # everyone is now served on read
+    assert timeline.fan_out(carol_posts[0]) == 0
+
+    seen, cursor = [], None
+    while True:
+        posts, cursor = timeline.home_timeline(alice, before=cursor, limit=2)
+        seen += [p.title for p in posts]
+        if not cursor:
+            break
+    assert seen == ["c1", "c0", "b2", "b1", "b0"]
+
+
+def test_trim_keeps_newest_entries(alice, bob):
+    from apps.subscriptions.models import Subscription
+
+    Subscription.objects.create(follower=alice, following=bob)
+    for i in range(5):
+        timeline.fan_out(Post.objects.create(user=bob, title=f"b{i}", text="x"))
+    out = StringIO()
+    call_command("trim_timelines", "--depth=3", stdout=out)
+    assert "Removed 2 timeline entries from 1 timeline(s)." in out.getvalue()
+    titles = TimelineEntry.objects.filter(user=alice).order_by("-created_at").values_list("post__title", flat=True)
+    assert list(titles) == ["b4", "b3", "b2"]
+
+
+def test_reading_trims_overgrown_timelines(alice, bob, monkeypatch):
+    from apps.subscriptions.models import Subscription
+
+    monkeypatch.setattr(timeline, "TIMELINE_DEPTH", 3)
+    monkeypatch.setattr(timeline, "TRIM_SLACK", 1)
+    Subscription.objects.create(follower=alice, following=bob)
+    for i in range(4):
+        timeline.fan_out(Post.objects.create(user=bob, title=f"b{i}", text="x"))
+    timeline.home_timeline(alice)
+    assert TimelineEntry.objects.filter(user=alice).count() == 4  # within the slack
+
+    timeline.fan_out(Post.objects.create(user=bob, title="b4", text="x"))
+    posts, _ = timeline.home_timeline(alice)
+    assert [p.title for p in posts] == ["b4", "b3", "b2"]
+    titles = TimelineEntry.objects.filter(user=alice).order_by("-created_at").values_list("post__title", flat=True)
+    assert list(titles) == ["b4", "b3", "b2"]
+
+
+def test_toggle_rolls_back_when_event_cannot_be_recorded(alice, bob, monkeypatch, login):
+    from apps.subscriptions.models import Subscription
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("outbox unavailable")
+
+    monkeypatch.setattr(timeline, "enqueue_follow_changed", broken)
+    client = login(alice)
+    client.raise_request_exception = False
+    resp = client.post(f"/subscriptions/toggle/{bob.pk}/")
+    assert resp.status_code == 500
+    assert not Subscription.objects.filter(follower=alice, following=bob).exists()
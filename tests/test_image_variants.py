@@ -0,0 +1,127 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from PIL import Image
+from apps.core.images import variant_url
+from apps.core.models import OutboxEvent
+from apps.posts.models import Post
+from apps.posts.serializers import PostSerializer
+from apps.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def upload(name="photo.png", size=(2400, 1600), mode="RGBA"):
+    buf = BytesIO()
+    Image.new(mode, size, (200, 30, 30, 255)[:len(mode)]).save(buf, "PNG")
+    return SimpleUploadedFile(name, buf.getvalue(), content_type="image/png")
+
+
+@pytest.fixture
+def author():
+    return User.objects.create_user(username="author", email="author@example.com", password="pass123")
+
+
+def test_upload_queues_job_and_worker_renders_variants(author, media_root):
+    post = Post.objects.create(user=author, title="Photo", text="x", image=upload())
+    assert OutboxEvent.objects.filter(topic="images.variants", processed_at__isnull=True).count() == 1
+    assert variant_url(post.image, "card") == post.image.url  # original until rendered
+
+    call_command("run_outbox_worker", "--once", "--allow-local-backends")
+    post.refresh_from_db()
+
+    variants = post.image_variants
+    assert variants["source"] == post.image.name
+    assert (variants["thumb"]["width"], variants["card"]["width"], variants["full"]["width"]) == (160, 600, 1600)
+    for variant in ("thumb", "card", "full"):
+        for fmt in ("webp", "jpeg"):
+            assert (media_root / variants[variant][fmt]).exists()
+    with Image.open(media_root / variants["card"]["jpeg"]) as img:
+        assert img.format == "JPEG" and img.mode == "RGB"
+
+    html = Template('{% load images %}{% picture post.image "card" alt="p" %}').render(Context({"post": post}))
+    assert 'type="image/webp"' in html and variants["card"]["jpeg"] in html and 'width="600"' in html
+
+    data = PostSerializer(post).data
+    assert data["image_card"].endswith(variants["card"]["jpeg"])
+    assert set(data["image_variants"]) == {"thumb", "card", "full"}
+
+
+def test_replacing_and_clearing_image_drops_old_variants(author, media_root):
+    post = Post.objects.create(user=author, title="Photo", text="x", image=upload("a.png"))
+    call_command("run_outbox_worker", "--once", "--allow-local-backends")
+    post.refresh_from_db()
+    old_card = media_root / post.image_variants["card"]["webp"]
+
+    post.image = upload("b.png", size=(300, 200), mode="RGB")
+    post.save()
+    call_command("run_outbox_worker", "--once", "--allow-local-backends")
+    post.refresh_from_db()
+    assert not old_card.exists()
+    assert post.image_variants["source"] == post.image.name
+    assert post.image_variants["full"]["width"] == 300  # never upscaled
+
+    new_card = media_root / post.image_variants["card"]["webp"]
+    post.image = None
+    post.save()
+    call_command("run_outbox_worker", "--once", "--allow-local-backends")
+    post.refresh_from_db()
+    assert post.image_variants == {}
+    assert not new_card.exists()
+
+
+def test_same_stem_sources_keep_separate_variants(author, media_root):
+    png = Post.objects.create(user=author, title="png", text="x", image=upload("photo.png"))
+    buf = BytesIO()
+    Image.new("RGB", (800, 600), (0, 0, 200)).save(buf, "JPEG")
+    jpg = Post.objects.create(
+        user=author, title="jpg", text="x", image=SimpleUploadedFile("photo.jpg", buf.getvalue(), "image/jpeg")
+    )
+    # a file at the jpg's variant path that no instance owns
+    stray = media_root / "posts" / "img" / "variants" / "photo.jpg.card.webp"
+    stray.parent.mkdir(parents=True, exist_ok=True)
+    stray.write_bytes(b"not ours")
+
+    call_command("run_outbox_worker", "--once", "--allow-local-backends")
+    png.refresh_from_db()
+    jpg.refresh_from_db()
+    png_card, jpg_card = png.image_variants["card"]["webp"], jpg.image_variants["card"]["webp"]
+    assert png_card != jpg_card
+    assert (media_root / png_card).exists() and (media_root / jpg_card).exists()
+    assert stray.read_bytes() == b"not ours"
+
+
+def test_avatar_variants_and_backfill_command(author, media_root):
+    User.objects.filter(pk=author.pk).update(avatar="avatars/missing.png")  # no save signal, no job
+    author.avatar = upload("me.png", size=(500, 500), mode="RGB")
+    author.save()
+    OutboxEvent.objects.all().delete()
+
+    call_command("generate_image_variants")
+    author.refresh_from_db()
+    assert author.avatar_variants["thumb"]["width"] == 160
+    assert variant_url(author.avatar, "thumb").endswith("me.png.thumb.jpg")
+
+
+def test_forced_backfill_rerenders_in_place(author, media_root):
+    author.avatar = upload("me.png", size=(500, 500), mode="RGB")
+    author.save()
+    call_command("run_outbox_worker", "--once", "--allow-local-backends")
+    author.refresh_from_db()
+    before = author.avatar_variants
+    variants_dir = media_root / "avatars" / "variants"
+    assert len(list(variants_dir.iterdir())) == 6
+
+    call_command("generate_image_variants", "--force")
+    author.refresh_from_db()
+    assert author.avatar_variants == before
+    assert len(list(variants_dir.iterdir())) == 6
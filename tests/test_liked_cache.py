@@ -0,0 +1,117 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from apps.likes import cache as liked_cache
+from apps.likes.models import Like
+from apps.likes.services import has_liked, liked_post_ids
+from apps.posts.models import Post
+from apps.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def shared_cache(monkeypatch):
+    # LocMem stands in for a shared cache in these tests
+    monkeypatch.setattr(liked_cache, "SHARED", True)
+
+
+@pytest.fixture
+def fan():
+    return User.objects.create_user(username="fan", email="fan@example.com", password="pass123")
+
+
+@pytest.fixture
+def posts():
+    author = User.objects.create_user(username="author", email="author@example.com", password="pass123")
+    return [Post.objects.create(user=author, title=f"p{i}", text="x") for i in range(6)]
+
+
+def test_liked_set_loaded_once_then_answers_without_queries(fan, posts):
+    Like.objects.create(user=fan, post=posts[0])
+    ids = [p.pk for p in posts]
+    assert liked_post_ids(fan, ids) == {posts[0].pk}
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert liked_post_ids(fan, ids) == {posts[0].pk}
+        assert has_liked(fan, posts[0].pk) and not has_liked(fan, posts[1].pk)
+    assert len(ctx.captured_queries) == 0
+
+
+def test_toggle_like_updates_cached_set_in_place(fan, posts, login, django_capture_on_commit_callbacks):
+    client = login(fan)
+    post = posts[0]
+    assert not has_liked(fan, post.pk)  # warm the cache
+
+    with django_capture_on_commit_callbacks(execute=True):
+        resp = client.post(f"/likes/{post.pk}/like/", HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+    assert resp.json()["action"] == "liked"
+    with CaptureQueriesContext(connection) as ctx:
+        assert has_liked(fan, post.pk)
+    assert len(ctx.captured_queries) == 0  # the cached set got the id, no rebuild
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post(f"/likes/{post.pk}/like/", HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+    with CaptureQueriesContext(connection) as ctx:
+        assert not has_liked(fan, post.pk)
+    assert len(ctx.captured_queries) == 0
+
+
+def test_concurrent_update_falls_back_to_invalidation(fan, posts, django_capture_on_commit_callbacks):
+    assert not has_liked(fan, posts[0].pk)  # warm the cache
+    cache.add(liked_cache._lock_key(fan.pk), 1)  # another process is updating the entry
+    with django_capture_on_commit_callbacks(execute=True):
+        Like.objects.create(user=fan, post=posts[0])
+    assert cache.get(liked_cache._key(fan.pk)) is None
+    assert has_liked(fan, posts[0].pk)
+
+
+def test_heavy_likers_get_bloom_filter_with_exact_fallback(fan, posts, monkeypatch, django_capture_on_commit_callbacks):
+    monkeypatch.setattr(liked_cache, "MAX_IDS", 2)
+    liked = posts[:4]
+    for p in liked:
+        Like.objects.create(user=fan, post=p)
+
+    assert isinstance(liked_cache.liked_set(fan.pk), liked_cache.BloomFilter)
+    assert liked_post_ids(fan, [p.pk for p in posts]) == {p.pk for p in liked}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Like.objects.filter(user=fan, post=liked[0]).delete()
+    assert not has_liked(fan, liked[0].pk)  # stale filter bit, exact check says no
+
+
+def test_build_racing_a_commit_is_not_served(fan, posts, monkeypatch):
+    post = posts[0]
+    build = liked_cache._build
+
+    def racing_build(user_id):
+        entry = build(user_id)  # read before the like below commits
+        Like.objects.create(user=fan, post=post)
+        liked_cache.forget(user_id)  # the like's on_commit hook: nothing cached yet to update
+        return entry
+
+    monkeypatch.setattr(liked_cache, "_build", racing_build)
+    assert not has_liked(fan, post.pk)
+    monkeypatch.setattr(liked_cache, "_build", build)
+    assert has_liked(fan, post.pk)
+
+
+def test_process_local_cache_is_not_trusted(fan, posts, monkeypatch):
+    monkeypatch.setattr(liked_cache, "SHARED", False)
+    assert not has_liked(fan, posts[0].pk)
+    # liked through another process: no invalidation reaches this one
+    Like.objects.create(user=fan, post=posts[0])
+    assert has_liked(fan, posts[0].pk)
+
+
+def test_api_liked_by_me(fan, posts, login, monkeypatch, django_assert_max_num_queries):
+    monkeypatch.setattr(liked_cache, "MAX_IDS", 0)  # Bloom filter: hits need the exact check
+    Like.objects.create(user=fan, post=posts[1])
+    client = login(fan)
+    client.get("/api/posts/")
+    with django_assert_max_num_queries(5):  # session, user, count, page, one liked lookup
+        results = client.get("/api/posts/").json()["results"]
+    assert {r["id"] for r in results if r["liked_by_me"]} == {posts[1].pk}
+    assert not any(r["liked_by_me"] for r in Client().get("/api/posts/").json()["results"])
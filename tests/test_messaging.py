@@ -0,0 +1,289 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from apps.users.models import User
+from apps.messaging.models import Conversation, Participant, Message
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def conversation(alice, bob):
+    conv = Conversation.objects.create()
+    Participant.objects.create(conversation=conv, user=alice)
+    Participant.objects.create(conversation=conv, user=bob)
+    return conv
+
+
+def test_unread_count_incremented_on_send(conversation, alice, bob):
+    Message.objects.create(conversation=conversation, sender=alice, content="hi")
+    Message.objects.create(conversation=conversation, sender=alice, content="there")
+    assert conversation.unread_count_for(bob) == 2
+    assert conversation.unread_count_for(alice) == 0
+
+
+def test_unread_count_reset_on_open_and_mark_read(conversation, alice, bob, login):
+    Message.objects.create(conversation=conversation, sender=alice, content="hi")
+    client = login(bob)
+    resp = client.get(f"/messages/c/{conversation.pk}/")
+    assert resp.status_code == 200
+    assert conversation.unread_count_for(bob) == 0
+
+    Message.objects.create(conversation=conversation, sender=alice, content="again")
+    resp = client.post(f"/messages/mark-read/{conversation.pk}/")
+    assert resp.status_code == 302
+    assert conversation.unread_count_for(bob) == 0
+
+
+def test_inbox_reads_counter(conversation, alice, bob, login):
+    Message.objects.create(conversation=conversation, sender=alice, content="hi")
+    client = login(bob)
+    resp = client.get("/messages/")
+    assert resp.status_code == 200
+    items = resp.context["conversations"]
+    assert len(items) == 1
+    assert items[0]["unread"] == 1
+
+
+def test_recount_unread_repairs_drift(conversation, alice, bob):
+    Message.objects.create(conversation=conversation, sender=alice, content="hi")
+    Participant.objects.filter(conversation=conversation, user=bob).update(unread_count=42)
+    call_command("recount_unread", stdout=StringIO())
+    assert conversation.unread_count_for(bob) == 1
+
+
+def test_history_pages_by_cursor(conversation, alice, bob, monkeypatch, login):
+    monkeypatch.setattr("apps.messaging.pagination.MESSAGES_PAGE_SIZE", 3)
+    for i in range(7):
+        Message.objects.create(conversation=conversation, sender=alice, content=f"m{i}")
+
+    client = login(bob)
+    resp = client.get(f"/messages/c/{conversation.pk}/")
+    assert [m.content for m in resp.context["messages"]] == ["m4", "m5", "m6"]
+
+    seen = []
+    cursor = resp.context["older_cursor"]
+    while cursor:
+        data = client.get(f"/messages/c/{conversation.pk}/history/", {"before": cursor}).json()
+        seen = [m["content"] for m in data["messages"]] + seen
+        cursor = data["older_cursor"]
+    assert seen == ["m0", "m1", "m2", "m3"]
+
+
+def test_history_forbidden_for_non_participant(conversation, login):
+    eve = User.objects.create_user(username="eve", email="eve@example.com", password="pass123")
+    resp = login(eve).get(f"/messages/c/{conversation.pk}/history/")
+    assert resp.status_code == 403
+
+
+def test_start_dm_reuses_canonical_conversation(alice, bob, login):
+    resp = login(alice).post(f"/messages/start/{bob.pk}/")
+    assert resp.status_code == 302
+    resp = login(bob).post(f"/messages/start/{alice.pk}/", {"body": "hey"})
+    assert resp.status_code == 302
+
+    conv = Conversation.objects.get()
+    assert conv.dm_key == Conversation.make_dm_key(bob.pk, alice.pk)
+    assert conv.participants.count() == 2
+    assert conv.messages.get().content == "hey"
+
+
+def test_empty_dm_shows_no_messages_yet(alice, bob, login):
+    client = login(alice)
+    client.post(f"/messages/start/{bob.pk}/")  # no body: conversation only
+    page = client.get("/messages/").content.decode()
+    assert page.count("No messages yet") == 2  # inbox row and nav dropdown
+    assert "Message removed" not in page
+
+
+def test_send_rolls_back_when_notification_cannot_be_recorded(conversation, alice, login, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("outbox unavailable")
+
+    monkeypatch.setattr("apps.notifications.services.enqueue_notification", broken)
+    client = login(alice)
+    client.raise_request_exception = False
+    resp = client.post(f"/messages/c/{conversation.pk}/send/", {"content": "hi"})
+    assert resp.status_code == 500
+    assert not Message.objects.exists()
+
+
+def test_backfill_dm_keys(conversation, alice, bob):
+    call_command("backfill_dm_keys", stdout=StringIO())
+    conversation.refresh_from_db()
+    assert conversation.dm_key == Conversation.make_dm_key(alice.pk, bob.pk)
+
+
+def test_last_message_pointer_maintained(conversation, alice, bob):
+    Message.objects.create(conversation=conversation, sender=alice, content="first")
+    last = Message.objects.create(conversation=conversation, sender=bob, content="second")
+    conversation.refresh_from_db()
+    assert conversation.last_message_id == last.pk
+    assert conversation.last_message_preview == "second"
+    assert set(conversation.participants.values_list("last_message_at", flat=True)) == {last.created_at}
+
+    last.mark_deleted()
+    conversation.refresh_from_db()
+    assert conversation.last_message_id == last.pk
+    assert conversation.last_message_preview == ""
+
+
+def test_inbox_orders_by_last_message(alice, bob, login):
+    older = Conversation.get_or_create_dm(alice, bob)[0]
+    carol = User.objects.create_user(username="carol", email="carol@example.com", password="pass123")
+    newer = Conversation.get_or_create_dm(alice, carol)[0]
+    Message.objects.create(conversation=newer, sender=carol, content="a")
+    Message.objects.create(conversation=older, sender=bob, content="b")
+
+    resp = login(alice).get("/messages/")
+    items = resp.context["conversations"]
+    assert [it["conversation"].pk for it in items] == [older.pk, newer.pk]
+    assert items[0]["last_message"].sender == bob
+
+
+def test_empty_conversations_sort_by_creation(alice, bob, login):
+    quiet = Conversation.get_or_create_dm(alice, bob)[0]
+    carol = User.objects.create_user(username="carol", email="carol@example.com", password="pass123")
+    newest = Conversation.get_or_create_dm(alice, carol)[0]
+    assert Participant.objects.get(conversation=quiet, user=alice).last_message_at == quiet.last_message_at
+
+    items = login(alice).get("/messages/").context["conversations"]
+    assert [it["conversation"].pk for it in items] == [newest.pk, quiet.pk]
+
+
+def test_message_search_ranked_and_scoped(conversation, alice, bob, login):
+    Message.objects.create(conversation=conversation, sender=alice, content="lunch tomorrow?")
+    hidden = Message.objects.create(conversation=conversation, sender=bob, content="lunch plans <b>ok</b>")
+    carol = User.objects.create_user(username="carol", email="carol@example.com", password="pass123")
+    other = Conversation.get_or_create_dm(alice, carol)[0]
+    Message.objects.create(conversation=other, sender=carol, content="lunch with carol")
+
+    resp = login(bob).get("/messages/search/", {"q": "lunch"})
+    results = list(resp.context["results"])
+    assert len(results) == 2
+    assert all(m.conversation_id == conversation.pk for m in results)
+    assert "&lt;b&gt;" in resp.content.decode()
+
+    hidden.mark_deleted()
+    resp = login(bob).get("/messages/search/", {"q": "plans"})
+    assert list(resp.context["results"]) == []
+
+
+def test_read_receipts_are_buffered_then_flushed(conversation, bob, django_assert_num_queries):
+    from django.core.cache import cache
+    from apps.messaging import receipts
+
+    cache.clear()
+    part = Participant.objects.get(conversation=conversation, user=bob)
+    with django_assert_num_queries(0):
+        receipts.record_read(part)
+    part.refresh_from_db()
+    assert part.last_read is None
+    assert receipts.last_read_for(part) is not None
+
+    assert receipts.flush() == 1
+    part.refresh_from_db()
+    assert part.last_read == receipts.last_read_for(part)
+
+
+def test_flush_never_moves_last_read_backwards(conversation, bob):
+    from datetime import timedelta
+    from django.core.cache import cache
+    from django.utils import timezone
+    from apps.messaging import receipts
+
+    cache.clear()
+    part = Participant.objects.get(conversation=conversation, user=bob)
+    t1 = timezone.now()
+    receipts.record_read(part, t1)
+    part.mark_read(t1 + timedelta(minutes=1))
+    assert receipts.last_read_for(part) == t1 + timedelta(minutes=1)
+
+    receipts.record_read(part, t1)  # stale value buffered again
+    Participant.objects.filter(pk=part.pk).update(last_read=t1 + timedelta(minutes=2))
+    receipts.flush()
+    part.refresh_from_db()
+    assert part.last_read == t1 + timedelta(minutes=2)
+
+
+def test_pending_receipts_survive_interleaved_records(conversation, alice, bob):
+    from django.core.cache import cache
+    from apps.messaging import receipts
+
+    cache.clear()
+    parts = list(Participant.objects.filter(conversation=conversation))
+    for p in parts:
+        receipts.record_read(p)
+    assert receipts.flush() == len(parts)
+    assert receipts.flush() == 0
+
+
+def test_worker_flushes_quiet_receipts_and_counts_see_buffered_ones(conversation, alice, bob):
+    from apps.messaging import receipts
+
+    Message.objects.create(conversation=conversation, sender=alice, content="hi")
+    part = Participant.objects.get(conversation=conversation, user=bob)
+    part.mark_read()
+    Message.objects.create(conversation=conversation, sender=alice, content="again")
+    part.refresh_from_db()
+    Participant.objects.filter(pk=part.pk).update(unread_count=0)
+    part.unread_count = 0
+    receipts.record_read(part)  # buffered only
+    assert part.count_unread() == 0
+
+    call_command("run_outbox_worker", "--once", "--allow-local-backends", stdout=StringIO())
+    part.refresh_from_db()
+    assert part.last_read == receipts.last_read_for(part)
+    assert receipts.flush() == 0
+
+
+def test_archiving_keeps_each_conversations_last_message(conversation, alice, bob, login):
+    from datetime import timedelta
+    from django.utils import timezone
+    from apps.messaging.models import ArchivedMessage
+
+    old = timezone.now() - timedelta(days=400)
+    for i in range(2):
+        m = Message.objects.create(conversation=conversation, sender=alice, content=f"old{i}")
+        Message.objects.filter(pk=m.pk).update(created_at=old + timedelta(minutes=i))
+    conversation.refresh_last_message()
+
+    call_command("archive_messages", "--days", "365", stdout=StringIO())
+    assert list(ArchivedMessage.objects.values_list("content", flat=True)) == ["old0"]
+    conversation.refresh_from_db()
+    assert conversation.last_message.content == "old1"
+    assert conversation.last_message_at == old + timedelta(minutes=1)
+
+    # an already fully archived conversation keeps its preview and position
+    ArchivedMessage.objects.bulk_create([ArchivedMessage.from_message(conversation.last_message)])
+    Message.objects.filter(pk=conversation.last_message_id).delete()
+    conversation.refresh_from_db()
+    conversation.refresh_last_message()
+    assert (conversation.last_message_preview, conversation.last_message_at) == ("old1", old + timedelta(minutes=1))
+
+
+def test_archived_history_is_read_through(conversation, alice, bob, monkeypatch, login):
+    from datetime import timedelta
+    from django.utils import timezone
+    from apps.messaging.models import ArchivedMessage
+
+    monkeypatch.setattr("apps.messaging.pagination.MESSAGES_PAGE_SIZE", 2)
+    old = timezone.now() - timedelta(days=400)
+    for i in range(3):
+        m = Message.objects.create(conversation=conversation, sender=alice, content=f"old{i}")
+        Message.objects.filter(pk=m.pk).update(created_at=old + timedelta(minutes=i))
+    Message.objects.create(conversation=conversation, sender=alice, content="new")
+
+    call_command("archive_messages", "--days", "365", stdout=StringIO())
+    assert ArchivedMessage.objects.count() == 3
+    assert list(conversation.messages.values_list("content", flat=True)) == ["new"]
+    # archived messages leave search on purpose
+    assert not list(login(bob).get("/messages/search/", {"q": "old0"}).context["results"])
+
+    client = login(bob)
+    resp = client.get(f"/messages/c/{conversation.pk}/")
+    assert [m.content for m in resp.context["messages"]] == ["old2", "new"]
+    data = client.get(f"/messages/c/{conversation.pk}/history/", {"before": resp.context["older_cursor"]}).json()
+    assert [m["content"] for m in data["messages"]] == ["old0", "old1"]
+    assert data["older_cursor"] is None
@@ -0,0 +1,57 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from apps.core.nav import get_nav_state
+from apps.messaging.models import Conversation, Participant, Message
+from apps.notifications.services import create_notification
+
+pytestmark = pytest.mark.django_db
+
+
+def make_conversation(*users):
+    conv = Conversation.objects.create()
+    for u in users:
+        Participant.objects.create(conversation=conv, user=u)
+    return conv
+
+
+def test_nav_state_query_count_is_fixed(alice, bob):
+    for _ in range(4):
+        conv = make_conversation(alice, bob)
+        Message.objects.create(conversation=conv, sender=alice, content="hi")
+    cache.clear()
+    with CaptureQueriesContext(connection) as ctx:
+        state = get_nav_state(bob)
+    assert len(ctx.captured_queries) == 5
+    assert state["unread_messages_count"] == 4
+    assert all(it["other_user"] == alice for it in state["recent_conversations"])
+
+    with CaptureQueriesContext(connection) as ctx:
+        get_nav_state(bob)
+    assert len(ctx.captured_queries) == 0
+
+
+def test_nav_state_invalidated_by_events(alice, bob):
+    conv = make_conversation(alice, bob)
+    assert get_nav_state(bob)["unread_messages_count"] == 0
+
+    Message.objects.create(conversation=conv, sender=alice, content="hi")
+    assert get_nav_state(bob)["unread_messages_count"] == 1
+
+    create_notification(recipient=bob, verb="liked your post", actor=alice)
+    assert get_nav_state(bob)["unread_notifications_count"] == 1
+
+    Participant.objects.get(conversation=conv, user=bob).mark_read()
+    assert get_nav_state(bob)["unread_messages_count"] == 0
+
+
+def test_nav_state_is_lazy(alice, login):
+    client = login(alice)
+    resp = client.get("/notifications/recent/")
+    assert resp.status_code == 200
+    assert cache.get(f"nav_state:{alice.pk}") is None
+
+    resp = client.get("/messages/")
+    assert resp.status_code == 200
+    assert cache.get(f"nav_state:{alice.pk}") is not None
@@ -0,0 +1,214 @@
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from apps.users.models import User
+from apps.posts.models import Post
+from apps.notifications.models import Notification
+from apps.notifications.services import create_notifications
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def users():
+    return [
+        User.objects.create_user(username=f"u{i}", email=f"u{i}@example.com", password="pass123")
+        for i in range(5)
+    ]
+
+
+def test_bulk_fan_out_one_insert_per_chunk(users, django_assert_num_queries):
+    # per chunk: one INSERT for the notifications, one upsert for the unread counters
+    actor, *recipients = users
+    post = Post.objects.create(user=actor, title="t", text="x")
+    ContentType.objects.get_for_model(post)  # warm the content type cache
+
+    with django_assert_num_queries(4):
+        created = create_notifications(recipients, verb="posted", actor=actor, target=post, batch_size=3)
+
+    assert created == 4
+    assert Notification.objects.filter(verb="posted", target_id=str(post.pk)).count() == 4
+
+
+def test_like_goes_through_outbox(users, login):
+    from django.core.management import call_command
+    from io import StringIO
+    from apps.core.models import OutboxEvent
+
+    author, fan = users[:2]
+    post = Post.objects.create(user=author, title="t", text="x")
+    resp = login(fan).post(f"/likes/{post.pk}/like/", HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+    assert resp.json()["action"] == "liked"
+    assert not Notification.objects.exists()
+    liked = OutboxEvent.objects.filter(topic="notifications.post_liked")
+    assert liked.filter(processed_at__isnull=True).count() == 1
+
+    call_command("run_outbox_worker", "--once", "--allow-local-backends", stdout=StringIO())
+    n = Notification.objects.get()
+    assert (n.recipient, n.actor, n.verb) == (author, fan, "liked your post")
+    assert liked.get().processed_at is not None
+
+
+def test_outbox_retries_failed_events(settings):
+    from apps.core import outbox
+    from apps.core.models import OutboxEvent
+
+    outbox._handlers.clear()
+    settings.OUTBOX_HANDLERS = {"test.boom": "json.loads"}  # json.loads({}) raises TypeError
+    event = outbox.enqueue("test.boom", {})
+    assert outbox.drain() == 1
+    event.refresh_from_db()
+    assert event.attempts == 1 and event.processed_at is None and "TypeError" in event.last_error
+    outbox._handlers.clear()
+
+
+def test_outbox_prunes_processed_events_and_worker_requires_shared_backends():
+    from datetime import timedelta
+    from django.core.management import CommandError, call_command
+    from django.utils import timezone
+    from apps.core import outbox
+    from apps.core.models import OutboxEvent
+
+    old = timezone.now() - timedelta(days=10)
+    done = outbox.enqueue("test.done", {})
+    dead = outbox.enqueue("test.dead", {})
+    pending = outbox.enqueue("test.pending", {})
+    OutboxEvent.objects.filter(pk=done.pk).update(processed_at=old)
+    OutboxEvent.objects.filter(pk=dead.pk).update(processed_at=old, attempts=outbox.MAX_ATTEMPTS)
+    assert outbox.prune() == 1
+    assert set(OutboxEvent.objects.values_list("pk", flat=True)) == {dead.pk, pending.pk}
+
+    with pytest.raises(CommandError, match="process-local"):
+        call_command("run_outbox_worker", "--once")
+
+
+def test_likes_aggregate_into_one_unread_row(users):
+    author, *fans = users
+    post = Post.objects.create(user=author, title="t", text="x")
+    for fan in fans + [fans[0]]:  # a repeat like from the same user isn't counted twice
+        create_notifications([author], verb="liked your post", actor=fan, target=post)
+
+    n = Notification.objects.get(recipient=author)
+    assert n.actor == fans[0]
+    assert n.actor_count == len(fans) and n.others_count == len(fans) - 1
+    assert n.data["actor_ids"][0] == fans[0].pk
+
+    n.mark_read()
+    create_notifications([author], verb="liked your post", actor=fans[1], target=post)
+    assert Notification.objects.filter(recipient=author).count() == 2
+
+
+def test_unread_counter_tracks_create_and_read(users, login):
+    from django.core.management import call_command
+    from io import StringIO
+    from apps.notifications.counters import unread_count
+    from apps.notifications.models import NotificationCounter
+
+    actor, *recipients = users
+    me = recipients[0]
+    create_notifications(recipients, verb="posted", actor=actor)
+    create_notifications([me], verb="posted again", actor=actor)
+    assert unread_count(me) == 2 and unread_count(recipients[1]) == 1
+
+    client = login(me)
+    n = Notification.objects.filter(recipient=me).first()
+    assert client.post(f"/notifications/mark-read/{n.pk}/").json()["unread_count"] == 1
+    assert client.post(f"/notifications/mark-read/{n.pk}/").json()["unread_count"] == 1
+    assert client.post("/notifications/mark-all-read/").json()["unread_count"] == 0
+    assert unread_count(me) == 0
+
+    NotificationCounter.objects.filter(user=recipients[1]).update(unread=7)
+    out = StringIO()
+    call_command("recount_notifications", stdout=out)
+    assert unread_count(recipients[1]) == 1
+    assert "Fixed 1 counter(s)." in out.getvalue()
+
+
+def test_recent_is_conditional_on_state_version(users, django_assert_max_num_queries, login):
+    actor, me = users[:2]
+    create_notifications([me], verb="posted", actor=actor)
+    client = login(me)
+
+    first = client.get("/notifications/recent/").json()
+    assert first["changed"] and len(first["items"]) == 1
+    version = first["version"]
+
+    with django_assert_max_num_queries(6):  # session + user + counter row per request, nothing else
+        assert client.get(f"/notifications/recent/?since={version}").json() == {
+            "status": "ok", "changed": False, "version": version,
+        }
+        resp = client.get("/notifications/recent/", HTTP_IF_NONE_MATCH=f'"{version}"')
+    assert resp.status_code == 304
+
+    create_notifications([me], verb="posted again", actor=actor)
+    delta = client.get(f"/notifications/recent/?since={version}").json()
+    assert delta["changed"] and delta["version"] != version and len(delta["items"]) == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_long_poll_wakes_on_new_notification():
+    import asyncio
+    from asgiref.sync import sync_to_async
+    from django.test import AsyncClient
+    from apps.notifications.counters import state_version
+    from apps.notifications.services import create_notification
+
+    actor = User.objects.create_user(username="lp1", email="lp1@example.com", password="pass123")
+    me = User.objects.create_user(username="lp2", email="lp2@example.com", password="pass123")
+    version = state_version(me.pk)
+
+    async def scenario():
+        client = AsyncClient()
+        await client.aforce_login(me)
+        poll = asyncio.ensure_future(client.get(f"/notifications/recent/?since={version}&wait=5"))
+        await asyncio.sleep(0.3)
+        assert not poll.done()
+        await sync_to_async(create_notification)(me, "posted", actor=actor)
+        return await asyncio.wait_for(poll, 3)
+
+    data = asyncio.run(scenario()).json()
+    assert data["changed"] and data["items"][0]["verb"] == "posted"
+
+
+def test_prune_notifications_in_chunks(users):
+    from datetime import timedelta
+    from django.core.management import call_command
+    from django.utils import timezone
+    from io import StringIO
+    from apps.notifications.counters import unread_count
+
+    actor, me, other = users[:3]
+    create_notifications([me], verb="old", actor=actor)
+    for i in range(5):
+        create_notifications([me], verb=f"v{i}", actor=actor)
+    create_notifications([other], verb="old", actor=actor)
+    old = timezone.now() - timedelta(days=100)
+    Notification.objects.filter(verb="old").update(created_at=old)
+    Notification.objects.get(verb="old", recipient=me).mark_read()
+
+    out = StringIO()
+    call_command("prune_notifications", "--days=90", "--keep=3", "--batch-size=1", "--sleep=0", stdout=out)
+
+    assert "Removed 1 expired read notification(s) and 2 over the per-user cap." in out.getvalue()
+    assert set(Notification.objects.filter(recipient=me).values_list("verb", flat=True)) == {"v2", "v3", "v4"}
+    assert Notification.objects.filter(recipient=other).count() == 1  # old but unread: kept
+    assert unread_count(me) == 3
+
+
+def test_serialization_query_count_is_fixed(users, django_assert_num_queries):
+    from apps.comments.models import Comment
+    from apps.notifications.serializers import serialize_notifications
+
+    actor, me = users[:2]
+    for i in range(6):
+        post = Post.objects.create(user=me, title=f"t{i}", text="x")
+        create_notifications([me], verb="posted", actor=users[2 + i % 3], target=post)
+        comment = Comment.objects.create(post=post, user=actor, content="c")
+        create_notifications([me], verb="replied", actor=actor, target=comment)
+    Post.objects.filter(title="t0").delete()
+
+    with django_assert_num_queries(3):  # rows + actors/content types, posts, comments
+        items = serialize_notifications(Notification.objects.filter(recipient=me))
+
+    assert len(items) == 12
+    assert {it["target"]["ct"] for it in items} == {"post", "comment"}
+    assert sum(not it["target"]["exists"] for it in items) == 2  # deleted post and its comment
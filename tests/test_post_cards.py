@@ -0,0 +1,89 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.template import Context, Template
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from apps.users.models import User
+from apps.posts.models import Post
+from apps.likes.models import Like
+from apps.posts.templatetags.post_cards import card_cache_key
+
+pytestmark = pytest.mark.django_db
+
+
+def render_card(post, liked_post_ids=()):
+    post = Post.objects.select_related("user").prefetch_related("tags").get(pk=post.pk)
+    tpl = Template("{% load post_cards %}{% post_card post liked_post_ids %}")
+    return tpl.render(Context({"post": post, "liked_post_ids": set(liked_post_ids)}))
+
+
+def test_card_is_cached_and_liked_state_is_per_viewer():
+    author = User.objects.create_user(username="author", email="author@example.com", password="pass123")
+    post = Post.objects.create(user=author, title="Cached card", text="body")
+
+    first = render_card(post)
+    post = Post.objects.select_related("user").prefetch_related("tags").get(pk=post.pk)
+    tpl = Template("{% load post_cards %}{% post_card post liked_post_ids %}")
+    with CaptureQueriesContext(connection) as ctx:
+        liked = tpl.render(Context({"post": post, "liked_post_ids": {post.pk}}))
+    assert len(ctx.captured_queries) == 0
+    assert "Cached card" in first and "bi-heart-fill" not in first
+    assert "bi-heart-fill" in liked
+
+
+def test_edit_tag_change_and_like_invalidate_card():
+    author = User.objects.create_user(username="author", email="author@example.com", password="pass123")
+    fan = User.objects.create_user(username="fan", email="fan@example.com", password="pass123")
+    post = Post.objects.create(user=author, title="Before", text="body")
+    render_card(post)
+
+    post.title = "After"
+    post.save()
+    assert "After" in render_card(post)
+
+    post.tags.add("travel")
+    assert "#travel" in render_card(post)
+
+    Like.objects.create(user=fan, post=post)
+    post.refresh_from_db()
+    assert post.likes_count == 1
+    assert "bi-heart-fill" in render_card(post, liked_post_ids=[post.pk])
+
+
+def test_author_rename_invalidates_card():
+    author = User.objects.create_user(username="author", email="author@example.com", password="pass123")
+    post = Post.objects.create(user=author, title="Post", text="body")
+    assert "author" in render_card(post)
+
+    author.username = "renamed"
+    author.save()
+    assert "renamed" in render_card(post)
+
+
+def test_my_posts_uses_owner_cards(login):
+    author = User.objects.create_user(username="author", email="author@example.com", password="pass123")
+    post = Post.objects.create(user=author, title="Mine", text="x")
+
+    client = login(author)
+    page = client.get("/posts/my-posts/").content.decode()
+    assert "Mine" in page
+    assert reverse("posts:edit", args=[post.pk]) in page
+    post = Post.objects.select_related("user").get(pk=post.pk)
+    assert cache.get(card_cache_key(post, "includes/owner_post_card.html"))
+
+
+def test_list_page_marks_liked_posts(login):
+    author = User.objects.create_user(username="author", email="author@example.com", password="pass123")
+    fan = User.objects.create_user(username="fan", email="fan@example.com", password="pass123")
+    liked = Post.objects.create(user=author, title="Liked one", text="x")
+    Post.objects.create(user=author, title="Other one", text="x")
+    Like.objects.create(user=fan, post=liked)
+
+    client = login(fan)
+    anon = Client().get("/posts/").content.decode()
+    page = client.get("/posts/").content.decode()
+    assert "bi-heart-fill" not in anon
+    assert page.count("bi-heart-fill") == 1
+    assert "__post_liked_state__" not in page
@@ -0,0 +1,48 @@
+import pytest
+from django.test import Client
+from rest_framework.test import APIClient
+from apps.users.models import User
+from apps.posts.models import Post
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def posts():
+    author = User.objects.create_user(username="author", email="author@example.com", password="pass123")
+    return [Post.objects.create(user=author, title=f"p{i}", text="x") for i in range(21)]
+
+
+def test_html_list_walks_cursors_both_ways(posts):
+    client = Client()
+    resp = client.get("/posts/")
+    first = [p.pk for p in resp.context["posts"]]
+    assert first == [p.pk for p in posts[::-1][:9]]
+
+    seen, page = list(first), resp.context["page_obj"]
+    assert not page.has_previous()
+    while page.has_next():
+        resp = client.get("/posts/", {"before": page.older_cursor})
+        page = resp.context["page_obj"]
+        seen += [p.pk for p in page]
+    assert seen == [p.pk for p in posts[::-1]]
+
+    back = client.get("/posts/", {"after": page.newer_cursor}).context["page_obj"]
+    assert [p.pk for p in back] == seen[9:18]
+
+
+def test_api_keyset_keeps_count(posts, django_assert_max_num_queries):
+    client = APIClient()
+    data = client.get("/api/posts/").data
+    assert data["count"] == 21 and data["previous"] is None
+    assert [r["id"] for r in data["results"]] == [p.pk for p in posts[::-1][:10]]
+
+    with django_assert_max_num_queries(1):  # count is cached: only the range read
+        page2 = client.get(data["next"]).data
+    assert [r["id"] for r in page2["results"]] == [p.pk for p in posts[::-1][10:20]]
+    assert page2["count"] == 21 and "after=" in page2["previous"]
+
+
+def test_api_page_numbers_still_work(posts):
+    data = APIClient().get("/api/posts/", {"page": 3}).data
+    assert data["count"] == 21 and [r["id"] for r in data["results"]] == [posts[0].pk]
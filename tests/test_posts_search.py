@@ -0,0 +1,46 @@
+import pytest
+from django.test import Client
+from apps.users.models import User
+from apps.posts.models import Post
+from apps.posts.search import search_posts
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def author():
+    return User.objects.create_user(username="author", email="author@example.com", password="pass123")
+
+
+def test_search_ranks_title_matches_and_tracks_edits(author):
+    in_text = Post.objects.create(user=author, title="Weekend", text="We went hiking in the Alps")
+    in_title = Post.objects.create(user=author, title="Hiking tips", text="Bring water")
+    Post.objects.create(user=author, title="Cooking", text="Pasta night")
+
+    assert list(search_posts(Post.objects.all(), "hiking")) == [in_title, in_text]
+
+    in_text.text = "We stayed home"
+    in_text.save()
+    in_title.is_active = False
+    in_title.save()
+    assert not search_posts(Post.objects.all(), "hiking").exists()
+
+
+def test_search_tag_filter_and_api(author):
+    tagged = Post.objects.create(user=author, title="Alps hike", text="Snow everywhere")
+    tagged.tags.add("Travel")
+    Post.objects.create(user=author, title="Alps photos", text="Snow again")
+
+    assert list(search_posts(Post.objects.all(), "snow", tags=["travel"])) == [tagged]
+
+    resp = Client().get("/api/posts/", {"q": "snow", "tag": "travel"})
+    results = resp.data["results"] if isinstance(resp.data, dict) else resp.data
+    assert [r["id"] for r in results] == [tagged.pk]
+    assert "<mark>Snow</mark>" in results[0]["highlight"]
+
+
+def test_html_list_highlights_matches(author):
+    Post.objects.create(user=author, title="Rain", text="Rain <b>all</b> day")
+    resp = Client().get("/posts/", {"q": "rain"})
+    html = resp.content.decode()
+    assert "<mark>Rain</mark> &lt;b&gt;all&lt;/b&gt; day" in html
@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import sys
+import types
+
+import pytest
+from apps.realtime import brokers
+from apps.realtime.brokers import LocalBroker, user_channel
+from apps.users.models import User
+from apps.messaging.models import Conversation, Participant, Message
+from apps.notifications.services import create_notification
+
+
+def test_local_broker_fans_out_to_subscribers():
+    broker = LocalBroker()
+
+    async def scenario():
+        async with broker.subscribe("user:1") as q1, broker.subscribe("user:1") as q2:
+            assert broker.subscriber_count("user:1") == 2
+            broker.publish("user:1", {"event": "ping", "data": {}})
+            broker.publish("user:2", {"event": "other", "data": {}})
+            got = [await asyncio.wait_for(q.get(), 1) for q in (q1, q2)]
+        assert broker.subscriber_count("user:1") == 0
+        return got
+
+    assert [m["event"] for m in asyncio.run(scenario())] == ["ping", "ping"]
+
+
+def test_redis_listener_reconnects_after_failure(monkeypatch, caplog):
+    fake_redis = types.SimpleNamespace(Redis=types.SimpleNamespace(from_url=lambda url: object()))
+    monkeypatch.setitem(sys.modules, "redis", fake_redis)
+    monkeypatch.setattr(brokers, "RECONNECT_MIN_SECONDS", 0.01)
+    broker = brokers.RedisBroker(url="redis://example")
+    connections = []
+
+    async def relay():
+        connections.append(1)
+        if len(connections) == 1:
+            raise ConnectionError("connection reset by peer")
+        broker._deliver("user:1", {"event": "ping", "data": {}})
+        await asyncio.Event().wait()
+
+    broker._relay = relay
+
+    async def scenario():
+        async with broker.subscribe("user:1") as queue:
+            message = await asyncio.wait_for(queue.get(), 1)
+        broker._listener.cancel()
+        return message
+
+    with caplog.at_level(logging.ERROR, logger="apps.realtime.brokers"):
+        assert asyncio.run(scenario())["event"] == "ping"
+    assert len(connections) == 2
+    assert "reconnecting" in caplog.text
+
+
+@pytest.mark.django_db(transaction=True)
+def test_message_and_notification_events_published(monkeypatch):
+    published = []
+    monkeypatch.setattr(
+        "apps.realtime.brokers.LocalBroker.publish",
+        lambda self, channel, message: published.append((channel, message["event"])),
+    )
+    alice = User.objects.create_user(username="alice", email="alice@example.com", password="x")
+    bob = User.objects.create_user(username="bob", email="bob@example.com", password="x")
+    conv = Conversation.objects.create()
+    Participant.objects.create(conversation=conv, user=alice)
+    Participant.objects.create(conversation=conv, user=bob)
+
+    Message.objects.create(conversation=conv, sender=alice, content="hi")
+    create_notification(recipient=bob, verb="liked your post", actor=alice)
+
+    assert published == [(user_channel(bob.pk), "message"), (user_channel(bob.pk), "notification")]
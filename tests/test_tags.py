@@ -0,0 +1,69 @@
+import pytest
+from django.test import Client
+from apps.users.models import User
+from apps.posts.models import Post, TagStat
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def author():
+    return User.objects.create_user(username="author", email="author@example.com", password="pass123")
+
+
+def counts():
+    return dict(TagStat.objects.values_list("slug", "posts_count"))
+
+
+def test_counts_follow_tag_changes_deactivation_and_delete(author):
+    a = Post.objects.create(user=author, title="a", text="x")
+    b = Post.objects.create(user=author, title="b", text="x")
+    a.tags.add("Travel", "food")
+    b.tags.add("travel")
+    assert counts() == {"travel": 2, "food": 1}
+
+    a.tags.remove("food")
+    assert counts()["food"] == 0
+
+    b.is_active = False
+    b.save()
+    assert counts()["travel"] == 1
+
+    a.delete()
+    assert counts()["travel"] == 0
+
+
+def test_changes_apply_deltas_without_recounting(author):
+    from django.core.management import call_command
+    from io import StringIO
+
+    post = Post.objects.create(user=author, title="a", text="x")
+    post.tags.add("travel")
+    TagStat.objects.filter(slug="travel").update(posts_count=10)  # drifted
+
+    post.title = "edited"
+    post.save()  # no is_active flip: counts untouched
+    assert counts() == {"travel": 10}
+    post.is_active = False
+    post.save()
+    assert counts() == {"travel": 9}
+    post.tags.add("food")  # inactive post: nothing to count
+    assert counts() == {"travel": 9}
+
+    call_command("recount_tags", stdout=StringIO())
+    assert counts() == {"travel": 0, "food": 0}
+
+
+def test_tag_page_popular_and_autocomplete(author):
+    for i in range(3):
+        Post.objects.create(user=author, title=f"t{i}", text="x").tags.add("travel")
+    Post.objects.create(user=author, title="f", text="x").tags.add("trains")
+
+    resp = Client().get("/posts/tag/TRAVEL/")
+    assert len(resp.context["posts"]) == 3
+
+    popular = Client().get("/posts/tags/popular/").json()["tags"]
+    assert [(t["slug"], t["count"]) for t in popular] == [("travel", 3), ("trains", 1)]
+
+    suggestions = Client().get("/posts/tags/autocomplete/", {"q": "tra"}).json()["tags"]
+    assert [t["slug"] for t in suggestions] == ["travel", "trains"]
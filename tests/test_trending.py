@@ -0,0 +1,104 @@
+import math
+from datetime import timedelta
+
+import pytest
+from django.test import Client
+from django.utils import timezone
+from apps.users.models import User
+from apps.posts import trending
+from apps.posts.models import Post, PostScore, TrendingCheckpoint, TrendingLike
+from apps.likes.models import Like
+from apps.comments.models import Comment
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def users():
+    return [
+        User.objects.create_user(username=f"u{i}", email=f"u{i}@example.com", password="pass123")
+        for i in range(5)
+    ]
+
+
+def test_recent_engagement_beats_old_totals(users):
+    author = users[0]
+    old_hit = Post.objects.create(user=author, title="old", text="x")
+    fresh = Post.objects.create(user=author, title="fresh", text="x")
+    quiet = Post.objects.create(user=author, title="quiet", text="x")
+
+    for u in users:
+        Like.objects.create(user=u, post=old_hit)
+    Like.objects.filter(post=old_hit).update(created_at=timezone.now() - timedelta(hours=48))
+    Like.objects.create(user=users[1], post=fresh)
+    Comment.objects.create(user=users[2], post=fresh, content="nice")
+
+    assert trending.update(batch_size=2) == {"like": 6, "comment": 1}
+    assert trending.update() == {"like": 0, "comment": 0}
+    assert trending.trending_posts() == [fresh, old_hit]
+    assert not PostScore.objects.filter(post=quiet).exists()
+
+    score = PostScore.objects.get(post=fresh).score
+    assert math.isclose(trending.current_score(score), 4.0, rel_tol=0.01)  # 1 like + 1 comment, just now
+
+    # further events are folded in on top of the stored score
+    Like.objects.create(user=users[3], post=fresh)
+    trending.update()
+    assert math.isclose(trending.current_score(PostScore.objects.get(post=fresh).score), 5.0, rel_tol=0.01)
+
+
+def test_late_commits_behind_the_checkpoint_are_folded_once(users):
+    author = users[0]
+    post = Post.objects.create(user=author, title="p", text="x")
+    first = Like.objects.create(user=users[1], post=post)
+    # an id handed out to a transaction that hasn't committed yet
+    Like.objects.create(pk=first.pk + 2, user=users[2], post=post)
+    assert trending.update() == {"like": 2, "comment": 0}
+
+    Like.objects.create(pk=first.pk + 1, user=users[3], post=post)  # commits late
+    assert trending.update() == {"like": 1, "comment": 0}
+    assert trending.update() == {"like": 0, "comment": 0}
+    assert math.isclose(trending.current_score(PostScore.objects.get(post=post).score), 3.0, rel_tol=0.01)
+
+    # holes are only re-checked for TRENDING_LATE_WINDOW_SECONDS
+    Like.objects.create(pk=first.pk + 5, user=users[4], post=post)
+    trending.update()
+    later = timezone.now() + timedelta(seconds=trending.LATE_WINDOW_SECONDS + 1)
+    trending.update(now=later)
+    assert TrendingCheckpoint.objects.get(source="like").pending == {}
+
+
+def test_toggling_a_like_counts_once(users):
+    post = Post.objects.create(user=users[0], title="p", text="x")
+    for _ in range(3):
+        Like.objects.create(user=users[1], post=post)
+        trending.update()
+        Like.objects.filter(user=users[1], post=post).delete()
+    Like.objects.create(user=users[1], post=post)
+    assert trending.update() == {"like": 1, "comment": 0}
+    assert math.isclose(trending.current_score(PostScore.objects.get(post=post).score), 1.0, rel_tol=0.01)
+
+    # prune() forgets pairs counted longer ago than the dedupe window
+    later = timezone.now() + timedelta(hours=trending.LIKE_DEDUPE_HOURS + 1)
+    trending.prune(now=later)
+    assert not TrendingLike.objects.exists()
+
+
+def test_trending_page_and_api_read_stored_scores(users, django_assert_max_num_queries):
+    author = users[0]
+    posts = [Post.objects.create(user=author, title=f"p{i}", text="x") for i in range(3)]
+    for i, post in enumerate(posts):
+        for u in users[1:2 + i]:
+            Like.objects.create(user=u, post=post)
+    trending.update()
+
+    resp = Client().get("/posts/trending/")
+    assert [p.pk for p in resp.context["posts"]] == [p.pk for p in posts[::-1]]
+
+    data = Client().get("/api/posts/trending/").json()
+    assert [r["id"] for r in data] == [p.pk for p in posts[::-1]]
+
+    posts[2].is_active = False
+    posts[2].save()
+    with django_assert_max_num_queries(2):  # cached ids: posts + tags
+        assert trending.trending_posts() == [posts[1], posts[0]]
@@ -0,0 +1,170 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Newest-first lists are ordered by (created_at, pk); a cursor encodes the
+last row's position and the next page is "strictly older than that", which
+an index on created_at serves at the same cost for every page.
+
+Lists that cannot be keyset-paged (e.g. ranked search results) keep page
+numbers through CachedCountPaginator, which caches COUNT(*) per query.
+"""
+import base64
+import hashlib
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+COUNT_CACHE_TIMEOUT = getattr(settings, "PAGINATION_COUNT_CACHE_TIMEOUT", 60)
+
+
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(value):
+    """
+    Return (created_at, pk) for a cursor string or None if it is malformed.
+    """
+    if not value:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(value.encode()).decode()
+        ts, pk = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(pk)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def older_than(qs, position, created_field="created_at", pk_field="id"):
+    """
+    Order `qs` newest first and, given a decoded cursor, keep rows strictly
+    older than it.
+    """
+    qs = qs.order_by(f"-{created_field}", f"-{pk_field}")
+    if position:
+        created_at, pk = position
+        qs = qs.filter(
+            Q(**{f"{created_field}__lt": created_at})
+            | Q(**{created_field: created_at, f"{pk_field}__lt": pk})
+        )
+    return qs
+
+
+def newer_than(qs, position, created_field="created_at", pk_field="id"):
+    """
+    Order `qs` oldest first and keep rows strictly newer than the cursor.
+    """
+    created_at, pk = position
+    return qs.order_by(created_field, pk_field).filter(
+        Q(**{f"{created_field}__gt": created_at})
+        | Q(**{created_field: created_at, f"{pk_field}__gt": pk})
+    )
+
+
+class KeysetPage:
+    """
+    One newest-first page plus cursors for the neighbouring pages. Quacks
+    enough like a Paginator page for templates (object_list, has_next, ...).
+    """
+    is_keyset = True
+
+    def __init__(self, object_list, older_cursor=None, newer_cursor=None):
+        self.object_list = object_list
+        self.older_cursor = older_cursor
+        self.newer_cursor = newer_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.older_cursor is not None
+
+    def has_previous(self):
+        return self.newer_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def keyset_page(qs, limit, before=None, after=None, created_field="created_at", pk_field="id"):
+    """
+    Page of `limit` rows of `qs` strictly older than the `before` cursor, or
+    strictly newer than `after`, newest first. Costs one indexed range read
+    regardless of depth.
+    """
+    def cursor(obj):
+        return encode_cursor(getattr(obj, created_field), getattr(obj, pk_field))
+
+    newer_position = decode_cursor(after)
+    if newer_position:
+        rows = list(newer_than(qs, newer_position, created_field, pk_field)[:limit + 1])
+        has_newer = len(rows) > limit
+        rows = rows[:limit][::-1]
+        has_older = bool(rows)
+    else:
+        position = decode_cursor(before)
+        rows = list(older_than(qs, position, created_field, pk_field)[:limit + 1])
+        has_older = len(rows) > limit
+        rows = rows[:limit]
+        has_newer = position is not None and bool(rows)
+    return KeysetPage(
+        rows,
+        older_cursor=cursor(rows[-1]) if has_older and rows else None,
+        newer_cursor=cursor(rows[0]) if has_newer and rows else None,
+    )
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator whose COUNT(*) is cached per query for COUNT_CACHE_TIMEOUT
+    seconds, so paging through a large result set counts it once.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, "query", None)
+        if query is None:
+            return super().count
+        key = "paginator_count:" + hashlib.md5(str(query).encode()).hexdigest()
+        return cache.get_or_set(key, lambda: Paginator.count.func(self), COUNT_CACHE_TIMEOUT)
+
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin: pages newest first with ?before=/?after= cursors.
+    Views whose ordering is not (created_at, id) -- e.g. ranked search --
+    return False from use_keyset() and get numbered pages with a cached count;
+    out-of-range page numbers fall back to the last page.
+    """
+    keyset_fields = ("created_at", "id")
+
+    def use_keyset(self):
+        return True
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.use_keyset():
+            page = keyset_page(
+                queryset,
+                page_size,
+                before=self.request.GET.get("before"),
+                after=self.request.GET.get("after"),
+                created_field=self.keyset_fields[0],
+                pk_field=self.keyset_fields[1],
+            )
+            return None, page, page.object_list, page.has_other_pages()
+
+        paginator = CachedCountPaginator(queryset, page_size)
+        try:
+            page_obj = paginator.page(self.request.GET.get("page") or 1)
+        except (PageNotAnInteger, EmptyPage):
+            page_obj = paginator.page(paginator.num_pages or 1)
+        page_obj.elided_page_range = paginator.get_elided_page_range(page_obj.number)
+        return paginator, page_obj, page_obj.object_list, page_obj.has_other_pages()
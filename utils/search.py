@@ -0,0 +1,198 @@
+"""
+Full-text index helper shared by message and post search.
+
+SQLite: an FTS5 virtual table keyed by the source row id, kept in sync
+explicitly via update()/remove() (called from model signals).
+PostgreSQL: a GIN expression index over to_tsvector(); the database keeps it
+in sync, so update()/remove() are no-ops there.
+Other backends fall back to unranked icontains filtering.
+
+search() returns the given queryset filtered by the query and annotated with
+`search_rank` (higher is better), ordered by rank.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+MARK_START = "\x02"
+MARK_END = "\x03"
+
+
+def tokenize(query):
+    return TOKEN_RE.findall(query or "")[:16]
+
+
+def render_snippet(snippet):
+    """
+    HTML-escape a search snippet and turn the match markers into <mark> tags.
+    """
+    html = escape(snippet or "").replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+    return mark_safe(html)
+
+
+PG_WEIGHT_LABELS = "ABCD"
+
+
+class FullTextIndex:
+    """
+    `weights` (optional, one number per field) boosts matches in some fields:
+    bm25 column weights on SQLite; on PostgreSQL fields are labelled A-D in
+    order of decreasing weight for ts_rank.
+    """
+
+    def __init__(self, name, model, fields, config="simple", weights=None):
+        self.name = name
+        self.model = model
+        self.fields = list(fields)
+        self.config = config
+        self.weights = list(weights) if weights else None
+
+    @property
+    def vendor(self):
+        return connection.vendor
+
+    @property
+    def table(self):
+        return self.model._meta.db_table
+
+    def _qn(self, name):
+        return connection.ops.quote_name(name)
+
+    # ------------------------------------------------------------------
+    # schema
+    # ------------------------------------------------------------------
+    def _pg_document(self, alias=None):
+        prefix = f"{self._qn(alias)}." if alias else ""
+        if not self.weights:
+            parts = " || ' ' || ".join(f"coalesce({prefix}{self._qn(f)}, '')" for f in self.fields)
+            return f"to_tsvector('{self.config}', {parts})"
+        ranked = sorted(set(self.weights), reverse=True)
+        return " || ".join(
+            f"setweight(to_tsvector('{self.config}', coalesce({prefix}{self._qn(f)}, '')), "
+            f"'{PG_WEIGHT_LABELS[min(ranked.index(w), 3)]}')"
+            for f, w in zip(self.fields, self.weights)
+        )
+
+    def ensure(self):
+        """
+        Create the index structure if it does not exist yet (idempotent).
+        """
+        with connection.cursor() as cursor:
+            if self.vendor == "sqlite":
+                columns = ", ".join(self.fields)
+                cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.name} USING fts5({columns})")
+            elif self.vendor == "postgresql":
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS {self.name} ON {self._qn(self.table)} USING GIN ({self._pg_document()})"
+                )
+
+    def rebuild(self, queryset=None):
+        """
+        Re-populate the index from `queryset` (defaults to all rows). Returns rows indexed.
+        """
+        self.ensure()
+        if self.vendor != "sqlite":
+            return 0
+        queryset = queryset if queryset is not None else self.model._default_manager.all()
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.name}")
+        count = 0
+        batch = []
+        for row in queryset.values_list("pk", *self.fields).iterator(chunk_size=1000):
+            batch.append(row)
+            if len(batch) >= 1000:
+                count += self._insert_many(batch)
+                batch = []
+        if batch:
+            count += self._insert_many(batch)
+        return count
+
+    def _insert_many(self, rows):
+        placeholders = ", ".join(["%s"] * (len(self.fields) + 1))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.name} (rowid, {', '.join(self.fields)}) VALUES ({placeholders})",
+                [tuple(v if v is not None else "" for v in row) for row in rows],
+            )
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # sync
+    # ------------------------------------------------------------------
+    def update(self, obj, searchable=True):
+        """
+        (Re)index `obj`; with searchable=False the row is removed instead.
+        """
+        if self.vendor != "sqlite":
+            return
+        self.remove(obj.pk)
+        if searchable:
+            self._insert_many([(obj.pk, *[getattr(obj, f) for f in self.fields])])
+
+    def remove(self, pk):
+        if self.vendor != "sqlite":
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.name} WHERE rowid = %s", [pk])
+
+    # ------------------------------------------------------------------
+    # query
+    # ------------------------------------------------------------------
+    def search(self, queryset, query, highlight=None):
+        """
+        Filter `queryset` by `query` and order by relevance.
+        With highlight="<field>", rows also get a `search_snippet` attribute
+        holding an excerpt with matches wrapped in MARK_START/MARK_END
+        (render it with render_snippet()).
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return queryset.none()
+
+        if self.vendor == "sqlite":
+            match = " ".join(f'"{t}"*' for t in tokens)
+            bm25_args = "".join(f", {float(w)}" for w in self.weights or ())
+            select = {"search_rank": f"-bm25({self.name}{bm25_args})"}
+            select_params = []
+            if highlight:
+                col = self.fields.index(highlight)
+                select["search_snippet"] = f"snippet({self.name}, {col}, char(2), char(3), '…', 24)"
+            return queryset.extra(
+                tables=[self.name],
+                where=[f"{self.name}.rowid = {self._qn(self.table)}.{self._qn(self.model._meta.pk.column)}",
+                       f"{self.name} MATCH %s"],
+                params=[match],
+                select=select,
+                select_params=select_params,
+            ).order_by("-search_rank")
+
+        if self.vendor == "postgresql":
+            document = self._pg_document(self.table)
+            tsquery = f"websearch_to_tsquery('{self.config}', %s)"
+            text = " ".join(tokens)
+            select = {"search_rank": f"ts_rank({document}, {tsquery})"}
+            select_params = [text]
+            if highlight:
+                select["search_snippet"] = (
+                    f"ts_headline('{self.config}', {self._qn(self.table)}.{self._qn(highlight)}, {tsquery}, "
+                    "'StartSel=' || chr(2) || ', StopSel=' || chr(3) || ', MaxWords=35, MinWords=15')"
+                )
+                select_params.append(text)
+            return queryset.extra(
+                where=[f"{document} @@ {tsquery}"],
+                params=[text],
+                select=select,
+                select_params=select_params,
+            ).order_by("-search_rank")
+
+        cond = Q()
+        for t in tokens:
+            term = Q()
+            for f in self.fields:
+                term |= Q(**{f"{f}__icontains": t})
+            cond &= term
+        return queryset.filter(cond).extra(select={"search_rank": "0"})